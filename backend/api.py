@@ -6,12 +6,11 @@ import pandas as pd
 import pickle
 import os
 import asyncio
-from tensorflow.keras.models import load_model
 from pathlib import Path
 
 # Импортируем функции из наших модулей
 from backend.scripts.update_data import update_db_with_new_games
-from backend.scripts.train_model import train_model
+from backend.services.model_registry import registry, STATS
 
 app = FastAPI()
 
@@ -23,13 +22,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for model and artifacts
-model = None
-scaler = None
-team_emas = {}
-teams_df = None
-STATS = ['pts', 'reb', 'ast', 'stl', 'blk', 'tov', 'pf', 'fg_pct', 'fg3_pct', 'ft_pct']
-MODEL_DIR = "./models"
+# Model artifacts live in the shared process-wide registry
+MODEL_DIR = registry.model_dir
 
 # Функция для поиска файла базы данных
 def find_database_file():
@@ -61,42 +55,31 @@ class PredictionResponse(BaseModel):
 
 @app.on_event("startup")
 def load_artifacts():
-    global model, scaler, team_emas, teams_df
-    model_path = os.path.join(MODEL_DIR, "model.h5")
-    scaler_path = os.path.join(MODEL_DIR, "scaler.pkl")
-    emas_path = os.path.join(MODEL_DIR, "team_emas.pkl")
-    teams_path = os.path.join(MODEL_DIR, "teams.csv")
-
-    if not os.path.exists(model_path):
+    bundle = registry.load()
+    if bundle is None or bundle.teams_df is None:
         raise RuntimeError("Model not found. Run train_model.py first.")
-    model = load_model(model_path)
-    with open(scaler_path, "rb") as f:
-        scaler = pickle.load(f)
-    with open(emas_path, "rb") as f:
-        team_emas = pickle.load(f)
-    teams_df = pd.read_csv(teams_path)
-    
+
     print(f"Using database: {DB_PATH}")
 
 @app.get("/teams")
 def get_teams():
     """Return list of team abbreviations and names."""
-    return teams_df[['team_abbrev', 'team_name']].drop_duplicates().to_dict(orient='records')
+    return registry.bundle.teams_df[['team_abbrev', 'team_name']].drop_duplicates().to_dict(orient='records')
 
 @app.post("/predict", response_model=PredictionResponse)
 def predict(request: PredictionRequest):
-    home_row = teams_df[teams_df['team_abbrev'] == request.home_team]
-    away_row = teams_df[teams_df['team_abbrev'] == request.away_team]
-    if home_row.empty or away_row.empty:
+    # One bundle for the whole request, even if a reload happens meanwhile
+    bundle = registry.bundle
+    home_id = bundle.team_ids_by_abbrev.get(request.home_team)
+    away_id = bundle.team_ids_by_abbrev.get(request.away_team)
+    if home_id is None or away_id is None:
         raise HTTPException(status_code=404, detail="Team not found")
-    home_id = str(home_row.iloc[0]['team_id'])
-    away_id = str(away_row.iloc[0]['team_id'])
 
-    if home_id not in team_emas or away_id not in team_emas:
+    if home_id not in bundle.team_emas or away_id not in bundle.team_emas:
         raise HTTPException(status_code=404, detail="Team data not available")
 
-    home_ema = team_emas[home_id]
-    away_ema = team_emas[away_id]
+    home_ema = bundle.team_emas[home_id]
+    away_ema = bundle.team_emas[away_id]
 
     feat = []
     for stat in STATS:
@@ -105,8 +88,8 @@ def predict(request: PredictionRequest):
         feat.append(away_ema[stat])
 
     feat_array = np.array(feat).reshape(1, -1)
-    feat_scaled = scaler.transform(feat_array)
-    prob = model.predict(feat_scaled)[0][0]
+    feat_scaled = bundle.scaler.transform(feat_array)
+    prob = bundle.model.predict(feat_scaled)[0][0]
 
     return PredictionResponse(
         home_team=request.home_team,
@@ -123,8 +106,10 @@ async def retrain_task():
         # Передаем найденный путь к базе данных
         await loop.run_in_executor(None, update_db_with_new_games, DB_PATH, 7)
         print("Data update completed. Starting model training...")
-        # Переобучаем модель
-        await loop.run_in_executor(None, train_model, DB_PATH)
+        # TensorFlow is only needed for training, so import it lazily
+        from backend.scripts.train_model import train_and_publish
+        # Переобучаем модель в отдельную папку и публикуем её как новую версию
+        await loop.run_in_executor(None, train_and_publish, DB_PATH, MODEL_DIR)
         print("Model training completed. Reloading artifacts...")
         # Перезагружаем артефакты
         load_artifacts()
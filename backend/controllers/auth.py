@@ -5,6 +5,7 @@ from typing import Optional
 from database import get_db
 from services.auth_service import AuthService
 from middleware.auth import get_current_user
+from services.db_pool import run_db
 import schemas
 from scripts.auth import generate_token, TokenPayload  # изменено
 
@@ -15,14 +16,14 @@ async def register(user_data: schemas.UserCreate, db: Session = Depends(get_db))
     """Регистрация нового пользователя"""
     service = AuthService(db)
 
-    existing_user = service.get_user_by_email(user_data.email)
+    existing_user = await run_db(service.get_user_by_email, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Пользователь с таким email уже существует"
         )
 
-    user = service.create_user(user_data)
+    user = await run_db(service.create_user, user_data)
 
     # Генерация токена
     token_payload = auth_utils.TokenPayload(user_id=user.id, email=user.email, role=user.role)
@@ -39,7 +40,7 @@ async def login(login_data: schemas.UserLogin, db: Session = Depends(get_db)):
     """Вход в систему"""
     service = auth_service.AuthService(db)
 
-    user = service.authenticate_user(login_data.email, login_data.password)
+    user = await run_db(service.authenticate_user, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,7 +70,7 @@ async def get_me(request: Request, db: Session = Depends(get_db)):
         )
 
     service = auth_service.AuthService(db)
-    user = service.get_user_by_id(user_data.user_id)
+    user = await run_db(service.get_user_by_id, user_data.user_id)
 
     if not user:
         raise HTTPException(
@@ -84,5 +85,5 @@ async def get_me(request: Request, db: Session = Depends(get_db)):
 async def init_database(db: Session = Depends(get_db)):
     """Инициализация базы данных тестовыми пользователями"""
     service = auth_service.AuthService(db)
-    result = service.init_database()
+    result = await run_db(service.init_database)
     return {"message": "База данных инициализирована", **result}
\ No newline at end of file
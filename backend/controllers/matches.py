@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import date
 
 from database import get_db
 import schemas
@@ -8,31 +9,42 @@ from services.match_service import MatchService
 from services.team_service import TeamService
 from services.audit_service import AuditService
 from middleware.auth import require_admin_or_operator, require_admin
+from services.db_pool import run_db
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.MatchResponse])
 async def get_all_matches(
+        response: Response,
         status: Optional[str] = Query(None, description="Фильтр по статусу"),
         team_id: Optional[int] = Query(None, description="Фильтр по команде"),
+        date_from: Optional[date] = Query(None, description="Матчи не раньше этой даты"),
+        date_to: Optional[date] = Query(None, description="Матчи не позже этой даты"),
+        cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor предыдущей страницы"),
         skip: int = 0,
         limit: int = 100,
         db: Session = Depends(get_db)
 ):
-    """Получение списка матчей с фильтрацией"""
+    """
+    Получение списка матчей с фильтрацией.
+    Если есть следующая страница, её курсор возвращается в заголовке X-Next-Cursor.
+    """
     match_service = MatchService(db)
 
-    filters = {}
+    filters = {"team_id": team_id, "date_from": date_from, "date_to": date_to}
     if status:
         filters["status"] = status
 
-    matches = match_service.get_all_matches(filters, skip=skip, limit=limit)
-
-    # Фильтрация по команде
-    if team_id:
-        matches = [m for m in matches if m["home_team_id"] == team_id or m["away_team_id"] == team_id]
+    try:
+        matches, next_cursor = await run_db(
+            match_service.get_matches_page, filters, limit=limit, cursor=cursor, skip=skip
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return matches
 
 
@@ -40,7 +52,7 @@ async def get_all_matches(
 async def get_match_by_id(match_id: int, db: Session = Depends(get_db)):
     """Получение матча по ID"""
     match_service = MatchService(db)
-    match = match_service.get_match_by_id(match_id)
+    match = await run_db(match_service.get_match_by_id, match_id)
 
     if not match:
         raise HTTPException(
@@ -65,8 +77,8 @@ async def create_match(
 
     # Проверка существования команд
     team_service = TeamService(db)
-    home_team = team_service.get_team_by_id(match_data.home_team_id)
-    away_team = team_service.get_team_by_id(match_data.away_team_id)
+    home_team = await run_db(team_service.get_team_by_id, match_data.home_team_id)
+    away_team = await run_db(team_service.get_team_by_id, match_data.away_team_id)
 
     if not home_team or not away_team:
         raise HTTPException(
@@ -83,7 +95,8 @@ async def create_match(
     match = match_service.create_match(match_data, user.user_id)
 
     audit_service = AuditService(db)
-    audit_service.log(
+    await run_db(
+        audit_service.log,
         user_id=user.user_id,
         action="CREATE",
         entity="Match",
@@ -92,7 +105,8 @@ async def create_match(
             "home_team": home_team["name"],
             "away_team": away_team["name"],
             "date": match_data.date.isoformat()
-        }
+        },
+        durable=True
     )
 
     return match
@@ -111,14 +125,15 @@ async def update_match_result(
 
     match_service = MatchService(db)
 
-    match = match_service.get_match_by_id(match_id)
+    match = await run_db(match_service.get_match_by_id, match_id)
     if not match:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Матч с ID {match_id} не найден"
         )
 
-    updated_match = match_service.update_match_result(
+    updated_match = await run_db(
+        match_service.update_match_result,
         match_id,
         result_data.home_score,
         result_data.away_score,
@@ -126,7 +141,8 @@ async def update_match_result(
     )
 
     audit_service = AuditService(db)
-    audit_service.log(
+    await run_db(
+        audit_service.log,
         user_id=user.user_id,
         action="UPDATE_RESULT",
         entity="Match",
@@ -134,7 +150,8 @@ async def update_match_result(
         details={
             "home_score": result_data.home_score,
             "away_score": result_data.away_score
-        }
+        },
+        durable=True
     )
 
     return updated_match
@@ -152,17 +169,18 @@ async def delete_match(
 
     match_service = MatchService(db)
 
-    match = match_service.get_match_by_id(match_id)
+    match = await run_db(match_service.get_match_by_id, match_id)
     if not match:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Матч с ID {match_id} не найден"
         )
 
-    deleted_match = match_service.delete_match(match_id, user.user_id)
+    deleted_match = await run_db(match_service.delete_match, match_id, user.user_id)
 
     audit_service = AuditService(db)
-    audit_service.log(
+    await run_db(
+        audit_service.log,
         user_id=user.user_id,
         action="DELETE",
         entity="Match",
@@ -170,7 +188,8 @@ async def delete_match(
         details={
             "home_team_id": match["home_team_id"],
             "away_team_id": match["away_team_id"]
-        }
+        },
+        durable=True
     )
 
     return {"message": "Матч удален", "match": deleted_match}
\ No newline at end of file
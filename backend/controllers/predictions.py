@@ -6,6 +6,7 @@ import json
 from database import get_db
 from services import ai_service, team_service, audit_service, match_service  # добавлен match_service
 from middleware.auth import get_current_user, require_admin
+from services.db_pool import run_db
 import schemas
 
 router = APIRouter()
@@ -31,8 +32,8 @@ async def predict(
     audit_svc = audit_service.AuditService(db)
 
     # Проверка существования команд
-    team1 = team_svc.get_team_by_id(prediction_data.team1_id)
-    team2 = team_svc.get_team_by_id(prediction_data.team2_id)
+    team1 = await run_db(team_svc.get_team_by_id, prediction_data.team1_id)
+    team2 = await run_db(team_svc.get_team_by_id, prediction_data.team2_id)
 
     if not team1 or not team2:
         raise HTTPException(
@@ -66,13 +67,14 @@ async def predict(
         }
 
     # Логирование
-    audit_svc.log(
+    await run_db(
+        audit_svc.log,
         user_id=user_data.user_id,
         action="PREDICT",
         entity="Prediction",
         details={
-            "team1": team1.name,
-            "team2": team2.name,
+            "team1": team1["name"],
+            "team2": team2["name"],
             "probability": prediction.get("probabilityTeam1")
         }
     )
@@ -156,7 +158,7 @@ async def train_on_match(
     audit_svc = audit_service.AuditService(db)
 
     # Проверка существования матча
-    match = match_svc.get_match_by_id(match_id)
+    match = await run_db(match_svc.get_match_by_id, match_id)
 
     if not match:
         raise HTTPException(
@@ -173,12 +175,14 @@ async def train_on_match(
     # Обучение модели
     result = await ai_svc.train_on_actual_result(match)
 
-    audit_svc.log(
+    await run_db(
+        audit_svc.log,
         user_id=user_data.user_id,
         action="TRAIN_MODEL",
         entity="Match",
         entity_id=match_id,
-        details=result
+        details=result,
+        durable=True
     )
 
     return {
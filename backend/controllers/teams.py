@@ -7,6 +7,7 @@ import schemas
 from services.team_service import TeamService
 from services.audit_service import AuditService
 from middleware.auth import require_admin_or_operator, require_admin, get_current_user  # добавлено
+from services.db_pool import run_db
 
 router = APIRouter()
 
@@ -19,14 +20,14 @@ async def get_all_teams(
 ):
     """Получение списка всех команд"""
     team_service = TeamService(db)
-    return team_service.get_all_teams(skip=skip, limit=limit)
+    return await run_db(team_service.get_all_teams, skip=skip, limit=limit)
 
 
 @router.get("/{team_id}", response_model=schemas.TeamResponse)
 async def get_team_by_id(team_id: int, db: Session = Depends(get_db)):
     """Получение команды по ID"""
     team_service = TeamService(db)
-    team = team_service.get_team_by_id(team_id)
+    team = await run_db(team_service.get_team_by_id, team_id)
 
     if not team:
         raise HTTPException(
@@ -49,7 +50,7 @@ async def create_team(
 
     team_service = TeamService(db)
 
-    existing = team_service.get_team_by_name(team_data.name)
+    existing = await run_db(team_service.get_team_by_name, team_data.name)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,12 +61,14 @@ async def create_team(
 
     # Логирование
     audit_service = AuditService(db)
-    audit_service.log(
+    await run_db(
+        audit_service.log,
         user_id=user.user_id,
         action="CREATE",
         entity="Team",
         entity_id=team["id"],
-        details={"name": team_data.name}
+        details={"name": team_data.name},
+        durable=True
     )
 
     return team
@@ -84,22 +87,24 @@ async def update_team(
 
     team_service = TeamService(db)
 
-    team = team_service.get_team_by_id(team_id)
+    team = await run_db(team_service.get_team_by_id, team_id)
     if not team:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Команда с ID {team_id} не найдена"
         )
 
-    updated_team = team_service.update_team(team_id, team_data, user.user_id)
+    updated_team = await run_db(team_service.update_team, team_id, team_data, user.user_id)
 
     audit_service = AuditService(db)
-    audit_service.log(
+    await run_db(
+        audit_service.log,
         user_id=user.user_id,
         action="UPDATE",
         entity="Team",
         entity_id=team_id,
-        details=team_data.dict(exclude_unset=True)
+        details=team_data.dict(exclude_unset=True),
+        durable=True
     )
 
     return updated_team
@@ -117,22 +122,24 @@ async def delete_team(
 
     team_service = TeamService(db)
 
-    team = team_service.get_team_by_id(team_id)
+    team = await run_db(team_service.get_team_by_id, team_id)
     if not team:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Команда с ID {team_id} не найдена"
         )
 
-    deleted_team = team_service.delete_team(team_id, user.user_id)
+    deleted_team = await run_db(team_service.delete_team, team_id, user.user_id)
 
     audit_service = AuditService(db)
-    audit_service.log(
+    await run_db(
+        audit_service.log,
         user_id=user.user_id,
         action="DELETE",
         entity="Team",
         entity_id=team_id,
-        details={"name": team["name"]}
+        details={"name": team["name"]},
+        durable=True
     )
 
     return {"message": "Команда удалена", "team": deleted_team}
\ No newline at end of file
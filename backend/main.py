@@ -1,12 +1,12 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import numpy as np
 import pandas as pd
 import pickle
 import os
 import asyncio
-from tensorflow.keras.models import load_model
 import sqlite3
 from datetime import datetime
 from typing import List, Optional
@@ -15,13 +15,23 @@ import json
 # Импортируем контроллеры из папки controllers
 from controllers import auth, teams, matches, predictions
 
-# Импортируем функции из скриптов
-from scripts.update_data import update_db_with_new_games
-from scripts.train_model import train_model
 
 # Импортируем database
 from database import engine, Base
 
+# Общий реестр модели
+from services.model_registry import registry, STATS
+from services.inference_batcher import batcher
+# Переобучение в отдельном процессе (TensorFlow загружается только там)
+from services.retrain_jobs import retrain_jobs
+# Общий пул соединений SQLite для сервисов
+from services.db_pool import db_pool, db_executor
+from services.schema import bootstrap_schema
+from services.team_catalog import team_catalog
+from services.prediction_writer import prediction_writer
+from services.audit_writer import audit_writer
+from services.batch_writer import DurableWriteError
+
 app = FastAPI(
     title="HoopsAI API",
     description="API для прогнозирования баскетбольных матчей",
@@ -39,15 +49,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Разрешаем все методы (GET, POST, OPTIONS и т.д.)
     allow_headers=["*"],  # Разрешаем все заголовки
+    expose_headers=["X-Next-Cursor"],  # Курсор следующей страницы матчей
 )
-# ========== ГЛОБАЛЬНЫЕ ПЕРЕМЕННЫЕ ДЛЯ НЕЙРОСЕТИ ==========
-model = None
-scaler = None
-team_emas = {}
-teams_df = None
-STATS = ['pts', 'reb', 'ast', 'stl', 'blk', 'tov', 'pf', 'fg_pct', 'fg3_pct', 'ft_pct']
-MODEL_DIR = "./models"
+
+
+@app.exception_handler(DurableWriteError)
+async def durable_write_failed(request: Request, exc: DurableWriteError):
+    # Действие администратора выполнено, но запись аудита не подтверждена - сообщаем, а не молчим
+    print(f"❌ {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Запись журнала аудита не подтверждена"})
+
+# ========== НАСТРОЙКИ НЕЙРОСЕТИ ==========
+MODEL_DIR = registry.model_dir
 DB_PATH = "./nba.sqlite"
+MAX_BATCH_MATCHUPS = 10000
 
 
 # ========== МОДЕЛИ ДЛЯ НЕЙРОСЕТИ ==========
@@ -62,70 +77,110 @@ class NeuralPredictionResponse(BaseModel):
     home_win_probability: float
 
 
+class NeuralBatchPredictionRequest(BaseModel):
+    matchups: List[NeuralPredictionRequest]
+
+
+class NeuralBatchPredictionItem(BaseModel):
+    home_team: str
+    away_team: str
+    home_win_probability: Optional[float] = None
+    error: Optional[str] = None
+
+
+class NeuralBatchPredictionResponse(BaseModel):
+    model_version: str
+    predictions: List[NeuralBatchPredictionItem]
+
+
 # ========== ЗАГРУЗКА НЕЙРОСЕТИ ПРИ СТАРТЕ ==========
+@app.on_event("startup")
+def migrate_schema():
+    bootstrap_schema()
+
+
+@app.on_event("startup")
+def start_batch_writers():
+    prediction_writer.start()
+    audit_writer.start()
+
+
 @app.on_event("startup")
 def load_artifacts():
-    global model, scaler, team_emas, teams_df
-    model_path = os.path.join(MODEL_DIR, "model.h5")
-    scaler_path = os.path.join(MODEL_DIR, "scaler.pkl")
-    emas_path = os.path.join(MODEL_DIR, "team_emas.pkl")
-    teams_path = os.path.join(MODEL_DIR, "teams.csv")
-
-    if os.path.exists(model_path):
-        try:
-            model = load_model(model_path)
-            with open(scaler_path, "rb") as f:
-                scaler = pickle.load(f)
-            with open(emas_path, "rb") as f:
-                team_emas = pickle.load(f)
-            if os.path.exists(teams_path):
-                teams_df = pd.read_csv(teams_path)
-            print("✅ Нейросеть загружена успешно")
-        except Exception as e:
-            print(f"⚠️ Ошибка загрузки нейросети: {e}")
-    else:
-        print("⚠️ Нейросеть не найдена. Сначала запустите train_model.py")
+    registry.load()
+
+
+@app.on_event("startup")
+def start_inference_batcher():
+    batcher.start()
+
+
+@app.on_event("shutdown")
+def stop_inference_batcher():
+    batcher.stop()
+
+
+@app.on_event("startup")
+def cleanup_artifacts():
+    retrain_jobs.cleanup()
+
+
+@app.on_event("shutdown")
+def stop_retrain_jobs():
+    retrain_jobs.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_db_executor():
+    # Сначала дождаться запросов к БД в потоках, потом закрывать соединения
+    db_executor.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_batch_writers():
+    # Дописать прогнозы и аудит из очередей, пока пул соединений ещё открыт
+    prediction_writer.stop()
+    audit_writer.stop()
+
+
+@app.on_event("shutdown")
+def close_db_pool():
+    db_pool.close_all()
 
 
 # ========== ЭНДПОИНТЫ ДЛЯ НЕЙРОСЕТИ ==========
 @app.get("/api/neural/teams")
 def get_neural_teams():
     """Список команд для нейросети"""
-    if teams_df is None:
+    bundle = registry.bundle
+    if bundle is None or bundle.teams_df is None:
         raise HTTPException(status_code=503, detail="Нейросеть не загружена")
-    return teams_df[['team_abbrev', 'team_name']].drop_duplicates().to_dict(orient='records')
+    return bundle.teams_df[['team_abbrev', 'team_name']].drop_duplicates().to_dict(orient='records')
 
 
 @app.post("/api/neural/predict", response_model=NeuralPredictionResponse)
 def neural_predict(request: NeuralPredictionRequest):
     """Предсказание от нейросети"""
-    if model is None or scaler is None or teams_df is None:
+    # Берём один набор артефактов на весь запрос
+    bundle = registry.bundle
+    if bundle is None or bundle.teams_df is None:
         raise HTTPException(status_code=503, detail="Нейросеть не загружена")
 
-    home_row = teams_df[teams_df['team_abbrev'] == request.home_team]
-    away_row = teams_df[teams_df['team_abbrev'] == request.away_team]
+    home_id = bundle.team_ids_by_abbrev.get(request.home_team)
+    away_id = bundle.team_ids_by_abbrev.get(request.away_team)
 
-    if home_row.empty or away_row.empty:
+    if home_id is None or away_id is None:
         raise HTTPException(status_code=404, detail="Команда не найдена")
 
-    home_id = str(home_row.iloc[0]['team_id'])
-    away_id = str(away_row.iloc[0]['team_id'])
-
-    if home_id not in team_emas or away_id not in team_emas:
+    if home_id not in bundle.team_emas or away_id not in bundle.team_emas:
         raise HTTPException(status_code=404, detail="Данные команды недоступны")
 
-    home_ema = team_emas[home_id]
-    away_ema = team_emas[away_id]
-
-    feat = []
-    for stat in STATS:
-        feat.append(home_ema[stat])
-    for stat in STATS:
-        feat.append(away_ema[stat])
-
-    feat_array = np.array(feat).reshape(1, -1)
-    feat_scaled = scaler.transform(feat_array)
-    prob = model.predict(feat_scaled)[0][0]
+    # Обычно ответ берётся из заранее посчитанной матрицы пар
+    prob = bundle.lookup(home_id, away_id)
+    if prob is None:
+        # Матрицы нет - одиночные запросы склеиваются с параллельными в один вызов модели
+        feat_array = bundle.build_features([bundle.team_index[home_id]], [bundle.team_index[away_id]])
+        prob = batcher.predict(bundle, feat_array)
 
     return NeuralPredictionResponse(
         home_team=request.home_team,
@@ -134,26 +189,97 @@ def neural_predict(request: NeuralPredictionRequest):
     )
 
 
-@app.post("/api/neural/retrain")
-async def neural_retrain(background_tasks: BackgroundTasks):
-    """Переобучение нейросети в фоне"""
-    background_tasks.add_task(retrain_task)
-    return {"message": "Переобучение запущено в фоне. Это может занять несколько минут."}
+@app.post("/api/neural/predict/batch", response_model=NeuralBatchPredictionResponse)
+def neural_predict_batch(request: NeuralBatchPredictionRequest):
+    """Пакетное предсказание: все пары за один проход модели"""
+    bundle = registry.bundle
+    if bundle is None or bundle.teams_df is None:
+        raise HTTPException(status_code=503, detail="Нейросеть не загружена")
 
+    if len(request.matchups) > MAX_BATCH_MATCHUPS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много пар в запросе (максимум {MAX_BATCH_MATCHUPS})"
+        )
+
+    items = []
+    positions, home_ids, away_ids = [], [], []
+    for i, matchup in enumerate(request.matchups):
+        item = NeuralBatchPredictionItem(home_team=matchup.home_team, away_team=matchup.away_team)
+        items.append(item)
+
+        home_id = bundle.team_ids_by_abbrev.get(matchup.home_team)
+        away_id = bundle.team_ids_by_abbrev.get(matchup.away_team)
+        if home_id is None or away_id is None:
+            item.error = "Команда не найдена"
+        elif home_id not in bundle.team_index or away_id not in bundle.team_index:
+            item.error = "Данные команды недоступны"
+        else:
+            positions.append(i)
+            home_ids.append(home_id)
+            away_ids.append(away_id)
+
+    # Одна матрица признаков, один scaler.transform и один вызов модели на весь запрос
+    probs = bundle.predict_pairs(home_ids, away_ids)
+    for i, prob in zip(positions, probs.tolist()):
+        items[i].home_win_probability = prob
+
+    return NeuralBatchPredictionResponse(model_version=bundle.version, predictions=items)
 
-async def retrain_task():
-    """Фоновая задача для переобучения"""
+
+@app.post("/api/neural/retrain")
+async def neural_retrain(force: bool = False, mode: str = "incremental"):
+    """
+    Переобучение нейросети в отдельном процессе (пропускается, если данные не изменились).
+    mode=incremental - дообучение на новых играх с откатом на полное обучение,
+    mode=full - обучение с нуля.
+    Одновременно идёт не больше одной задачи: повторный запрос возвращает текущую.
+    """
     try:
-        loop = asyncio.get_event_loop()
-        print("🔄 Начало обновления данных...")
-        await loop.run_in_executor(None, update_db_with_new_games, DB_PATH, 7)
-        print("✅ Данные обновлены. Начало обучения модели...")
-        await loop.run_in_executor(None, train_model, DB_PATH)
-        print("✅ Модель обучена. Перезагрузка артефактов...")
-        load_artifacts()
-        print("✅ Переобучение завершено успешно")
-    except Exception as e:
-        print(f"❌ Ошибка при переобучении: {e}")
+        job, created = retrain_jobs.submit(force, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "message": "Переобучение запущено в отдельном процессе. Это может занять несколько минут."
+        if created else "Переобучение уже выполняется",
+        "job_id": job.job_id,
+        "created": created,
+        "force": job.force,
+        "mode": job.mode,
+        "status": f"/api/neural/retrain/jobs/{job.job_id}"
+    }
+
+
+@app.get("/api/neural/retrain/status")
+async def neural_retrain_status():
+    """Состояние последней задачи переобучения, включая причину пропуска"""
+    job = retrain_jobs.latest()
+    return job.to_dict() if job else {"status": "idle"}
+
+
+@app.get("/api/neural/retrain/jobs")
+async def neural_retrain_jobs():
+    """Последние задачи переобучения, новые первыми"""
+    return retrain_jobs.jobs()
+
+
+@app.get("/api/neural/retrain/jobs/{job_id}")
+async def neural_retrain_job(job_id: str):
+    """Статус и прогресс задачи переобучения"""
+    job = retrain_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job.to_dict()
+
+
+@app.post("/api/neural/retrain/jobs/{job_id}/cancel")
+async def neural_retrain_cancel(job_id: str):
+    """Отмена задачи: процесс обучения останавливается, текущая модель не меняется"""
+    loop = asyncio.get_event_loop()
+    job = await loop.run_in_executor(None, retrain_jobs.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job.to_dict()
 
 
 # ========== HEALTH CHECK ==========
@@ -162,11 +288,26 @@ async def health_check():
     return {
         "status": "OK",
         "timestamp": datetime.now().isoformat(),
-        "neural_loaded": model is not None,
+        "neural_loaded": registry.bundle is not None,
+        "neural_model": registry.info(),
         "service": "HoopsAI API"
     }
 
 
+# ========== МЕТРИКИ ==========
+@app.get("/api/metrics")
+async def metrics():
+    return {
+        "neural_model": registry.info(),
+        "inference_batcher": batcher.stats(),
+        "sqlite_pool": db_pool.stats(),
+        "sqlite_executor": db_executor.stats(),
+        "team_catalog": team_catalog.stats(),
+        "prediction_writer": prediction_writer.stats(),
+        "audit_writer": audit_writer.stats(),
+    }
+
+
 # ========== ПОДКЛЮЧАЕМ КОНТРОЛЛЕРЫ ==========
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
@@ -186,13 +327,19 @@ async def root():
     return {
         "message": "HoopsAI API работает!",
         "version": "1.0.0",
-        "neural_loaded": model is not None,
+        "neural_loaded": registry.bundle is not None,
         "endpoints": {
             "health": "/api/health",
+            "metrics": "/api/metrics",
             "neural": {
                 "teams": "/api/neural/teams",
                 "predict": "POST /api/neural/predict",
-                "retrain": "POST /api/neural/retrain"
+                "predict_batch": "POST /api/neural/predict/batch",
+                "retrain": "POST /api/neural/retrain",
+                "retrain_status": "GET /api/neural/retrain/status",
+                "retrain_jobs": "GET /api/neural/retrain/jobs",
+                "retrain_job": "GET /api/neural/retrain/jobs/{job_id}",
+                "retrain_cancel": "POST /api/neural/retrain/jobs/{job_id}/cancel"
             },
             "auth": {
                 "register": "POST /api/auth/register",
@@ -0,0 +1,129 @@
+"""
+Benchmark: per-call audit commits vs. the group-commit audit writer.
+
+Runs the same concurrent audit load (several threads, like DB executor workers
+serving requests) three times against a throwaway database:
+  - "per-call": CREATE TABLE IF NOT EXISTS + INSERT + COMMIT on every log call,
+    as AuditService.log used to;
+  - "group": AuditWriter.submit - the call only enqueues, a background thread
+    commits entries in batches;
+  - "durable": AuditWriter.submit(durable=True) - the call waits for the group
+    commit that contains its entry (admin actions).
+
+Prints p50/p99/max latency of a single log call and checks that every entry
+reached the table.
+
+Usage (from backend/):
+    python scripts/benchmark_audit_log.py [n_threads] [calls_per_thread]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.audit_writer import AuditWriter
+from services.db_pool import SQLitePool
+from services.schema import AUDIT_LOGS_TABLE
+
+DEFAULT_THREADS = 8
+DEFAULT_CALLS = 500
+
+
+def entry(i):
+    return {
+        "user_id": i % 50,
+        "action": "PREDICT",
+        "entity": "Prediction",
+        "entity_id": None,
+        "details": json.dumps({"team1": "Boston Celtics", "team2": "Miami Heat", "probability": 55.5}),
+        "ip_address": None,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+def per_call_log(pool, record):
+    with pool.connection() as conn:
+        conn.execute(AUDIT_LOGS_TABLE)
+        conn.execute(
+            "INSERT INTO audit_logs (user_id, action, entity, entity_id, details, ip_address, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            tuple(record.values())
+        )
+        conn.commit()
+
+
+def run_load(log, n_threads, n_calls):
+    latencies = [[] for _ in range(n_threads)]
+
+    def worker(t):
+        for i in range(n_calls):
+            start = time.perf_counter()
+            log(entry(i))
+            latencies[t].append((time.perf_counter() - start) * 1000.0)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.concatenate(latencies), time.perf_counter() - start
+
+
+def summarize(arr):
+    p50, p99 = np.percentile(arr, [50, 99])
+    return f"p50 {p50:7.3f}  p99 {p99:7.3f}  max {arr.max():8.3f} ms"
+
+
+def main():
+    n_threads = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_THREADS
+    n_calls = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CALLS
+    total = n_threads * n_calls
+    print(f"Load: {n_threads} threads x {n_calls} audit log calls\n")
+
+    results = {}
+    for mode in ("per-call", "group", "durable"):
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = SQLitePool(os.path.join(tmp, "bench.sqlite"))
+            with pool.connection() as conn:
+                conn.execute(AUDIT_LOGS_TABLE)
+                conn.commit()
+
+            if mode == "per-call":
+                latencies, elapsed = run_load(lambda record: per_call_log(pool, record), n_threads, n_calls)
+                stats = None
+            else:
+                writer = AuditWriter(pool=pool)
+                writer.start()
+                durable = mode == "durable"
+                latencies, elapsed = run_load(lambda record: writer.submit(record, durable=durable),
+                                              n_threads, n_calls)
+                writer.stop()
+                stats = writer.stats()
+
+            with pool.connection() as conn:
+                rows = conn.execute("SELECT COUNT(*) FROM audit_logs").fetchone()[0]
+            pool.close_all()
+
+        results[mode] = latencies
+        print(f"[{mode}] {summarize(latencies)}  total {elapsed:.2f}s  rows {rows}/{total}")
+        if stats:
+            print(f"  batches {stats['batches']}, avg batch {stats['avg_batch_size']}, "
+                  f"commit avg {stats['flush']['avg_ms']} ms")
+        if rows != total:
+            print(f"❌ {mode}: lost {total - rows} entries")
+            sys.exit(1)
+
+    before = np.percentile(results["per-call"], 99)
+    after = np.percentile(results["group"], 99)
+    print(f"\nAudit call p99: {before:.3f} ms -> {after:.3f} ms ({before / max(after, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: blocking sqlite3 calls inside async handlers vs. the bounded DB executor.
+
+Builds a synthetic game table, then runs the same mixed load against it twice:
+  - "blocking": async handlers call the sync service code directly, as the
+    controllers used to, so every query stalls the event loop;
+  - "executor": handlers await run_db-style calls on a DBExecutor, so queries
+    run on the pooled connections while the loop keeps serving other requests.
+
+The load is mostly fast point lookups with a share of slow full-scan aggregates,
+arriving on an open-loop schedule. Prints p50/p95/p99/max latency per request type.
+
+Usage (from backend/):
+    python scripts/benchmark_db_concurrency.py [n_games] [n_requests] [rate_per_sec]
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.db_pool import SQLitePool, DBExecutor
+
+DEFAULT_GAMES = 100000
+DEFAULT_REQUESTS = 1000
+DEFAULT_RATE = 40.0
+SLOW_SHARE = 0.05
+N_TEAMS = 30
+
+
+def build_db(path, n_games):
+    rng = np.random.default_rng(0)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE game (
+            game_id TEXT PRIMARY KEY, game_date TEXT,
+            team_id_home TEXT, team_id_away TEXT,
+            pts_home REAL, pts_away REAL, wl_home TEXT
+        )
+    """)
+    home = rng.integers(0, N_TEAMS, n_games)
+    away = (home + rng.integers(1, N_TEAMS, n_games)) % N_TEAMS
+    pts_home = rng.normal(110, 12, n_games).round()
+    pts_away = rng.normal(108, 12, n_games).round()
+    rows = [
+        (str(i), f"{2000 + i * 25 // n_games}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+         str(h), str(a), float(ph), float(pa), "W" if ph > pa else "L")
+        for i, (h, a, ph, pa) in enumerate(zip(home, away, pts_home, pts_away))
+    ]
+    conn.executemany("INSERT INTO game VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def fast_query(pool, n_games):
+    """Point lookup by primary key (like GET /api/matches/{id})"""
+    with pool.connection() as conn:
+        row = conn.execute("SELECT * FROM game WHERE game_id = ?",
+                           (str(random.randrange(n_games)),)).fetchone()
+        return dict(row) if row else None
+
+
+def slow_query(pool):
+    """Full-scan aggregate (like team stats over the whole history)"""
+    with pool.connection() as conn:
+        return conn.execute("""
+            SELECT team_id_home, COUNT(*), AVG(pts_home), SUM(wl_home = 'W')
+            FROM game GROUP BY team_id_home
+        """).fetchall()
+
+
+async def run_load(mode, pool, executor, n_games, n_requests, rate):
+    """
+    Open-loop load: requests arrive on a fixed Poisson schedule regardless of how
+    fast earlier ones finish, and latency is measured from the scheduled arrival.
+    Time a request spends waiting for a blocked event loop is therefore counted.
+    """
+    latencies = {"fast": [], "slow": []}
+    rng = random.Random(1)
+    loop = asyncio.get_running_loop()
+
+    async def handle(kind, arrival):
+        if mode == "blocking":
+            if kind == "fast":
+                fast_query(pool, n_games)
+            else:
+                slow_query(pool)
+        else:
+            if kind == "fast":
+                await executor.run(fast_query, pool, n_games)
+            else:
+                await executor.run(slow_query, pool)
+        latencies[kind].append((loop.time() - arrival) * 1000.0)
+
+    tasks = []
+    start = loop.time()
+    arrival = start
+    for _ in range(n_requests):
+        arrival += rng.expovariate(rate)
+        kind = "slow" if rng.random() < SLOW_SHARE else "fast"
+        delay = arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handle(kind, arrival)))
+        # Let the new request start like a server accepting a connection would
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return latencies, loop.time() - start
+
+
+def summarize(values):
+    arr = np.asarray(values)
+    if not len(arr):
+        return "n/a"
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return f"p50 {p50:8.2f}  p95 {p95:8.2f}  p99 {p99:8.2f}  max {arr.max():8.2f} ms  (n={len(arr)})"
+
+
+def main():
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_GAMES
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REQUESTS
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_RATE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite")
+        print(f"Building synthetic DB with {n_games} games...")
+        build_db(path, n_games)
+
+        pool = SQLitePool(path)
+        executor = DBExecutor()
+        print(f"Load: {n_requests} requests at {rate:.0f} req/s (Poisson arrivals), "
+              f"{SLOW_SHARE:.0%} slow full-scan queries, pool={pool.max_size}, "
+              f"executor workers={executor.max_workers}\n")
+
+        # Warm up page cache so both runs see the same storage state
+        slow_query(pool)
+
+        results = {}
+        for mode in ("blocking", "executor"):
+            latencies, elapsed = asyncio.run(
+                run_load(mode, pool, executor, n_games, n_requests, rate)
+            )
+            results[mode] = (latencies, elapsed)
+            print(f"[{mode}] total {elapsed:.2f}s")
+            for kind in ("fast", "slow"):
+                print(f"  {kind:<5} {summarize(latencies[kind])}")
+            print()
+
+        fast_before = np.percentile(results["blocking"][0]["fast"], 99)
+        fast_after = np.percentile(results["executor"][0]["fast"], 99)
+        print(f"Fast-query p99: {fast_before:.2f} ms -> {fast_after:.2f} ms "
+              f"({fast_before / max(fast_after, 1e-9):.1f}x)")
+
+        executor.shutdown()
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark: vectorized EMA dataset building vs. the old game-by-game iterrows loop.
+
+Generates synthetic game tables of several sizes, runs both implementations,
+checks that X, y, weights, game dates and final team EMAs are bit-for-bit equal,
+and prints timings and speedup.
+
+Usage (from backend/):
+    python scripts/benchmark_ema.py [n_games ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.train_model import (
+    STATS, ALPHA, WEIGHT_DECAY_DAYS, compute_global_averages, preprocess_and_build_dataset
+)
+
+DEFAULT_SIZES = [1000, 5000, 20000]
+N_TEAMS = 30
+
+
+def preprocess_and_build_dataset_iterrows(df):
+    """
+    Reference implementation (the original iterrows loop).
+    For each game, use current EMA of home and away as features,
+    then update EMA with actual game stats.
+    Returns X, y, sample_weights, and final team_emas.
+    """
+    df = df.sort_values('game_date', kind='stable').reset_index(drop=True)
+    # Convert date to datetime
+    df['game_date'] = pd.to_datetime(df['game_date'])
+
+    # Fill missing numeric stats with 0
+    for stat in STATS:
+        home_col = f'{stat}_home'
+        away_col = f'{stat}_away'
+        if home_col in df.columns:
+            df[home_col] = pd.to_numeric(df[home_col], errors='coerce').fillna(0)
+        else:
+            df[home_col] = 0  # Create column if missing
+        if away_col in df.columns:
+            df[away_col] = pd.to_numeric(df[away_col], errors='coerce').fillna(0)
+        else:
+            df[away_col] = 0
+    # Global averages for initialization
+    global_avg = compute_global_averages(df)
+
+    # Prepare containers
+    features = []
+    targets = []
+    weights = []
+    game_dates = []
+
+    # EMA state per team: dict of {team_id: {stat: value}}
+    team_emas = {}
+
+    # For weight calculation, use the most recent game date as "now"
+    last_date = df['game_date'].max()
+
+    for idx, row in df.iterrows():
+        home_id = str(row['team_id_home'])
+        away_id = str(row['team_id_away'])
+        game_date = row['game_date']
+
+        # Initialize team EMAs if not present
+        if home_id not in team_emas:
+            team_emas[home_id] = global_avg.copy()
+        if away_id not in team_emas:
+            team_emas[away_id] = global_avg.copy()
+
+        # Get current EMAs (pre-game)
+        home_ema = team_emas[home_id]
+        away_ema = team_emas[away_id]
+
+        # Build feature vector: concatenate home and away stats in fixed order
+        feat = []
+        for stat in STATS:
+            feat.append(home_ema[stat])
+        for stat in STATS:
+            feat.append(away_ema[stat])
+        features.append(feat)
+
+        # Target: 1 if home win, else 0
+        target = 1 if row['wl_home'] == 'W' else 0
+        targets.append(target)
+
+        # Sample weight based on recency
+        days_old = (last_date - game_date).days
+        weight = np.exp(-days_old / WEIGHT_DECAY_DAYS)
+        weights.append(weight)
+        game_dates.append(game_date)
+
+        # After the game, update home team's EMA with actual stats
+        actual_home = {}
+        for stat in STATS:
+            col = f'{stat}_home'
+            val = row[col] if col in row else 0
+            if pd.isna(val):
+                val = 0
+            actual_home[stat] = val
+        # Update EMA
+        new_home_ema = {}
+        for stat in STATS:
+            new_home_ema[stat] = ALPHA * actual_home[stat] + (1 - ALPHA) * home_ema[stat]
+        team_emas[home_id] = new_home_ema
+
+        # Update away team's EMA
+        actual_away = {}
+        for stat in STATS:
+            col = f'{stat}_away'
+            val = row[col] if col in row else 0
+            if pd.isna(val):
+                val = 0
+            actual_away[stat] = val
+        new_away_ema = {}
+        for stat in STATS:
+            new_away_ema[stat] = ALPHA * actual_away[stat] + (1 - ALPHA) * away_ema[stat]
+        team_emas[away_id] = new_away_ema
+
+    X = np.array(features)
+    y = np.array(targets)
+    weights = np.array(weights)
+
+    # Optional: filter out games with very few prior games? (We used global avg, so all included)
+    return X, y, weights, team_emas, game_dates
+
+
+def make_games(n_games, seed=0):
+    """Synthetic game table shaped like the `game` table (numeric stats with some gaps)."""
+    rng = np.random.default_rng(seed)
+    team_ids = np.arange(1610612737, 1610612737 + N_TEAMS)
+    home = rng.integers(0, N_TEAMS, n_games)
+    away = (home + rng.integers(1, N_TEAMS, n_games)) % N_TEAMS
+    dates = pd.Timestamp("2000-10-01") + pd.to_timedelta(np.arange(n_games) // 8, unit="D")
+
+    data = {
+        'game_id': [f"00{20000000 + i}" for i in range(n_games)],
+        'game_date': dates.strftime("%Y-%m-%d 00:00:00"),
+        'team_id_home': team_ids[home].astype(str),
+        'team_id_away': team_ids[away].astype(str),
+        'wl_home': np.where(rng.random(n_games) < 0.58, 'W', 'L'),
+    }
+    for side in ('home', 'away'):
+        for stat in STATS:
+            if stat.endswith('_pct'):
+                values = np.round(rng.uniform(0.3, 0.9, n_games), 3)
+            else:
+                values = rng.integers(0, 130, n_games).astype(float)
+            values[rng.random(n_games) < 0.01] = np.nan  # missing values as in the real dump
+            data[f'{stat}_{side}'] = values
+    return pd.DataFrame(data)
+
+
+def assert_identical(reference, vectorized):
+    X_ref, y_ref, w_ref, emas_ref, dates_ref = reference
+    X_vec, y_vec, w_vec, emas_vec, dates_vec = vectorized
+    assert X_ref.dtype == X_vec.dtype and np.array_equal(X_ref, X_vec), "X differs"
+    assert y_ref.dtype == y_vec.dtype and np.array_equal(y_ref, y_vec), "y differs"
+    assert np.array_equal(w_ref, w_vec), "weights differ"
+    assert list(dates_ref) == list(dates_vec), "game dates differ"
+    assert list(emas_ref) == list(emas_vec), "team order differs"
+    for team_id, ema in emas_ref.items():
+        assert all(ema[stat] == emas_vec[team_id][stat] for stat in STATS), f"EMA differs for {team_id}"
+
+
+def run(sizes):
+    print(f"{'games':>8} {'iterrows, s':>12} {'vectorized, s':>14} {'speedup':>8}")
+    for n_games in sizes:
+        df = make_games(n_games)
+
+        start = time.perf_counter()
+        reference = preprocess_and_build_dataset_iterrows(df.copy())
+        t_ref = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = preprocess_and_build_dataset(df.copy())
+        t_vec = time.perf_counter() - start
+
+        assert_identical(reference, vectorized)
+        print(f"{n_games:>8} {t_ref:>12.3f} {t_vec:>14.3f} {t_ref / t_vec:>7.1f}x")
+    print("Outputs are bit-for-bit identical.")
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,126 @@
+"""
+Benchmark: serial ESPN ingest vs. the concurrent fetch -> parse -> insert pipeline.
+
+Generates ESPN-shaped fixtures, replays them from the local stub server with a
+fixed per-request latency (stand-in for the network), and ingests the same days
+into fresh throwaway databases:
+  - "serial": one scoreboard worker and one summary worker (the old one-at-a-time
+    order, without its fixed sleeps);
+  - "pipeline": concurrent scoreboard and summary workers under one rate limit.
+  - "pipeline rerun": the pipeline again over the same database - every game is
+    already ingested and final, so only scoreboards are requested;
+  - "pipeline+cache cold" / "warm": the pipeline with the on-disk response cache,
+    run twice over the same finished days - the warm run makes no requests.
+Checks that all runs insert the same games, and prints time and games/sec next
+to what the removed fixed sleeps alone used to cost.
+
+Usage (from backend/):
+    python scripts/benchmark_ingest.py [days] [games_per_day] [latency_ms] [rate_per_sec]
+"""
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import update_data
+from scripts.espn_stub_server import ESPNStubServer, generate_fixtures
+from services.schema import TEAMS_TABLE
+
+DEFAULT_DAYS = 7
+DEFAULT_GAMES_PER_DAY = 8
+DEFAULT_LATENCY_MS = 40.0
+DEFAULT_RATE = 50.0
+PIPELINE_WORKERS = (2, 8)
+
+
+def build_db(path, sample_record):
+    conn = sqlite3.connect(path)
+    columns = [f"{column} TEXT PRIMARY KEY" if column == "game_id" else column
+               for column in sample_record if column not in ("match_id", "source")]
+    conn.execute(f"CREATE TABLE game ({', '.join(columns)}, match_id INTEGER, source TEXT)")
+    conn.execute(TEAMS_TABLE)
+    abbrevs = sorted(set(update_data.TEAM_NAME_MAP.values()) - {"ALL"})
+    conn.executemany(
+        "INSERT INTO teams (team_id, name, abbrev, updated_at) VALUES (?, ?, ?, ?)",
+        [(str(1610612737 + i), abbrev, abbrev, "2024-01-01") for i, abbrev in enumerate(abbrevs)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def sample_record(fixtures_dir, date):
+    with open(os.path.join(fixtures_dir, "scoreboard", f"{date.strftime('%Y%m%d')}.json")) as f:
+        event = json.load(f)["events"][0]
+    team_map = {abbrev: i + 1 for i, abbrev in enumerate(set(update_data.TEAM_NAME_MAP.values()))}
+    return update_data.parse_espn_game(event, team_map, stats_fetcher=lambda game_id: None)
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DAYS
+    games_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_GAMES_PER_DAY
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_LATENCY_MS
+    rate = float(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_RATE
+
+    today = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures")
+        games = generate_fixtures(fixtures, today - timedelta(days=days - 1), days, games_per_day)
+        with contextlib.redirect_stdout(io.StringIO()):
+            record = sample_record(fixtures, today)
+
+        server = ESPNStubServer(fixtures, latency_ms=latency).start()
+        client = update_data.espn_client
+        client.base_url = server.base_url
+        client.rate_limiter.rate = rate
+        print(f"Ingest: {days} days x {games_per_day} games = {games} games, "
+              f"stub latency {latency:.0f} ms, rate limit {rate:.0f} req/s\n")
+
+        results = {}
+        runs = (("serial", (1, 1), None), ("pipeline", PIPELINE_WORKERS, None),
+                ("pipeline rerun", PIPELINE_WORKERS, None),
+                ("pipeline+cache cold", PIPELINE_WORKERS, "cache"), ("pipeline+cache warm", PIPELINE_WORKERS, "cache"))
+        for mode, (scoreboard, summary), cache in runs:
+            # Без кэша - честное сравнение конвейера; с кэшем - повторный прогон тех же (завершённых) дней
+            client.cache_dir = os.path.join(tmp, cache) if cache else None
+            # rerun - в ту же БД: все игры уже загружены, summary не запрашиваются
+            db_path = os.path.join(tmp, f"{mode.split()[0]}.sqlite" if mode.endswith("rerun")
+                                   else f"{mode.replace(' ', '_')}.sqlite")
+            if not mode.endswith("rerun"):
+                build_db(db_path, record)
+            server.max_in_flight = 0
+            start_requests = server.requests
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                update_data.update_db_with_new_games(db_path, days, scoreboard, summary)
+            elapsed = time.perf_counter() - start
+            conn = sqlite3.connect(db_path)
+            ids = [row[0] for row in conn.execute("SELECT game_id FROM game")]
+            conn.close()
+            results[mode] = ids
+            print(f"[{mode}] workers {scoreboard}/{summary}: {elapsed:.2f}s, {len(ids) / elapsed:.1f} games/s, "
+                  f"{server.requests - start_requests} requests, max {server.max_in_flight} in flight")
+            results[mode + "_elapsed"] = elapsed
+        server.stop()
+
+    sleeps = games * 1 + (days - 1) * 2
+    print(f"\nFixed sleeps alone in the old loop: {sleeps}s")
+    print(f"Serial -> pipeline: {results['serial_elapsed']:.2f}s -> {results['pipeline_elapsed']:.2f}s "
+          f"({results['serial_elapsed'] / results['pipeline_elapsed']:.1f}x)")
+    print(f"Cold -> warm cache: {results['pipeline+cache cold_elapsed']:.2f}s -> "
+          f"{results['pipeline+cache warm_elapsed']:.2f}s")
+    # Списки, а не множества: повторный прогон не должен дублировать строки
+    different = [mode for mode, _, _ in runs if sorted(results[mode]) != sorted(results["serial"])]
+    if different or len(results["serial"]) != games:
+        print(f"❌ Inserted games differ from serial run ({len(results['serial'])}/{games}): {different}")
+        sys.exit(1)
+    print(f"✅ All runs inserted the same {games} games")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Regression check: an incremental (warm-start) retrain must fine-tune on the new games.
+
+train_model_incremental splits its replay window with split_replay. The new games
+are the last rows of that window; every one of them has to land in the training
+slice, the holdout has to be disjoint from it, deterministic for a fixed seed and
+no larger than HOLDOUT_FRACTION of the window. Checked for a typical weekly batch,
+a batch larger than the old tail holdout, and a window made almost only of new
+games. Exits with status 1 on any violation.
+
+Usage (from backend/):
+    python scripts/check_incremental_split.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.train_model import HOLDOUT_FRACTION, REPLAY_GAMES, split_replay
+
+# (строк в окне, из них новых игр)
+CASES = [
+    (REPLAY_GAMES, 100),            # неделя новых игр
+    (REPLAY_GAMES, 1400),           # меньше старого хвостового holdout (1500 строк)
+    (REPLAY_GAMES, 3000),
+    (REPLAY_GAMES, REPLAY_GAMES),   # всё окно - новые игры
+    (800, 750),                     # короткая история
+]
+
+
+def check(n_rows, n_new):
+    train, hold = split_replay(n_rows, n_new)
+    new_rows = np.arange(n_rows - n_new, n_rows)
+    problems = []
+    if len(np.intersect1d(train, hold)):
+        problems.append("train and holdout overlap")
+    if len(train) + len(hold) != n_rows:
+        problems.append("rows lost by the split")
+    if len(hold) > max(1, int(HOLDOUT_FRACTION * n_rows)):
+        problems.append(f"holdout too large ({len(hold)})")
+    new_in_train = np.isin(new_rows, train).mean()
+    old_rows = n_rows - n_new
+    # Пока старых строк хватает на holdout, все новые игры - в обучении
+    if old_rows >= int(HOLDOUT_FRACTION * n_rows) and new_in_train < 1.0:
+        problems.append(f"only {new_in_train:.0%} of new games in train")
+    if new_in_train < 1 - HOLDOUT_FRACTION:
+        problems.append(f"only {new_in_train:.0%} of new games in train")
+    again_train, again_hold = split_replay(n_rows, n_new)
+    if not (np.array_equal(train, again_train) and np.array_equal(hold, again_hold)):
+        problems.append("split is not deterministic")
+    print(f"{n_rows} rows, {n_new} new: train {len(train)}, holdout {len(hold)}, "
+          f"new games in train {new_in_train:.0%}")
+    return problems
+
+
+def main():
+    failed = False
+    for n_rows, n_new in CASES:
+        for problem in check(n_rows, n_new):
+            print(f"  ❌ {problem}")
+            failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ New games are always fine-tuned on")
+
+
+if __name__ == "__main__":
+    main()
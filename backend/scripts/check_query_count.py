@@ -0,0 +1,114 @@
+"""
+Regression check: prediction history must not issue a query per row (N+1).
+
+Builds a throwaway database with a few teams and a user's prediction history,
+then counts the SQL statements AIService runs for history pages of different
+sizes and for a single prediction. The count has to stay the same for every
+page size and within MAX_STATEMENTS; otherwise the script exits with status 1.
+
+Usage (from backend/):
+    python scripts/check_query_count.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+PAGE_SIZES = [1, 10, 50]
+N_PREDICTIONS = 60
+N_TEAMS = 6
+# Страница: запрос к predictions; справочник команд уже в памяти
+MAX_STATEMENTS = 1
+# Холодный справочник: + отметка таблицы teams и её чтение
+MAX_STATEMENTS_COLD = 3
+
+
+def build_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE game (
+            game_id TEXT, game_date TEXT,
+            team_id_home TEXT, team_name_home TEXT, team_abbreviation_home TEXT,
+            team_id_away TEXT, team_name_away TEXT, team_abbreviation_away TEXT,
+            wl_home TEXT
+        )
+    """)
+    for i in range(N_TEAMS):
+        home, away = i, (i + 1) % N_TEAMS
+        conn.execute(
+            "INSERT INTO game VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'W')",
+            (str(i), f"2024-01-{i + 1:02d}", str(home), f"Team {home}", f"T{home:02d}",
+             str(away), f"Team {away}", f"T{away:02d}"),
+        )
+    conn.commit()
+    conn.close()
+
+
+def data_statements(statements):
+    return [s for s in statements if s.lstrip().split(None, 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE")]
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    # Сервисы открывают ./nba.sqlite относительно рабочего каталога
+    os.chdir(tmp)
+    build_db(os.path.join(tmp, "nba.sqlite"))
+
+    from services.db_pool import db_pool
+    from services.schema import ensure_schema
+    from services.team_catalog import team_catalog
+    from services.ai_service import AIService
+    from services.prediction_writer import prediction_writer
+
+    with db_pool.connection() as conn:
+        ensure_schema(conn)
+
+    svc = AIService(None)
+    for i in range(N_PREDICTIONS):
+        # Последняя команда в справочнике отсутствует - проверяется и запасной вариант
+        svc._save_prediction(1, i % N_TEAMS, (i + 1) % (N_TEAMS + 1), 55.0, 45.0, 110, 105, 70, "check")
+    # Считаем запросы к записанной истории, а не к очереди записи
+    prediction_writer.flush()
+
+    failures = []
+
+    team_catalog.invalidate()
+    with db_pool.count_statements() as statements:
+        svc._load_user_predictions(1, 0, PAGE_SIZES[-1])
+    cold = len(data_statements(statements))
+    print(f"history page of {PAGE_SIZES[-1]} (cold team catalog): {cold} statements")
+    if cold > MAX_STATEMENTS_COLD:
+        failures.append(f"cold page: {cold} > {MAX_STATEMENTS_COLD}")
+
+    counts = {}
+    for size in PAGE_SIZES:
+        with db_pool.count_statements() as statements:
+            page = svc._load_user_predictions(1, 0, size)
+        counts[size] = len(data_statements(statements))
+        print(f"history page of {size:>2}: {counts[size]} statements ({len(page)} predictions)")
+        if any("team1" not in pred or "team2" not in pred for pred in page):
+            failures.append(f"page of {size}: team info missing")
+    if len(set(counts.values())) != 1 or max(counts.values()) > MAX_STATEMENTS:
+        failures.append(f"history statements grow with page size or exceed {MAX_STATEMENTS}: {counts}")
+
+    with db_pool.count_statements() as statements:
+        svc._load_prediction(1)
+    single = len(data_statements(statements))
+    print(f"single prediction: {single} statements")
+    if single > MAX_STATEMENTS:
+        failures.append(f"single prediction: {single} > {MAX_STATEMENTS}")
+
+    prediction_writer.stop()
+    db_pool.close_all()
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ No per-row queries in prediction history")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Check: run the schema bootstrap on a database and print EXPLAIN QUERY PLAN
+for every hot service query (services.schema.HOT_QUERIES).
+
+A query whose plan reads a table without an index is flagged, and the script
+exits with status 1 so it can be used as a gate after schema changes.
+
+Usage (from backend/):
+    python scripts/check_query_plans.py [db_path]
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.schema import ensure_schema, explain_hot_queries, is_full_scan
+
+DB_PATH = "./nba.sqlite"
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = sqlite3.connect(db_path)
+    try:
+        created = ensure_schema(conn)
+        if created:
+            print(f"🗂️ Created indexes: {', '.join(created)}\n")
+        plans = explain_hot_queries(conn)
+    finally:
+        conn.close()
+
+    full_scans = []
+    for name, steps in plans.items():
+        print(f"▶ {name}")
+        for step in steps:
+            flag = "⚠️ " if is_full_scan(step) else "   "
+            print(f"  {flag}{step}")
+            if is_full_scan(step):
+                full_scans.append(name)
+        print()
+
+    if full_scans:
+        print(f"❌ Full table scans in: {', '.join(sorted(set(full_scans)))}")
+        sys.exit(1)
+    print(f"✅ All {len(plans)} hot queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
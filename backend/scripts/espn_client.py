@@ -0,0 +1,164 @@
+"""
+Shared ESPN HTTP client: one keep-alive requests.Session plus a disk cache.
+
+The cache is content-addressed:
+    <cache_dir>/blobs/<sha256 of body>.json     - response bodies, stored once
+    <cache_dir>/index/<sha256 of request>.json  - request -> blob, validators, freshness
+Responses the caller marks final (finished games, past days) never expire;
+on every hit a final entry is re-checked with the caller's is_final, so entries
+stored under an older, looser rule fall back to TTL and revalidation.
+Everything else is fresh for ttl seconds, then revalidated with
+If-None-Match / If-Modified-Since when the server sent ETag / Last-Modified;
+a 304 keeps the stored body. Network requests go through the shared RateLimiter,
+cache hits do not.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.espn_pipeline import RateLimiter
+
+
+class ESPNResponse:
+    """Ответ ESPN из сети или из кэша (status_code/content/json() как у requests.Response)"""
+
+    def __init__(self, status_code: int, content: bytes, source: str = "network"):
+        self.status_code = status_code
+        self.content = content
+        # network - загружен, cache - свежий из кэша, revalidated - сервер ответил 304
+        self.source = source
+
+    @property
+    def from_cache(self) -> bool:
+        return self.source != "network"
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ESPNClient:
+    def __init__(self, base_url: str, cache_dir: Optional[str], ttl: float, rate_limit: float,
+                 pool_size: int = 10):
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.session = requests.Session()
+        # Keep-alive соединения на все параллельные потоки конвейера
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "cache_hits": 0, "revalidated": 0, "network": 0, "stored": 0}
+
+    def get(self, path: str, params: Dict[str, Any], timeout: float,
+            is_final: Optional[Callable[[Any], bool]] = None) -> ESPNResponse:
+        """
+        GET base_url/path. is_final(data) решает, можно ли хранить ответ бессрочно
+        (без него ответ живёт ttl секунд). Кэшируются только ответы 200.
+        """
+        self._count("requests")
+        key = self._key(path, params)
+        entry = self._load(key)
+        headers = {}
+        if entry is not None:
+            # Бессрочная запись перепроверяется текущим is_final: кэш, записанный по прежнему,
+            # более слабому правилу (например, summary без бокс-скора), не держится вечно
+            if entry["final"] and is_final is not None and not self._is_final(is_final, entry["body"]):
+                entry["final"] = False
+                entry["fetched_at"] = 0.0
+            if entry["final"] or time.time() - entry["fetched_at"] < self.ttl:
+                self._count("cache_hits")
+                return ESPNResponse(200, entry["body"], "cache")
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        self.rate_limiter.acquire()
+        self._count("network")
+        response = self.session.get(f"{self.base_url}/{path}", params=params, headers=headers, timeout=timeout)
+
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            entry["fetched_at"] = time.time()
+            self._save_index(key, entry)
+            return ESPNResponse(200, entry["body"], "revalidated")
+
+        if response.status_code == 200 and self.cache_dir:
+            final = self._is_final(is_final, response.content) if is_final else False
+            self._store(key, path, params, response, final)
+        return ESPNResponse(response.status_code, response.content)
+
+    @staticmethod
+    def _is_final(is_final: Callable[[Any], bool], body: bytes) -> bool:
+        try:
+            return bool(is_final(json.loads(body)))
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            return False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _key(path: str, params: Dict[str, Any]) -> str:
+        return hashlib.sha256(f"{path}?{urlencode(sorted(params.items()))}".encode()).hexdigest()
+
+    def _path(self, kind: str, digest: str) -> str:
+        return os.path.join(self.cache_dir, kind, digest[:2], f"{digest}.json")
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path("index", key), encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(self._path("blobs", entry["blob"]), "rb") as f:
+                entry["body"] = f.read()
+            return entry
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, key: str, path: str, params: Dict[str, Any], response, final: bool):
+        body = response.content
+        blob = hashlib.sha256(body).hexdigest()
+        blob_path = self._path("blobs", blob)
+        # Одинаковое содержимое (например, пустые дни) хранится один раз
+        if not os.path.exists(blob_path):
+            self._write(blob_path, body)
+        self._save_index(key, {
+            "url": f"{path}?{urlencode(sorted(params.items()))}",
+            "blob": blob,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "final": final,
+        })
+        self._count("stored")
+
+    def _save_index(self, key: str, entry: Dict[str, Any]):
+        entry = {name: value for name, value in entry.items() if name != "body"}
+        self._write(self._path("index", key), json.dumps(entry).encode())
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # Запись через временный файл: параллельные потоки не увидят половину файла
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
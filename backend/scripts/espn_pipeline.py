@@ -0,0 +1,197 @@
+"""
+Concurrent fetch -> parse -> insert pipeline for the ESPN ingest.
+
+Stages are connected by bounded queues:
+  dates -> [scoreboard workers] -> events -> [summary workers] -> records -> [insert]
+Scoreboard and summary workers are thread pools of configurable size; every HTTP
+call they make goes through one shared RateLimiter instead of fixed sleeps.
+Inserts run in the calling thread, so the sqlite3 connection never leaves it.
+
+The stage callables come from update_data.py:
+    fetch_day(date) -> list of events, or None when the day could not be fetched
+    fetch_game(event) -> game record, None (failed) or SKIPPED (already ingested)
+    insert(record) -> counters to add, e.g. {"new": 3, "updated": 1} (empty while batching)
+    flush() -> counters for whatever insert still holds, called once at the end
+insert/flush may also return "failed_keys": record_key(record) of rows that were
+not written, so insert failures are reported against the date they came from.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Конец потока для следующей стадии
+_DONE = object()
+# fetch_game: игра уже в БД и не изменилась - summary не запрашивается
+SKIPPED = object()
+
+
+class RateLimiter:
+    """Общий лимит запросов в секунду для всех потоков: запросы идут не чаще 1/rate; rate <= 0 - без лимита"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+        self.waited = 0.0
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + 1.0 / self.rate
+            self.waited += slot - now
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"days": 0, "days_failed": 0, "events": 0, "skipped": 0, "parsed": 0, "failed": 0,
+                       "new": 0, "updated": 0, "insert_failed": 0}
+        self.failed_dates = []
+        self.events_by_date = {}
+        self.failed_by_date = {}
+
+    def add(self, key: str, n: int = 1):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def fail(self, date, key: str, n: int = 1):
+        """Сбой игры этого дня (failed / insert_failed): день нельзя считать загруженным"""
+        with self._lock:
+            counts = self.failed_by_date.setdefault(date, {"failed": 0, "insert_failed": 0})
+            counts[key] += n
+
+
+def run_pipeline(dates: Iterable[Any],
+                 fetch_day: Callable[[Any], List[Dict[str, Any]]],
+                 fetch_game: Callable[[Dict[str, Any]], Any],
+                 insert: Callable[[Dict[str, Any]], Dict[str, int]],
+                 flush: Optional[Callable[[], Dict[str, int]]] = None,
+                 scoreboard_workers: int = 2, summary_workers: int = 4,
+                 queue_size: int = 100,
+                 record_key: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+    """
+    Прогнать даты через конвейер. insert и flush вызываются в текущем потоке по мере готовности записей.
+    Возвращает счётчики стадий, время и скорость (игр/с), а по дням - events_by_date
+    и failed_by_date ({date: {"failed", "insert_failed"}} для дней со сбоями).
+    """
+    scoreboard_workers = max(1, scoreboard_workers)
+    summary_workers = max(1, summary_workers)
+    date_queue: "queue.Queue[Any]" = queue.Queue()
+    event_queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+    record_queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+    stats = _Stats()
+
+    for date in dates:
+        date_queue.put(date)
+    for _ in range(scoreboard_workers):
+        date_queue.put(_DONE)
+
+    remaining_scoreboards = [scoreboard_workers]
+    remaining_lock = threading.Lock()
+
+    def scoreboard_worker():
+        try:
+            while True:
+                date = date_queue.get()
+                if date is _DONE:
+                    break
+                try:
+                    events = fetch_day(date)
+                except Exception as e:
+                    print(f"  ❌ Scoreboard {date} failed: {e}")
+                    events = None
+                if events is None:
+                    # День не загружен (в отличие от дня без игр) - вызывающий не должен считать его пройденным
+                    stats.add("days_failed")
+                    with stats._lock:
+                        stats.failed_dates.append(date)
+                    continue
+                stats.add("days")
+                stats.add("events", len(events))
+                with stats._lock:
+                    stats.events_by_date[date] = len(events)
+                for event in events:
+                    # Очередь ограничена: при отставании summary-стадии ждём здесь
+                    event_queue.put((date, event))
+        finally:
+            # Последний из scoreboard-потоков закрывает очередь событий для всех summary-потоков
+            with remaining_lock:
+                remaining_scoreboards[0] -= 1
+                last = remaining_scoreboards[0] == 0
+            if last:
+                for _ in range(summary_workers):
+                    event_queue.put(_DONE)
+
+    def summary_worker():
+        try:
+            while True:
+                item = event_queue.get()
+                if item is _DONE:
+                    break
+                date, event = item
+                try:
+                    record = fetch_game(event)
+                except Exception as e:
+                    print(f"    ❌ Game {event.get('id')} failed: {e}")
+                    record = None
+                if record is SKIPPED:
+                    stats.add("skipped")
+                elif record is None:
+                    stats.add("failed")
+                    stats.fail(date, "failed")
+                else:
+                    stats.add("parsed")
+                    record_queue.put((date, record))
+        finally:
+            record_queue.put(_DONE)
+
+    threads = [threading.Thread(target=scoreboard_worker, name=f"espn-scoreboard-{i}", daemon=True)
+               for i in range(scoreboard_workers)]
+    threads += [threading.Thread(target=summary_worker, name=f"espn-summary-{i}", daemon=True)
+                for i in range(summary_workers)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Ключ записи -> день, из которого она пришла (для failed_keys от insert/flush)
+    record_dates = {}
+
+    def count(counters):
+        for key, n in counters.items():
+            if key == "failed_keys":
+                for failed_key in n:
+                    stats.fail(record_dates.get(failed_key), "insert_failed")
+            else:
+                stats.add(key, n)
+
+    finished = 0
+    while finished < summary_workers:
+        item = record_queue.get()
+        if item is _DONE:
+            finished += 1
+        else:
+            date, record = item
+            if record_key is not None:
+                record_dates[record_key(record)] = date
+            count(insert(record))
+    if flush is not None:
+        count(flush())
+
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = dict(stats.counts)
+    result["failed_dates"] = sorted(stats.failed_dates)
+    result["events_by_date"] = dict(stats.events_by_date)
+    result["failed_by_date"] = dict(stats.failed_by_date)
+    result["elapsed"] = round(elapsed, 3)
+    result["games_per_sec"] = round(result["events"] / elapsed, 2) if elapsed > 0 else 0.0
+    return result
@@ -0,0 +1,234 @@
+"""
+Local stub of the ESPN scoreboard/summary API that replays recorded JSON.
+
+Fixture layout (one file per response, exactly as ESPN returned it):
+    <dir>/scoreboard/YYYYMMDD.json   - GET .../scoreboard?dates=YYYYMMDD
+    <dir>/summary/<event_id>.json    - GET .../summary?event=<event_id>
+A day without a file replays as an empty scoreboard; a missing summary is a 404.
+Responses carry ETag and Last-Modified (file mtime) and honour conditional
+requests with 304, like the real API behind its CDN.
+
+Point the ingest at it with ESPN_BASE_URL=http://127.0.0.1:<port>/apis/site/v2/sports/basketball/nba
+
+Usage (from backend/):
+    python scripts/espn_stub_server.py record DIR YYYY-MM-DD DAYS     # save real ESPN responses
+    python scripts/espn_stub_server.py generate DIR YYYY-MM-DD DAYS [games_per_day]
+    python scripts/espn_stub_server.py serve DIR [port] [latency_ms]
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+API_PATH = "/apis/site/v2/sports/basketball/nba"
+ESPN_URL = f"http://site.api.espn.com{API_PATH}"
+
+TEAMS = [
+    "Atlanta Hawks", "Boston Celtics", "Brooklyn Nets", "Charlotte Hornets", "Chicago Bulls",
+    "Cleveland Cavaliers", "Dallas Mavericks", "Denver Nuggets", "Detroit Pistons", "Golden State Warriors",
+    "Houston Rockets", "Indiana Pacers", "LA Clippers", "Los Angeles Lakers", "Memphis Grizzlies",
+    "Miami Heat", "Milwaukee Bucks", "Minnesota Timberwolves", "New Orleans Pelicans", "New York Knicks",
+    "Oklahoma City Thunder", "Orlando Magic", "Philadelphia 76ers", "Phoenix Suns", "Portland Trail Blazers",
+    "Sacramento Kings", "San Antonio Spurs", "Toronto Raptors", "Utah Jazz", "Washington Wizards",
+]
+
+
+class ESPNStubServer:
+    """HTTP-сервер в отдельном потоке: отдаёт сохранённые ответы ESPN с искусственной задержкой"""
+
+    def __init__(self, fixtures_dir: str, port: int = 0, latency_ms: float = 0.0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency_ms / 1000.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}{API_PATH}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="espn-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _fixture(self, path: str, query: dict):
+        if path == f"{API_PATH}/scoreboard":
+            name = os.path.join("scoreboard", f"{query.get('dates', [''])[0]}.json")
+            default = {"events": []}
+        elif path == f"{API_PATH}/summary":
+            name = os.path.join("summary", f"{query.get('event', [''])[0]}.json")
+            default = None
+        else:
+            return None
+        file_path = os.path.join(self.fixtures_dir, name)
+        if not os.path.exists(file_path):
+            return (json.dumps(default).encode(), 0.0) if default is not None else None
+        with open(file_path, "rb") as f:
+            return f.read(), os.path.getmtime(file_path)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    url = urlparse(self.path)
+                    fixture = stub._fixture(url.path, parse_qs(url.query))
+                    if fixture is None:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    body, mtime = fixture
+                    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        with stub._lock:
+                            stub.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _save(path: str, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def record_fixtures(fixtures_dir: str, start: datetime, days: int) -> int:
+    """Сохранить настоящие ответы ESPN за days дней, начиная со start. Возвращает число игр."""
+    games = 0
+    for i in range(days):
+        date_str = (start + timedelta(days=i)).strftime("%Y%m%d")
+        scoreboard = requests.get(f"{ESPN_URL}/scoreboard", params={"dates": date_str, "limit": 100}, timeout=15)
+        scoreboard.raise_for_status()
+        data = scoreboard.json()
+        _save(os.path.join(fixtures_dir, "scoreboard", f"{date_str}.json"), data)
+        for event in data.get("events", []):
+            summary = requests.get(f"{ESPN_URL}/summary", params={"event": event["id"]}, timeout=10)
+            if summary.status_code == 200:
+                _save(os.path.join(fixtures_dir, "summary", f"{event['id']}.json"), summary.json())
+            games += 1
+        print(f"  💾 {date_str}: {len(data.get('events', []))} games")
+    return games
+
+
+def generate_fixtures(fixtures_dir: str, start: datetime, days: int, games_per_day: int = 8,
+                      seed: int = 0) -> int:
+    """
+    Синтетические ответы в формате ESPN (когда записать настоящие негде, например без сети).
+    Структура - та, которую разбирает update_data.py. Возвращает число игр.
+    """
+    rng = random.Random(seed)
+    games = 0
+    for i in range(days):
+        day = start + timedelta(days=i)
+        events = []
+        teams = rng.sample(TEAMS, min(len(TEAMS), games_per_day * 2))
+        for g in range(len(teams) // 2):
+            event_id = str(401000000 + i * 100 + g)
+            away, home = teams[2 * g], teams[2 * g + 1]
+            scores = {"away": rng.randint(90, 130), "home": rng.randint(90, 130)}
+            events.append({
+                "id": event_id,
+                "date": day.strftime("%Y-%m-%dT") + f"{19 + g % 4:02d}:00Z",
+                "status": {"type": {"completed": True, "state": "post", "name": "STATUS_FINAL"}},
+                "competitions": [{"competitors": [
+                    {"homeAway": "away", "team": {"displayName": away}, "score": str(scores["away"])},
+                    {"homeAway": "home", "team": {"displayName": home}, "score": str(scores["home"])},
+                ]}],
+            })
+            summary_teams = []
+            for side in ("away", "home"):
+                fga = rng.randint(80, 95)
+                summary_teams.append({"homeAway": side, "statistics": [
+                    {"label": "FG", "fieldGoalsMade": rng.randint(35, 48), "fieldGoalsAttempted": fga},
+                    {"label": "3PT", "threePointFieldGoalsMade": rng.randint(8, 18),
+                     "threePointFieldGoalsAttempted": rng.randint(28, 45)},
+                    {"label": "FT", "freeThrowsMade": rng.randint(10, 25), "freeThrowsAttempted": rng.randint(15, 30)},
+                    {"label": "REB", "offensiveRebounds": rng.randint(5, 15), "defensiveRebounds": rng.randint(25, 40),
+                     "rebounds": rng.randint(35, 55)},
+                    {"label": "AST", "assists": rng.randint(18, 32), "steals": rng.randint(4, 12),
+                     "blocks": rng.randint(2, 9), "turnovers": rng.randint(8, 18), "fouls": rng.randint(14, 25)},
+                ]})
+            _save(os.path.join(fixtures_dir, "summary", f"{event_id}.json"), {
+                "header": {"competitions": [{"status": events[-1]["status"]}]},
+                "boxscore": {"teams": summary_teams},
+            })
+            games += 1
+        _save(os.path.join(fixtures_dir, "scoreboard", f"{day.strftime('%Y%m%d')}.json"), {"events": events})
+    return games
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("record", "generate", "serve"):
+        print(__doc__)
+        sys.exit(1)
+    command, fixtures_dir = sys.argv[1], sys.argv[2]
+
+    if command == "serve":
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 8765
+        latency = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+        server = ESPNStubServer(fixtures_dir, port, latency).start()
+        print(f"🛰️ ESPN stub: ESPN_BASE_URL={server.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    start = datetime.strptime(sys.argv[3], "%Y-%m-%d")
+    days = int(sys.argv[4]) if len(sys.argv) > 4 else 7
+    if command == "record":
+        games = record_fixtures(fixtures_dir, start, days)
+    else:
+        games = generate_fixtures(fixtures_dir, start, days, int(sys.argv[5]) if len(sys.argv) > 5 else 8)
+    print(f"✅ {games} games over {days} days in {fixtures_dir}")
+
+
+if __name__ == "__main__":
+    main()
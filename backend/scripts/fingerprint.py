@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.artifact_store import current_version
+# Columns that feed the training pipeline - the one list shared with train_model and the API
+from services.model_registry import STATS
+
+FINGERPRINT_FILE = "fingerprint.json"
+
+
+def compute_data_fingerprint(db_path, until=None):
+    """
+    Fingerprint of the training data in the game table.
+    Row count and max game_date act as a watermark; per-column totals of the training
+    columns act as a cheap content checksum, so corrected scores also change it.
+    With `until`, only games with game_date <= until are covered.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(game)")}
+        aggregates = ["COUNT(*)", "MAX(game_date)", "SUM(wl_home = 'W')"]
+        for stat in STATS:
+            for col in (f'{stat}_home', f'{stat}_away'):
+                if col in existing:
+                    aggregates.append(f"TOTAL(CAST(NULLIF(TRIM({col}), '') AS REAL))")
+        query = f"SELECT {', '.join(aggregates)} FROM game"
+        params = ()
+        if until is not None:
+            query += " WHERE game_date <= ?"
+            params = (until,)
+        row = conn.execute(query, params).fetchone()
+    finally:
+        conn.close()
+
+    row_count, max_game_date = row[0], row[1]
+    checksum = hashlib.sha256(json.dumps(list(row)).encode("utf-8")).hexdigest()
+    return {
+        "row_count": row_count,
+        "max_game_date": max_game_date,
+        "checksum": checksum,
+    }
+
+
+def load_artifact_fingerprint(model_dir):
+    """Fingerprint of the data the deployed artifacts were trained on (None if unknown)."""
+    path = os.path.join(model_dir, FINGERPRINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_artifact_fingerprint(model_dir, fingerprint):
+    """Stamp training artifacts with the data fingerprint they were built from."""
+    stamped = dict(fingerprint, trained_at=datetime.now().isoformat())
+    with open(os.path.join(model_dir, FINGERPRINT_FILE), "w", encoding="utf-8") as f:
+        json.dump(stamped, f, ensure_ascii=False, indent=2)
+    return stamped
+
+
+def fingerprints_match(current, deployed):
+    if not current or not deployed:
+        return False
+    return current.get("checksum") == deployed.get("checksum")
+
+
+def retrain_decision(db_path, model_dir, force=False):
+    """
+    Decide whether the model needs retraining.
+    Returns (should_train, reason, current_fingerprint).
+    """
+    current = compute_data_fingerprint(db_path)
+    if force:
+        return True, "Переобучение запрошено принудительно (force=true)", current
+
+    # Сравниваем с опубликованной версией артефактов (или плоской раскладкой без манифеста)
+    _, version_dir = current_version(model_dir)
+    if not os.path.exists(os.path.join(version_dir, "model.h5")):
+        return True, "Обученная модель не найдена", current
+    deployed = load_artifact_fingerprint(version_dir)
+    if deployed is None:
+        return True, "У текущей модели нет отпечатка данных", current
+    if fingerprints_match(current, deployed):
+        return False, (
+            f"Данные не изменились с последнего обучения "
+            f"({current['row_count']} игр, последняя {current['max_game_date']})"
+        ), current
+    return True, (
+        f"Данные изменились: {deployed.get('row_count')} -> {current['row_count']} игр, "
+        f"последняя {deployed.get('max_game_date')} -> {current['max_game_date']}"
+    ), current
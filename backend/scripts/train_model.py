@@ -11,6 +11,14 @@ import os
 import requests
 from bs4 import BeautifulSoup
 import time
+import shutil
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.model_registry import STATS, build_matchup_matrix, save_matchup_matrix
+from services.numpy_mlp import MLP_FILE, save_mlp, load_mlp
+from services.artifact_store import collect_garbage, copy_current, create_staging_dir, publish
+from scripts.fingerprint import compute_data_fingerprint, save_artifact_fingerprint
 
 # ---------------------------
 # Configuration
@@ -19,11 +27,8 @@ DB_PATH = "../nba.sqlite"
 MODEL_DIR = "../models"
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-# Stats to use for each team (must exist in game table)
-STATS = [
-    'pts', 'reb', 'ast', 'stl', 'blk', 'tov', 'pf',
-    'fg_pct', 'fg3_pct', 'ft_pct'
-]
+# Stats to use for each team (must exist in game table): STATS from services.model_registry,
+# shared with the API and the data fingerprint
 
 # EMA smoothing factor (alpha = 2/(N+1), N ~ 10 games)
 ALPHA = 0.18  # corresponds to ~10 game half-life
@@ -34,15 +39,91 @@ WEIGHT_DECAY_DAYS = 500
 # Minimum number of games to use for training (skip very first games)
 MIN_GAMES = 5
 
+# Rows per chunk when streaming the game table
+GAME_CHUNK_SIZE = 20000
+
+# Max allowed |keras - numpy| difference in predicted probability
+PARITY_TOLERANCE = 1e-5
+
+# Incremental (warm-start) retraining
+REPLAY_FILE = "replay.npz"
+REPLAY_GAMES = 10000        # most recent games kept for fine-tuning
+HOLDOUT_FRACTION = 0.15     # part of the replay window used as the guardrail holdout (see split_replay)
+HOLDOUT_SEED = 42
+FINE_TUNE_EPOCHS = 5
+FINE_TUNE_LR = 1e-4
+MAX_VAL_ACC_DROP = 0.01     # fall back to a full retrain if holdout accuracy drops more than this
+
 # ---------------------------
 # Data Loading & Preprocessing
 # ---------------------------
-def load_games(db_path):
-    """Load game table from SQLite."""
+def game_dtypes():
+    """Compact dtypes for the columns the feature pipeline reads from `game`."""
+    dtypes = {
+        'team_id_home': 'int32',
+        'team_id_away': 'int32',
+        'wl_home': pd.CategoricalDtype(['W', 'L']),
+    }
+    for stat in STATS:
+        dtypes[f'{stat}_home'] = 'float32'
+        dtypes[f'{stat}_away'] = 'float32'
+    return dtypes
+
+
+def load_games(db_path, chunksize=GAME_CHUNK_SIZE, since=None):
+    """
+    Load the game table from SQLite for training.
+    Selects only the columns used by preprocess_and_build_dataset, casts them in SQL
+    (empty strings become NULL, like pd.to_numeric(errors='coerce') did) and streams
+    rows in chunks converted to float32/int32/category, so the text representation of
+    the whole table is never held in memory at once.
+    With `since`, only games with game_date > since are loaded.
+    The raw max game_date string is kept in df.attrs['max_game_date'] as a watermark.
+    """
     conn = sqlite3.connect(db_path)
-    query = "SELECT * FROM game ORDER BY game_date"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    try:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(game)")}
+        columns = [
+            "game_date",
+            "CAST(team_id_home AS INTEGER) AS team_id_home",
+            "CAST(team_id_away AS INTEGER) AS team_id_away",
+            "wl_home",
+        ]
+        for stat in STATS:
+            for col in (f'{stat}_home', f'{stat}_away'):
+                # Missing columns are filled with 0 later in preprocess_and_build_dataset
+                if col in existing:
+                    columns.append(f"CAST(NULLIF(TRIM({col}), '') AS REAL) AS {col}")
+
+        query = (
+            f"SELECT {', '.join(columns)} FROM game "
+            "WHERE team_id_home IS NOT NULL AND team_id_away IS NOT NULL"
+        )
+        params = ()
+        if since is not None:
+            query += " AND game_date > ?"
+            params = (since,)
+        # game_id breaks ties between games at the same timestamp, so EMA replay order is the same
+        # in a full rebuild and in the incremental (since=) path
+        query += " ORDER BY game_date, game_id"
+
+        dtypes = game_dtypes()
+        chunks = []
+        max_game_date = since
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+            if len(chunk):
+                max_game_date = chunk['game_date'].iloc[-1]
+            chunk['game_date'] = pd.to_datetime(chunk['game_date'])
+            chunks.append(chunk.astype({col: dtype for col, dtype in dtypes.items() if col in chunk.columns}))
+    finally:
+        conn.close()
+
+    if chunks:
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=['game_date'] + list(dtypes)).astype(dtypes)
+        df['game_date'] = pd.to_datetime(df['game_date'])
+    df.attrs['max_game_date'] = max_game_date
     return df
 
 def compute_global_averages(df):
@@ -69,14 +150,26 @@ def compute_global_averages(df):
             global_avg[stat] = 0.0
     return global_avg
 
-def preprocess_and_build_dataset(df):
+def assign_update_waves(home_idx, away_idx, n_teams):
     """
-    Iterate through games in chronological order.
-    For each game, use current EMA of home and away as features,
-    then update EMA with actual game stats.
-    Returns X, y, sample_weights, and final team_emas.
+    Group games into "waves" where every team appears at most once.
+    A game goes into the wave right after the latest wave of either of its teams,
+    so each team's games keep their chronological order across waves.
     """
-    df = df.sort_values('game_date').reset_index(drop=True)
+    last_wave = [-1] * n_teams
+    waves = np.empty(len(home_idx), dtype=np.int64)
+    for i, (h, a) in enumerate(zip(home_idx.tolist(), away_idx.tolist())):
+        w = max(last_wave[h], last_wave[a]) + 1
+        waves[i] = w
+        last_wave[h] = w
+        last_wave[a] = w
+    return waves
+
+
+def prepare_games(df):
+    """Sort games chronologically, parse dates and fill missing numeric stats with 0."""
+    # Stable sort keeps same-day games in load order, so a warm start replays them identically
+    df = df.sort_values('game_date', kind='stable').reset_index(drop=True)
     # Convert date to datetime
     df['game_date'] = pd.to_datetime(df['game_date'])
 
@@ -84,94 +177,112 @@ def preprocess_and_build_dataset(df):
     for stat in STATS:
         home_col = f'{stat}_home'
         away_col = f'{stat}_away'
+        # float32 columns from load_games are widened so averages and EMAs run in float64
         if home_col in df.columns:
-            df[home_col] = pd.to_numeric(df[home_col], errors='coerce').fillna(0)
+            df[home_col] = pd.to_numeric(df[home_col], errors='coerce').astype(np.float64).fillna(0)
         else:
             df[home_col] = 0  # Create column if missing
         if away_col in df.columns:
-            df[away_col] = pd.to_numeric(df[away_col], errors='coerce').fillna(0)
+            df[away_col] = pd.to_numeric(df[away_col], errors='coerce').astype(np.float64).fillna(0)
         else:
             df[away_col] = 0
-    # Global averages for initialization
-    global_avg = compute_global_averages(df)
-
-    # Prepare containers
-    features = []
-    targets = []
-    weights = []
-    game_dates = []
-
-    # EMA state per team: dict of {team_id: {stat: value}}
-    team_emas = {}
-
-    # For weight calculation, use the most recent game date as "now"
-    last_date = df['game_date'].max()
-
-    for idx, row in df.iterrows():
-        home_id = str(row['team_id_home'])
-        away_id = str(row['team_id_away'])
-        game_date = row['game_date']
-
-        # Initialize team EMAs if not present
-        if home_id not in team_emas:
-            team_emas[home_id] = global_avg.copy()
-        if away_id not in team_emas:
-            team_emas[away_id] = global_avg.copy()
+    return df
 
-        # Get current EMAs (pre-game)
-        home_ema = team_emas[home_id]
-        away_ema = team_emas[away_id]
 
-        # Build feature vector: concatenate home and away stats in fixed order
-        feat = []
-        for stat in STATS:
-            feat.append(home_ema[stat])
-        for stat in STATS:
-            feat.append(away_ema[stat])
-        features.append(feat)
+def advance_emas(df, initial_emas, init_ema):
+    """
+    Walk prepared games in chronological order starting from `initial_emas`
+    ({team_id: {stat: value}}); teams seen for the first time start from `init_ema`.
+    For each game, the current EMA of home and away are the features,
+    then both EMAs are updated with the actual game stats.
+    Works on NumPy arrays: games are processed in waves (see assign_update_waves)
+    and each wave updates all of its teams with one vectorized step, using the same
+    float64 operations in the same per-team order as a game-by-game loop.
+    Returns X and the updated team_emas (known teams keep their order, new ones are appended).
+    """
+    n_games = len(df)
+    n_stats = len(STATS)
+    home_stats = df[[f'{stat}_home' for stat in STATS]].to_numpy(dtype=np.float64).reshape(n_games, n_stats)
+    away_stats = df[[f'{stat}_away' for stat in STATS]].to_numpy(dtype=np.float64).reshape(n_games, n_stats)
+
+    # Team ids -> dense indices, numbered in order of first appearance (home before away)
+    home_keys = df['team_id_home'].map(str).to_numpy(dtype=object)
+    away_keys = df['team_id_away'].map(str).to_numpy(dtype=object)
+    interleaved = np.empty(2 * n_games, dtype=object)
+    interleaved[0::2] = home_keys
+    interleaved[1::2] = away_keys
+    codes, team_ids = pd.factorize(interleaved)
+    home_idx = codes[0::2].astype(np.intp)
+    away_idx = codes[1::2].astype(np.intp)
+    n_teams = len(team_ids)
+
+    # EMA state per team: row = team, column = stat
+    ema = np.tile(np.asarray(init_ema, dtype=np.float64), (n_teams, 1))
+    for i, team_id in enumerate(team_ids.tolist()):
+        if team_id in initial_emas:
+            ema[i] = [initial_emas[team_id][stat] for stat in STATS]
+    X = np.empty((n_games, 2 * n_stats), dtype=np.float64)
+
+    waves = assign_update_waves(home_idx, away_idx, n_teams)
+    order = np.argsort(waves, kind='stable')
+    bounds = np.searchsorted(waves[order], np.arange(waves.max() + 2 if n_games else 1))
+    one_minus_alpha = 1 - ALPHA
+
+    for w in range(len(bounds) - 1):
+        games = order[bounds[w]:bounds[w + 1]]
+        h = home_idx[games]
+        a = away_idx[games]
+
+        # Pre-game EMAs are the features
+        home_ema = ema[h]
+        away_ema = ema[a]
+        X[games, :n_stats] = home_ema
+        X[games, n_stats:] = away_ema
+
+        # After the game, update both teams' EMA with actual stats
+        ema[h] = ALPHA * home_stats[games] + one_minus_alpha * home_ema
+        ema[a] = ALPHA * away_stats[games] + one_minus_alpha * away_ema
+
+    team_emas = dict(initial_emas)
+    for team_id, row in zip(team_ids.tolist(), ema.tolist()):
+        team_emas[team_id] = dict(zip(STATS, row))
+    return X, team_emas
+
+
+def recency_weights(game_dates, last_date):
+    """Sample weight based on recency: exp(-days_old / WEIGHT_DECAY_DAYS)."""
+    days_old = (last_date - game_dates).dt.days.to_numpy(dtype=np.int64)
+    return np.exp(-days_old / WEIGHT_DECAY_DAYS)
+
+
+def build_dataset(df):
+    """preprocess_and_build_dataset plus the global averages used to initialize new teams."""
+    df = prepare_games(df)
+    # Global averages for initialization
+    global_avg = compute_global_averages(df)
+    init_ema = np.array([global_avg[stat] for stat in STATS], dtype=np.float64)
 
-        # Target: 1 if home win, else 0
-        target = 1 if row['wl_home'] == 'W' else 0
-        targets.append(target)
+    X, team_emas = advance_emas(df, {}, init_ema)
 
-        # Sample weight based on recency
-        days_old = (last_date - game_date).days
-        weight = np.exp(-days_old / WEIGHT_DECAY_DAYS)
-        weights.append(weight)
-        game_dates.append(game_date)
+    # Target: 1 if home win, else 0
+    y = (df['wl_home'] == 'W').to_numpy().astype(np.int64)
 
-        # After the game, update home team's EMA with actual stats
-        actual_home = {}
-        for stat in STATS:
-            col = f'{stat}_home'
-            val = row[col] if col in row else 0
-            if pd.isna(val):
-                val = 0
-            actual_home[stat] = val
-        # Update EMA
-        new_home_ema = {}
-        for stat in STATS:
-            new_home_ema[stat] = ALPHA * actual_home[stat] + (1 - ALPHA) * home_ema[stat]
-        team_emas[home_id] = new_home_ema
+    # Most recent game date is "now" for sample weights
+    weights = recency_weights(df['game_date'], df['game_date'].max())
+    game_dates = list(df['game_date'])
 
-        # Update away team's EMA
-        actual_away = {}
-        for stat in STATS:
-            col = f'{stat}_away'
-            val = row[col] if col in row else 0
-            if pd.isna(val):
-                val = 0
-            actual_away[stat] = val
-        new_away_ema = {}
-        for stat in STATS:
-            new_away_ema[stat] = ALPHA * actual_away[stat] + (1 - ALPHA) * away_ema[stat]
-        team_emas[away_id] = new_away_ema
+    # Optional: filter out games with very few prior games? (We used global avg, so all included)
+    return X, y, weights, team_emas, game_dates, init_ema
 
-    X = np.array(features)
-    y = np.array(targets)
-    weights = np.array(weights)
 
-    # Optional: filter out games with very few prior games? (We used global avg, so all included)
+def preprocess_and_build_dataset(df):
+    """
+    Iterate through games in chronological order.
+    For each game, use current EMA of home and away as features,
+    then update EMA with actual game stats.
+    Returns X, y, sample_weights, and final team_emas.
+    """
+    X, y, weights, team_emas, game_dates, _ = build_dataset(df)
     return X, y, weights, team_emas, game_dates
 
 # ---------------------------
@@ -189,16 +300,126 @@ def build_model(input_dim):
     model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
     return model
 
+# ---------------------------
+# NumPy Export
+# ---------------------------
+def export_numpy_mlp(model, scaler, path):
+    """Export Dense weights and StandardScaler params so the API can serve without TensorFlow."""
+    dense_layers = [layer for layer in model.layers if isinstance(layer, layers.Dense)]
+    save_mlp(
+        path,
+        [layer.get_weights() for layer in dense_layers],
+        [layer.activation.__name__ for layer in dense_layers],
+        scaler.mean_,
+        scaler.scale_,
+    )
+
+
+def check_numpy_parity(model, scaler, mlp_path, X_raw):
+    """Compare the exported NumPy forward pass with Keras on the same raw features."""
+    np_model, np_scaler = load_mlp(mlp_path)
+    keras_probs = model.predict(scaler.transform(X_raw), batch_size=1024, verbose=0)[:, 0]
+    numpy_probs = np_model.predict(np_scaler.transform(X_raw))[:, 0]
+    max_diff = float(np.max(np.abs(keras_probs - numpy_probs))) if len(X_raw) else 0.0
+    print(f"NumPy/Keras parity: max |diff| = {max_diff:.2e} on {len(X_raw)} rows")
+    if max_diff > PARITY_TOLERANCE:
+        raise RuntimeError(f"NumPy export does not match Keras (max diff {max_diff:.2e})")
+    return max_diff
+
 # ---------------------------
 # Training Pipeline
 # ---------------------------
-def train_model(db_path):
+class EpochProgress(keras.callbacks.Callback):
+    """Reports epoch progress to a progress(stage, fraction, message) callable."""
+
+    def __init__(self, progress, epochs, stage="training"):
+        super().__init__()
+        self.progress = progress
+        self.epochs = epochs
+        self.stage = stage
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        message = f"epoch {epoch + 1}/{self.epochs}"
+        if "loss" in logs:
+            message += f", loss {logs['loss']:.4f}"
+        self.progress(self.stage, (epoch + 1) / self.epochs, message)
+
+
+def report(progress, stage, fraction, message=""):
+    if progress is not None:
+        progress(stage, fraction, message)
+
+
+def save_incremental_state(model_dir, db_path, X, y, game_dates, init_ema, watermark):
+    """Persist what a warm-start retrain needs: replay window, watermark and history checksum."""
+    dates_ns = pd.DatetimeIndex(game_dates).as_unit('ns').asi8
+    history = compute_data_fingerprint(db_path, until=watermark)
+    np.savez(
+        os.path.join(model_dir, REPLAY_FILE),
+        X=X[-REPLAY_GAMES:], y=y[-REPLAY_GAMES:], game_dates=dates_ns[-REPLAY_GAMES:],
+        init_ema=init_ema,
+        watermark=np.array(watermark if watermark is not None else ""),
+        history_checksum=np.array(history["checksum"]),
+    )
+
+
+def load_incremental_state(model_dir):
+    path = os.path.join(model_dir, REPLAY_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        state = {key: data[key] for key in data.files}
+    state["watermark"] = str(state["watermark"]) or None
+    state["history_checksum"] = str(state["history_checksum"])
+    state["game_dates"] = pd.to_datetime(state["game_dates"], unit='ns')
+    return state
+
+
+def save_artifacts(model_dir, db_path, model, scaler, team_emas, X_check, fingerprint):
+    """Save model, scaler, team EMAs and everything derived from them."""
+    os.makedirs(model_dir, exist_ok=True)
+    model.save(os.path.join(model_dir, "model.h5"))
+    with open(os.path.join(model_dir, "scaler.pkl"), "wb") as f:
+        pickle.dump(scaler, f)
+    with open(os.path.join(model_dir, "team_emas.pkl"), "wb") as f:
+        pickle.dump(team_emas, f)
+
+    # Compact TensorFlow-free export used by the API, checked against Keras outputs
+    mlp_path = os.path.join(model_dir, MLP_FILE)
+    export_numpy_mlp(model, scaler, mlp_path)
+    check_numpy_parity(model, scaler, mlp_path, X_check)
+
+    # Precompute home-win probabilities for every home/away pair in one batched pass
+    matchup_probs = build_matchup_matrix(
+        team_emas,
+        lambda features: model.predict(scaler.transform(features), batch_size=len(features), verbose=0)[:, 0]
+    )
+    save_matchup_matrix(model_dir, list(team_emas), matchup_probs)
+    print(f"Matchup matrix saved: {matchup_probs.shape}")
+
+    # Also save team names mapping (from game table)
+    conn = sqlite3.connect(db_path)
+    teams_df = pd.read_sql_query("SELECT DISTINCT team_id_home as team_id, team_name_home as team_name, team_abbreviation_home as team_abbrev FROM game", conn)
+    conn.close()
+    teams_df.to_csv(os.path.join(model_dir, "teams.csv"), index=False)
+
+    # Stamp the artifacts with the data they were trained on
+    save_artifact_fingerprint(model_dir, fingerprint)
+
+
+def train_model(db_path, model_dir=MODEL_DIR, fingerprint=None, progress=None):
+    # Fingerprint the data before reading it, so rows added during training trigger the next retrain
+    if fingerprint is None:
+        fingerprint = compute_data_fingerprint(db_path)
+
     print("Loading data...")
+    report(progress, "loading", 0.0, "loading games")
     df = load_games(db_path)
     print(f"Total games: {len(df)}")
 
     print("Preprocessing and building dataset with EMA...")
-    X, y, weights, team_emas, game_dates = preprocess_and_build_dataset(df)
+    X, y, weights, team_emas, game_dates, init_ema = build_dataset(df)
     print(f"Dataset size: {X.shape}")
 
     # Train/val split based on time (80% oldest, 20% newest)
@@ -217,36 +438,139 @@ def train_model(db_path):
     model.summary()
 
     # Train with sample weights
+    epochs = 30
     history = model.fit(
         X_train_scaled, y_train,
         sample_weight=w_train,
         validation_data=(X_val_scaled, y_val, w_val),
-        epochs=30,
+        epochs=epochs,
         batch_size=64,
-        verbose=1
+        verbose=1,
+        callbacks=[EpochProgress(progress, epochs)] if progress else None
     )
 
     # Evaluate
     val_loss, val_acc = model.evaluate(X_val_scaled, y_val, sample_weight=w_val)
     print(f"Validation accuracy: {val_acc:.4f}")
 
-    # Save model, scaler, and team EMAs
-    model.save(os.path.join(MODEL_DIR, "model.h5"))
-    with open(os.path.join(MODEL_DIR, "scaler.pkl"), "wb") as f:
-        pickle.dump(scaler, f)
-    with open(os.path.join(MODEL_DIR, "team_emas.pkl"), "wb") as f:
-        pickle.dump(team_emas, f)
-
-    # Also save team names mapping (from game table)
-    conn = sqlite3.connect(db_path)
-    teams_df = pd.read_sql_query("SELECT DISTINCT team_id_home as team_id, team_name_home as team_name, team_abbreviation_home as team_abbrev FROM game", conn)
-    conn.close()
-    teams_df.to_csv(os.path.join(MODEL_DIR, "teams.csv"), index=False)
+    # Save model, scaler, team EMAs and derived artifacts
+    report(progress, "saving", 0.0, f"validation accuracy {val_acc:.4f}")
+    save_artifacts(model_dir, db_path, model, scaler, team_emas, X_val, fingerprint)
+    save_incremental_state(model_dir, db_path, X, y, game_dates, init_ema, df.attrs.get('max_game_date'))
 
     print("Model and artifacts saved.")
 
     return model, scaler, team_emas
 
+
+def split_replay(n_rows, n_new, holdout_fraction=HOLDOUT_FRACTION, seed=HOLDOUT_SEED):
+    """
+    Split the replay window into (train_idx, holdout_idx) for a warm start.
+    The last n_new rows are the new games and always go to training - a tail holdout
+    would swallow a normal batch of new games whole. The guardrail holdout is a seeded
+    random slice of the older rows; only when there are too few of them does it also
+    take a random part of the new games, never more than holdout_fraction of them.
+    """
+    rng = np.random.default_rng(seed)
+    n_new = min(n_new, n_rows)
+    n_hold = max(1, int(holdout_fraction * n_rows))
+    old = np.arange(n_rows - n_new)
+    new = np.arange(n_rows - n_new, n_rows)
+    if len(old) >= n_hold:
+        hold = rng.choice(old, n_hold, replace=False)
+    else:
+        n_hold_new = min(n_hold - len(old), int(holdout_fraction * n_new))
+        hold = np.concatenate([old, rng.choice(new, n_hold_new, replace=False)])
+    hold = np.sort(hold).astype(np.int64)
+    train = np.setdiff1d(np.arange(n_rows), hold)
+    return train, hold
+
+
+def train_model_incremental(db_path, model_dir=MODEL_DIR, fingerprint=None, progress=None):
+    """
+    Warm-start retrain on games newer than the stored watermark.
+    Starts from the persisted final team EMAs and model weights, advances the EMAs over
+    new games only, and fine-tunes on a recency-weighted replay window of the newest games.
+    Falls back to a full train_model() when the stored state is missing, already-trained
+    games changed, or holdout accuracy drops by more than MAX_VAL_ACC_DROP.
+    Returns a dict describing what was done.
+    """
+    if fingerprint is None:
+        fingerprint = compute_data_fingerprint(db_path)
+
+    def full_retrain(reason):
+        print(f"Falling back to full retrain: {reason}")
+        train_model(db_path, model_dir, fingerprint, progress)
+        return {"mode": "full", "reason": reason}
+
+    state = load_incremental_state(model_dir)
+    model_path = os.path.join(model_dir, "model.h5")
+    if state is None or state["watermark"] is None or not os.path.exists(model_path):
+        return full_retrain("no incremental state for the deployed model")
+
+    # Games up to the watermark must be exactly the ones the model has already seen
+    history = compute_data_fingerprint(db_path, until=state["watermark"])
+    if history["checksum"] != state["history_checksum"]:
+        return full_retrain("games at or before the watermark changed since the last training")
+
+    print(f"Loading games after {state['watermark']}...")
+    report(progress, "loading", 0.0, f"loading games after {state['watermark']}")
+    new_df = load_games(db_path, since=state["watermark"])
+    if new_df.empty:
+        save_artifact_fingerprint(model_dir, fingerprint)
+        return {"mode": "incremental", "reason": "no games newer than the watermark", "new_games": 0}
+    watermark = new_df.attrs.get('max_game_date')
+    new_df = prepare_games(new_df)
+    print(f"New games: {len(new_df)}")
+
+    with open(os.path.join(model_dir, "team_emas.pkl"), "rb") as f:
+        team_emas = pickle.load(f)
+    with open(os.path.join(model_dir, "scaler.pkl"), "rb") as f:
+        scaler = pickle.load(f)
+
+    # Advance EMAs over the new games only
+    X_new, team_emas = advance_emas(new_df, team_emas, state["init_ema"])
+    y_new = (new_df['wl_home'] == 'W').to_numpy().astype(np.int64)
+
+    # Replay window: newest REPLAY_GAMES games, weighted by recency
+    X = np.vstack([state["X"], X_new])[-REPLAY_GAMES:]
+    y = np.concatenate([state["y"], y_new])[-REPLAY_GAMES:]
+    game_dates = pd.Series(np.concatenate([state["game_dates"].values, new_df['game_date'].values]))
+    game_dates = game_dates.iloc[-REPLAY_GAMES:].reset_index(drop=True)
+    weights = recency_weights(game_dates, game_dates.max())
+
+    # New games are fine-tuned on; the guardrail holdout comes from older replay rows
+    train_idx, hold_idx = split_replay(len(X), min(len(X_new), len(X)))
+    X_train, X_hold = scaler.transform(X[train_idx]), scaler.transform(X[hold_idx])
+    y_train, y_hold = y[train_idx], y[hold_idx]
+    w_train, w_hold = weights[train_idx], weights[hold_idx]
+
+    model = keras.models.load_model(model_path, compile=False)
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=FINE_TUNE_LR),
+                  loss='binary_crossentropy', metrics=['accuracy'])
+    _, old_acc = model.evaluate(X_hold, y_hold, sample_weight=w_hold, verbose=0)
+
+    model.fit(X_train, y_train, sample_weight=w_train,
+              epochs=FINE_TUNE_EPOCHS, batch_size=64, verbose=0,
+              callbacks=[EpochProgress(progress, FINE_TUNE_EPOCHS)] if progress else None)
+    _, new_acc = model.evaluate(X_hold, y_hold, sample_weight=w_hold, verbose=0)
+    print(f"Holdout accuracy: before {old_acc:.4f}, after fine-tuning {new_acc:.4f}")
+
+    if new_acc < old_acc - MAX_VAL_ACC_DROP:
+        return full_retrain(f"holdout accuracy regressed ({old_acc:.4f} -> {new_acc:.4f})")
+
+    report(progress, "saving", 0.0, f"holdout accuracy {new_acc:.4f}")
+    save_artifacts(model_dir, db_path, model, scaler, team_emas, X[hold_idx], fingerprint)
+    save_incremental_state(model_dir, db_path, X, y, list(game_dates), state["init_ema"], watermark)
+    print("Incremental retrain completed.")
+    return {
+        "mode": "incremental",
+        "reason": "fine-tuned on new games",
+        "new_games": int(len(new_df)),
+        "holdout_accuracy_before": float(old_acc),
+        "holdout_accuracy_after": float(new_acc),
+    }
+
 # ---------------------------
 # Retraining with New Data
 # ---------------------------
@@ -263,17 +587,39 @@ def fetch_new_games_from_espn(season=None):
 def update_model_with_new_data(db_path, new_games_df):
     """
     Append new games to database and retrain model incrementally or fully.
-    For simplicity, we just retrain from scratch.
+    Falls back to a full retrain when warm-starting is not safe.
     """
     # Append to existing DB (you'd need to implement insertion)
-    # Then call train_model again
-    pass
+    # Then fine-tune on the games newer than the last training watermark and publish a new version
+    return train_and_publish(db_path, incremental=True)
 
 # ---------------------------
 # Main
 # ---------------------------
+def train_and_publish(db_path, model_dir=MODEL_DIR, incremental=False):
+    """
+    Train into a staging directory and publish it as a new immutable artifact version.
+    The API keeps serving the previous version until the CURRENT manifest is swapped.
+    """
+    staging = create_staging_dir(model_dir)
+    try:
+        if incremental:
+            copy_current(model_dir, staging)
+            result = train_model_incremental(db_path, staging)
+        else:
+            train_model(db_path, staging)
+            result = {"mode": "full", "reason": "trained from scratch"}
+        manifest = publish(model_dir, staging)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    removed = collect_garbage(model_dir)
+    print(f"Published artifact version {manifest['version']}"
+          + (f", removed old versions: {', '.join(removed)}" if removed else ""))
+    return dict(result, version=manifest["version"])
+
+
 if __name__ == "__main__":
-    train_model(DB_PATH)
+    print(train_and_publish(DB_PATH, incremental="--incremental" in sys.argv))
     # Uncomment to simulate retraining:
     # new_data = fetch_new_games_from_espn()
     # if new_data:
@@ -1,17 +1,47 @@
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
-import time
 import sys
+import os
 import io
 import requests
 import json
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.schema import ensure_schema, ensure_teams, parse_match_id
+from services.team_catalog import upsert_teams
+from scripts.espn_client import ESPNClient
+from scripts.espn_pipeline import SKIPPED, run_pipeline
+
 # Исправляем проблемы с кодировкой в Windows
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 DB_PATH = "../nba.sqlite"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Адрес ESPN API (для офлайн-прогонов - локальный stub, см. espn_stub_server.py)
+ESPN_BASE_URL = os.getenv("ESPN_BASE_URL", "http://site.api.espn.com/apis/site/v2/sports/basketball/nba")
+# Общий лимит запросов к ESPN вместо фиксированных пауз между играми и днями
+ESPN_RATE_LIMIT = float(os.getenv("ESPN_RATE_LIMIT", "5"))
+# Параллельные запросы scoreboard (по дням) и summary (по играм)
+SCOREBOARD_CONCURRENCY = int(os.getenv("ESPN_SCOREBOARD_CONCURRENCY", "2"))
+SUMMARY_CONCURRENCY = int(os.getenv("ESPN_SUMMARY_CONCURRENCY", "4"))
+# Размер очередей между стадиями конвейера
+PIPELINE_QUEUE_SIZE = int(os.getenv("ESPN_PIPELINE_QUEUE_SIZE", "100"))
+# Историческая загрузка идёт порциями по столько дней; после каждой порции дни отмечаются в ingest_progress
+BACKFILL_CHUNK_DAYS = int(os.getenv("ESPN_BACKFILL_CHUNK_DAYS", "14"))
+# Сколько игр записывать одной транзакцией
+INGEST_BATCH_SIZE = int(os.getenv("ESPN_INGEST_BATCH_SIZE", "100"))
+# Кэш ответов ESPN: завершённые игры и прошедшие дни - бессрочно, остальное - ESPN_CACHE_TTL_SECONDS
+# (пустой ESPN_CACHE_DIR отключает кэш)
+ESPN_CACHE_DIR = os.getenv("ESPN_CACHE_DIR", os.path.join(BACKEND_DIR, "espn_cache"))
+ESPN_CACHE_TTL = float(os.getenv("ESPN_CACHE_TTL_SECONDS", "300"))
+
+espn_client = ESPNClient(
+    ESPN_BASE_URL, ESPN_CACHE_DIR, ESPN_CACHE_TTL, ESPN_RATE_LIMIT,
+    pool_size=SCOREBOARD_CONCURRENCY + SUMMARY_CONCURRENCY
+)
 
 # Расширенный маппинг названий команд из ESPN в аббревиатуры БД
 TEAM_NAME_MAP = {
@@ -71,13 +101,9 @@ SPECIAL_GAME_KEYWORDS = ['Team', 'World', 'USA', 'All-Star', 'All Star', 'Rising
 
 
 def get_team_id_map(conn):
-    """Создаёт словарь {team_abbreviation: team_id} из таблицы game."""
-    df = pd.read_sql_query(
-        "SELECT DISTINCT team_abbreviation_home as abbrev, team_id_home as team_id FROM game "
-        "UNION "
-        "SELECT DISTINCT team_abbreviation_away as abbrev, team_id_away as team_id FROM game",
-        conn
-    )
+    """Создаёт словарь {team_abbreviation: team_id} из справочника teams."""
+    ensure_teams(conn)
+    df = pd.read_sql_query("SELECT abbrev, team_id FROM teams", conn)
     team_map = dict(zip(df['abbrev'], df['team_id']))
 
     # Добавляем заглушку для специальных игр
@@ -96,27 +122,63 @@ def is_special_game(away_name, home_name):
     return False
 
 
+def espn_get(path, params, timeout, is_final=None):
+    """GET к ESPN API через общий клиент (keep-alive, кэш, лимит запросов)."""
+    return espn_client.get(path, params, timeout, is_final)
+
+
+def is_completed(item):
+    """Игра завершена (status в событии scoreboard или в header.competitions у summary)."""
+    return bool(item.get('status', {}).get('type', {}).get('completed'))
+
+
+def is_final_scoreboard(date):
+    """Ответ scoreboard за день больше не изменится: все игры завершены или день давно прошёл."""
+    def check(data):
+        events = data.get('events', [])
+        if events:
+            return all(is_completed(event) for event in events)
+        return date < datetime.now().date() - timedelta(days=1)
+    return check
+
+
+def is_final_summary(data):
+    """
+    Summary больше не изменится: игра завершена и в бокс-скоре есть статистика обеих команд.
+    Сразу после финальной сирены ESPN отдаёт статус completed с пустыми statistics -
+    такой ответ живёт только ttl и перезапрашивается.
+    """
+    competitions = data.get('header', {}).get('competitions', [])
+    if not competitions or not is_completed(competitions[0]):
+        return False
+    teams = data.get('boxscore', {}).get('teams', [])
+    return len(teams) >= 2 and all(team.get('statistics') for team in teams)
+
+
 def fetch_espn_games(date):
     """
     Получает игры за указанную дату через ESPN API.
+    None - день загрузить не удалось (пустой список - игр в этот день нет).
     """
     print(f"\n📅 Checking {date}")
 
     date_str = date.strftime("%Y%m%d")
-    url = "http://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard"
     params = {
         "dates": date_str,
         "limit": 100
     }
 
-    print(f"  Fetching from ESPN: {url}")
+    print(f"  Fetching from ESPN: {espn_client.base_url}/scoreboard")
 
     try:
-        response = requests.get(url, params=params, timeout=15)
+        day = date.date() if isinstance(date, datetime) else date
+        response = espn_get("scoreboard", params, timeout=15, is_final=is_final_scoreboard(day))
+        if response.from_cache:
+            print(f"  💾 From cache ({response.source})")
 
         if response.status_code != 200:
             print(f"  ❌ ESPN API returned {response.status_code}")
-            return []
+            return None
 
         data = response.json()
         events = data.get('events', [])
@@ -137,21 +199,20 @@ def fetch_espn_games(date):
 
     except requests.exceptions.RequestException as e:
         print(f"  ❌ Request error: {e}")
-        return []
+        return None
     except Exception as e:
         print(f"  ❌ Unexpected error: {e}")
-        return []
+        return None
 
 
 def fetch_detailed_stats(game_id):
     """
     Получает детальную статистику игры с ESPN.
     """
-    url = f"http://site.api.espn.com/apis/site/v2/sports/basketball/nba/summary"
     params = {"event": game_id}
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = espn_get("summary", params, timeout=10, is_final=is_final_summary)
         if response.status_code != 200:
             return None
 
@@ -185,9 +246,10 @@ def fetch_detailed_stats(game_id):
         return None
 
 
-def parse_espn_game(event, team_id_map):
+def parse_espn_game(event, team_id_map, stats_fetcher=None):
     """
     Преобразует данные игры из ESPN API в формат таблицы game.
+    stats_fetcher(game_id) - получение детальной статистики (по умолчанию fetch_detailed_stats).
     """
     try:
         game_id = event['id']
@@ -236,7 +298,7 @@ def parse_espn_game(event, team_id_map):
 
         # Получаем детальную статистику
         print(f"    Fetching detailed stats for game {game_id}...")
-        detailed_stats = fetch_detailed_stats(game_id)
+        detailed_stats = (stats_fetcher or fetch_detailed_stats)(game_id)
 
         if detailed_stats:
             home_stats = detailed_stats.get('home', {})
@@ -343,74 +405,334 @@ def parse_espn_game(event, team_id_map):
         return None
 
 
-def insert_game(conn, game):
-    """Вставляет запись в таблицу game."""
-    cursor = conn.cursor()
-
-    columns = ', '.join(game.keys())
-    placeholders = ':' + ', :'.join(game.keys())
-    query = f"INSERT OR IGNORE INTO game ({columns}) VALUES ({placeholders})"
+class GameBatchWriter:
+    """
+    Пакетная запись игр в game: записи копятся и пишутся executemany одной транзакцией.
+    Upsert без уникального ключа на game_id: сначала UPDATE по game_id (исправляет счёт игр,
+    загруженных во время матча), затем INSERT ... WHERE NOT EXISTS для новых.
+    Список колонок и тексты запросов строятся один раз - по первой записи.
+    Если пакет откатывается, строки записываются по одной, и результат выводится для каждой.
+    """
 
+    def __init__(self, conn, batch_size=INGEST_BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.columns = None
+        self._insert_query = None
+        self._update_query = None
+        self._batch = {}
+        self.failures = []
+
+    def _prepare(self, game):
+        # Нормализованный ID матча - сразу при вставке, а не при следующей миграции
+        self.columns = [column for column in game if column not in ('match_id', 'source')] + ['match_id', 'source']
+        values = ', '.join(f":{column}" for column in self.columns)
+        self._insert_query = (
+            f"INSERT INTO game ({', '.join(self.columns)}) SELECT {values} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM game WHERE game_id = :game_id)"
+        )
+        assignments = ', '.join(f"{column} = :{column}" for column in self.columns if column != 'game_id')
+        self._update_query = f"UPDATE game SET {assignments} WHERE game_id = :game_id"
+
+    def add(self, game):
+        """Добавить игру в пакет; полный пакет сразу записывается. Возвращает счётчики записанного."""
+        if self.columns is None:
+            self._prepare(game)
+        match_id, source = parse_match_id(game['game_id'])
+        # Одна игра дважды в пакете (пересечение дней) - остаётся последняя версия
+        self._batch[game['game_id']] = dict(game, match_id=match_id, source=source)
+        if len(self._batch) >= self.batch_size:
+            return self.flush()
+        return {}
+
+    def _write(self, games):
+        cursor = self.conn.executemany(self._update_query, games)
+        updated = max(cursor.rowcount, 0)
+        cursor = self.conn.executemany(self._insert_query, games)
+        new = max(cursor.rowcount, 0)
+        # Новая команда или смена названия - в той же транзакции, что и матчи
+        upsert_teams(self.conn, games)
+        return {"new": new, "updated": updated}
+
+    def flush(self):
+        """
+        Записать накопленный пакет одной транзакцией.
+        Возвращает {"new", "updated", "insert_failed", "failed_keys"} (failed_keys - game_id незаписанных).
+        """
+        games = list(self._batch.values())
+        self._batch = {}
+        if not games:
+            return {}
+        try:
+            with self.conn:
+                counts = self._write(games)
+            print(f"    💾 Saved batch of {len(games)}: {counts['new']} new, {counts['updated']} updated")
+            return counts
+        except Exception as e:
+            print(f"    ❌ Batch of {len(games)} games rolled back: {e}")
+
+        # Пакет откатился целиком - пишем по одной, чтобы сохранить остальные и назвать виноватые строки
+        counts = {"new": 0, "updated": 0, "insert_failed": 0, "failed_keys": []}
+        for game in games:
+            try:
+                with self.conn:
+                    row_counts = self._write([game])
+            except Exception as e:
+                counts["insert_failed"] += 1
+                counts["failed_keys"].append(game['game_id'])
+                self.failures.append((game['game_id'], str(e)))
+                print(f"      ❌ {game['game_id']}: {e}")
+                continue
+            for key, n in row_counts.items():
+                counts[key] += n
+            print(f"      ✅ {game['game_id']}: {'updated' if row_counts['updated'] else 'added'}")
+        return counts
+
+
+# Уже загруженные игры ESPN за период: один запрос по индексу (game_date, game_id)
+KNOWN_GAMES_QUERY = """
+    SELECT game_id, pts_home, pts_away, fga_home, fga_away FROM game
+    WHERE game_date >= ? AND game_date < ? AND source = 'espn'
+"""
+
+
+def _score(value):
+    """Счёт из БД (TEXT/REAL/INTEGER в зависимости от происхождения строки) или из ESPN - в int."""
     try:
-        cursor.execute(query, game)
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"    ❌ Error inserting game: {e}")
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def has_box_score(game):
+    """В записи есть детальная статистика обеих команд (а не нули из "Using basic stats only")."""
+    return bool(_score(game.get('fga_home'))) and bool(_score(game.get('fga_away')))
+
+
+def load_known_games(conn, first_date, last_date):
+    """
+    {game_id: (pts_home, pts_away)} для игр ESPN, уже записанных за даты first_date..last_date.
+    Игры, записанные без бокс-скора (summary тогда не загрузился), не возвращаются:
+    их summary запрашивается снова, пока статистика не появится.
+    Время игр в ESPN - UTC, поэтому вечерние игры последнего дня попадают на следующие сутки.
+    """
+    rows = conn.execute(KNOWN_GAMES_QUERY, (
+        first_date.strftime("%Y-%m-%d"), (last_date + timedelta(days=2)).strftime("%Y-%m-%d")
+    )).fetchall()
+    return {
+        game_id: (_score(pts_home), _score(pts_away))
+        for game_id, pts_home, pts_away, fga_home, fga_away in rows
+        if has_box_score({'fga_home': fga_home, 'fga_away': fga_away})
+    }
+
+
+def is_unchanged_final(event, known_scores):
+    """Игра завершена, и в БД уже её итоговый счёт - детальную статистику запрашивать не нужно."""
+    if not is_completed(event):
         return False
+    competitors = event.get('competitions', [{}])[0].get('competitors', [])
+    if len(competitors) < 2:
+        return False
+    # Порядок участников как в parse_espn_game: [0] - гости, [1] - хозяева
+    scores = (_score(competitors[1].get('score')), _score(competitors[0].get('score')))
+    return scores == known_scores
+
+
+def ingest_dates(conn, dates, team_id_map, scoreboard_concurrency=SCOREBOARD_CONCURRENCY,
+                 summary_concurrency=SUMMARY_CONCURRENCY):
+    """
+    Загрузить игры за даты через конвейер fetch -> parse -> insert.
+    Дни и игры загружаются параллельно, частоту запросов ограничивает espn_client; вставка идёт в текущем потоке.
+    Завершённые игры, которые уже есть в БД с тем же счётом, пропускаются без запроса summary;
+    уже загруженные игры с другим счётом (были в процессе) обновляются.
+    Запись - пакетами по INGEST_BATCH_SIZE игр в одной транзакции (GameBatchWriter).
+    Возвращает счётчики конвейера (см. run_pipeline), special - пропущенные All-Star и выставочные
+    игры (в skipped они не входят: там только уже загруженные) и incomplete_dates - дни, где есть
+    незавершённые игры или игры, записанные без бокс-скора (summary не загрузился).
+    """
+    known = load_known_games(conn, min(dates), max(dates)) if dates else {}
+    event_dates = {}
+    incomplete = set()
+    special = []
 
+    def fetch_day(date):
+        events = fetch_espn_games(date)
+        for event in events or []:
+            event_dates[event['id']] = date
+            # Запланированные и идущие игры ещё изменятся - такой день нельзя отметить загруженным
+            if not is_completed(event):
+                incomplete.add(date)
+        return events
+
+    def fetch_game(event):
+        game_id = f"ESPN_{event['id']}"
+        if game_id in known and is_unchanged_final(event, known[game_id]):
+            return SKIPPED
+        competitors = event.get('competitions', [{}])[0].get('competitors', [])
+        if len(competitors) >= 2 and is_special_game(
+                *(competitor.get('team', {}).get('displayName', '') for competitor in competitors[:2])):
+            # All-Star и выставочные игры не загружаются - это не сбой дня
+            special.append(game_id)
+            return SKIPPED
+        print(f"  Processing game {event['id']}:")
+        game = parse_espn_game(event, team_id_map)
+        if game is not None and not has_box_score(game):
+            incomplete.add(event_dates.get(event['id']))
+        return game
+
+    writer = GameBatchWriter(conn)
+    stats = run_pipeline(
+        dates,
+        fetch_day, fetch_game, writer.add, writer.flush,
+        scoreboard_workers=scoreboard_concurrency,
+        summary_workers=summary_concurrency,
+        queue_size=PIPELINE_QUEUE_SIZE,
+        record_key=lambda game: game['game_id'],
+    )
+    stats['special'] = len(special)
+    stats['skipped'] -= len(special)
+    stats['incomplete_dates'] = sorted(date for date in incomplete if date is not None)
+    return stats
 
-def update_db_with_new_games(db_path, days_back=7):
+
+def update_db_with_new_games(db_path, days_back=7, scoreboard_concurrency=SCOREBOARD_CONCURRENCY,
+                             summary_concurrency=SUMMARY_CONCURRENCY):
     """
-    Обновляет базу новыми играми через ESPN API.
+    Обновляет базу новыми играми через ESPN API (последние days_back дней, см. ingest_dates).
     """
     print(f"\n{'=' * 60}")
     print(f"🔄 Updating database with games from last {days_back} days using ESPN API")
     print(f"{'=' * 60}")
 
     conn = sqlite3.connect(db_path)
+    # Колонки match_id/source, справочник teams и индексы, если БД ещё не мигрирована
+    ensure_schema(conn)
     team_id_map = get_team_id_map(conn)
     today = datetime.now().date()
-    new_count = 0
-    failed_count = 0
-    special_count = 0
 
-    for i in range(days_back):
-        date = today - timedelta(days=i)
+    stats = ingest_dates(conn, [today - timedelta(days=i) for i in range(days_back)], team_id_map,
+                         scoreboard_concurrency, summary_concurrency)
+
+    conn.close()
+
+    new_count = stats['new']
+    failed_count = stats['failed'] + stats['insert_failed']
+    print(f"\n{'=' * 60}")
+    print(f"📊 Summary:")
+    print(f"  • Games added: {new_count}")
+    print(f"  • Games updated: {stats['updated']}")
+    print(f"  • Already ingested, skipped: {stats['skipped']}")
+    print(f"  • Failed to add: {failed_count}")
+    print(f"  • Days failed to fetch: {stats['days_failed']}")
+    print(f"  • Special games skipped: {stats['special']}")
+    print(f"  • Time: {stats['elapsed']:.1f}s ({stats['games_per_sec']} games/s)")
+    print(f"{'=' * 60}")
+
+    return new_count
+
+
+def season_dates(season):
+    """
+    Границы сезона НБА: "2023-24" или "2023" -> 2023-10-01 .. 2024-06-30
+    (предсезонка, регулярный чемпионат и плей-офф), но не дальше сегодняшнего дня.
+    """
+    start_year = int(str(season).split('-')[0])
+    start = datetime(start_year, 10, 1).date()
+    end = min(datetime(start_year + 1, 6, 30).date(), datetime.now().date())
+    return start, end
+
+
+def completed_dates(conn, start, end):
+    """Дни из диапазона, уже отмеченные в ingest_progress."""
+    rows = conn.execute(
+        "SELECT date FROM ingest_progress WHERE date >= ? AND date <= ?",
+        (start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+    ).fetchall()
+    return {row[0] for row in rows}
 
-        events = fetch_espn_games(date)
 
-        for event in events:
-            print(f"  Processing game {event['id']}:")
-            game_record = parse_espn_game(event, team_id_map)
+def mark_completed(conn, dates, games_by_date):
+    """Отметить дни как полностью загруженные (после того как их игры записаны); games_by_date - игр в дне."""
+    now = datetime.now().isoformat()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO ingest_progress (date, games, completed_at) VALUES (?, ?, ?)",
+            [(date.strftime("%Y-%m-%d"), games_by_date.get(date), now) for date in dates]
+        )
 
-            if game_record is None:
-                failed_count += 1
-            elif game_record and insert_game(conn, game_record):
-                new_count += 1
-                print(f"    ✅ Added: {game_record['team_abbreviation_away']} @ {game_record['team_abbreviation_home']}")
-            else:
-                failed_count += 1
 
-            # Задержка между запросами
-            time.sleep(1)
+def backfill(db_path, start, end, scoreboard_concurrency=SCOREBOARD_CONCURRENCY,
+             summary_concurrency=SUMMARY_CONCURRENCY, chunk_days=BACKFILL_CHUNK_DAYS, restart=False):
+    """
+    Историческая загрузка игр за start..end (включительно) с возобновлением.
+    Дни идут порциями по chunk_days через тот же конвейер; после каждой порции её дни
+    отмечаются в ingest_progress, и повторный запуск продолжает с неотмеченных.
+    Отмечаются только дни, где все игры завершены и записаны с бокс-скором: не загруженный
+    scoreboard, сбой разбора/summary/записи хотя бы одной игры или незавершённая игра
+    оставляют день на следующий запуск. restart=True - пройти весь диапазон заново.
+    Возвращает суммарные счётчики.
+    """
+    print(f"\n{'=' * 60}")
+    print(f"🗄️ Backfilling games {start} .. {end} using ESPN API")
+    print(f"{'=' * 60}")
+
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
+    team_id_map = get_team_id_map(conn)
 
-        # Задержка между днями
-        if i < days_back - 1:
-            print(f"  Waiting before next day...")
-            time.sleep(2)
+    all_dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    done = set() if restart else completed_dates(conn, start, end)
+    pending = [date for date in all_dates if date.strftime("%Y-%m-%d") not in done]
+    print(f"  {len(all_dates)} days in range, {len(all_dates) - len(pending)} already done, {len(pending)} to go")
+
+    totals = {"days": 0, "days_failed": 0, "events": 0, "skipped": 0, "special": 0, "new": 0, "updated": 0,
+              "failed": 0, "insert_failed": 0, "elapsed": 0.0}
+    chunk_days = max(1, chunk_days)
+    for offset in range(0, len(pending), chunk_days):
+        chunk = pending[offset:offset + chunk_days]
+        stats = ingest_dates(conn, chunk, team_id_map, scoreboard_concurrency, summary_concurrency)
+        failed = set(stats['failed_dates']) | set(stats['failed_by_date']) | set(stats['incomplete_dates'])
+        mark_completed(conn, [date for date in chunk if date not in failed], stats['events_by_date'])
+        for key in totals:
+            totals[key] += stats[key]
+        print(f"  ✅ {chunk[0]} .. {chunk[-1]}: {stats['events']} games "
+              f"({stats['new']} new, {stats['updated']} updated, {stats['skipped']} skipped), "
+              f"{stats['games_per_sec']} games/s; {offset + len(chunk)}/{len(pending)} days")
+        if failed:
+            print(f"  ⚠️ Not fetched, failed or unfinished, will retry on next run: "
+                  f"{', '.join(str(date) for date in sorted(failed, key=str))}")
 
     conn.close()
 
+    totals["games_per_sec"] = round(totals["events"] / totals["elapsed"], 2) if totals["elapsed"] > 0 else 0.0
     print(f"\n{'=' * 60}")
-    print(f"📊 Summary:")
-    print(f"  • Games added: {new_count}")
-    print(f"  • Failed to add: {failed_count}")
-    print(f"  • Special games skipped: {special_count}")
+    print(f"📊 Backfill summary:")
+    print(f"  • Days processed: {totals['days']} (failed: {totals['days_failed']})")
+    print(f"  • Games: {totals['events']} ({totals['new']} new, {totals['updated']} updated, "
+          f"{totals['skipped']} skipped, {totals['special']} special, "
+          f"{totals['failed'] + totals['insert_failed']} failed)")
+    print(f"  • Time: {totals['elapsed']:.1f}s ({totals['games_per_sec']} games/s)")
     print(f"{'=' * 60}")
+    return totals
 
-    return new_count
+
+USAGE = """Usage:
+    python update_data.py                                   # последние 7 дней
+    python update_data.py backfill YYYY-MM-DD YYYY-MM-DD [--restart]
+    python update_data.py backfill 2023-24 [--restart]      # весь сезон"""
 
 
 if __name__ == "__main__":
-    update_db_with_new_games(DB_PATH, days_back=7)
\ No newline at end of file
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        update_db_with_new_games(DB_PATH, days_back=7)
+    elif args[0] == "backfill" and len(args) in (2, 3):
+        if len(args) == 3:
+            first = datetime.strptime(args[1], "%Y-%m-%d").date()
+            last = datetime.strptime(args[2], "%Y-%m-%d").date()
+        else:
+            first, last = season_dates(args[1])
+        backfill(DB_PATH, first, last, restart="--restart" in sys.argv)
+    else:
+        print(USAGE)
+        sys.exit(1)
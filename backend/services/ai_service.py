@@ -1,8 +1,6 @@
 from sqlalchemy.orm import Session
-import sqlite3
 import numpy as np
 import pandas as pd
-import pickle
 import os
 from datetime import datetime
 import sys
@@ -11,16 +9,15 @@ from typing import List, Dict, Any, Optional, Tuple
 import asyncio
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-DB_PATH = "./nba.sqlite"
-MODEL_DIR = "./models"
+from services.db_pool import db_pool, run_db
+from services.prediction_writer import prediction_writer
+from services.team_catalog import team_catalog
+from services.model_registry import registry, STATS
 
 
 class AIService:
     def __init__(self, db: Session):
         self.db = db
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row
         self.weights = {
             "winRate": 0.25,
             "homeAdvantage": 0.15,
@@ -31,29 +28,23 @@ class AIService:
             "paceAdvantage": 0.05
         }
 
-        # Загружаем модель если есть
+        # Модель берём из общего реестра, а не грузим с диска на каждый запрос
+        self.bundle = None
         self.model = None
         self.scaler = None
         self.team_emas = {}
+        self.model_version = None
         self.load_model()
 
     def load_model(self):
-        """Загрузка обученной модели"""
-        model_path = os.path.join(MODEL_DIR, "model.h5")
-        scaler_path = os.path.join(MODEL_DIR, "scaler.pkl")
-        emas_path = os.path.join(MODEL_DIR, "team_emas.pkl")
-
-        if os.path.exists(model_path):
-            try:
-                from tensorflow.keras.models import load_model
-                self.model = load_model(model_path)
-                with open(scaler_path, "rb") as f:
-                    self.scaler = pickle.load(f)
-                with open(emas_path, "rb") as f:
-                    self.team_emas = pickle.load(f)
-                print("✅ AI Service: модель загружена")
-            except Exception as e:
-                print(f"⚠️ AI Service: ошибка загрузки модели: {e}")
+        """Получение обученной модели из общего реестра"""
+        bundle = registry.ensure_loaded()
+        if bundle is not None:
+            self.bundle = bundle
+            self.model = bundle.model
+            self.scaler = bundle.scaler
+            self.team_emas = bundle.team_emas
+            self.model_version = bundle.version
 
     # ========== ОСНОВНОЙ МЕТОД ПРЕДСКАЗАНИЯ ==========
     async def predict_match(self, team1_id: int, team2_id: int, user_id: int) -> Dict[str, Any]:
@@ -79,19 +70,21 @@ class AIService:
             # Если нет в EMA, используем эвристику
             return await self._predict_heuristic(team1_id, team2_id, user_id)
 
-        home_ema = self.team_emas[home_id]
-        away_ema = self.team_emas[away_id]
+        # Вероятность из матрицы всех пар, посчитанной при загрузке модели
+        prob = self.bundle.lookup(home_id, away_id)
+        if prob is None:
+            home_ema = self.team_emas[home_id]
+            away_ema = self.team_emas[away_id]
 
-        STATS = ['pts', 'reb', 'ast', 'stl', 'blk', 'tov', 'pf', 'fg_pct', 'fg3_pct', 'ft_pct']
-        feat = []
-        for stat in STATS:
-            feat.append(home_ema.get(stat, 110))
-        for stat in STATS:
-            feat.append(away_ema.get(stat, 110))
+            feat = []
+            for stat in STATS:
+                feat.append(home_ema.get(stat, 110))
+            for stat in STATS:
+                feat.append(away_ema.get(stat, 110))
 
-        feat_array = np.array(feat).reshape(1, -1)
-        feat_scaled = self.scaler.transform(feat_array)
-        prob = self.model.predict(feat_scaled)[0][0]
+            feat_array = np.array(feat).reshape(1, -1)
+            feat_scaled = self.scaler.transform(feat_array)
+            prob = self.model.predict(feat_scaled)[0][0]
 
         prob1 = float(prob) * 100
         prob2 = 100 - prob1
@@ -102,13 +95,13 @@ class AIService:
         score2 = int(110 * prob2 / 100)
 
         # Сохраняем предсказание
-        prediction_id = await self._save_prediction(
-            user_id, team1_id, team2_id, prob1, prob2, score1, score2, confidence, "model-v1"
+        prediction_id = await run_db(
+            self._save_prediction, user_id, team1_id, team2_id, prob1, prob2, score1, score2, confidence, "model-v1"
         )
 
         # Получаем данные команд
-        team1 = await self._get_team_info(team1_id)
-        team2 = await self._get_team_info(team2_id)
+        team1 = await run_db(self._get_team_info, team1_id)
+        team2 = await run_db(self._get_team_info, team2_id)
 
         return {
             "id": str(prediction_id),
@@ -128,9 +121,9 @@ class AIService:
     async def _predict_heuristic(self, team1_id: int, team2_id: int, user_id: int) -> Dict[str, Any]:
         """Эвристический метод предсказания (без модели)"""
         # Получаем историю команд
-        team1_history = self._get_team_history(team1_id, 50)
-        team2_history = self._get_team_history(team2_id, 50)
-        head_to_head = self._get_head_to_head(team1_id, team2_id, 20)
+        team1_history = await run_db(self._get_team_history, team1_id, 50)
+        team2_history = await run_db(self._get_team_history, team2_id, 50)
+        head_to_head = await run_db(self._get_head_to_head, team1_id, team2_id, 20)
 
         # Рассчитываем факторы
         team1_win_rate = self._calculate_win_rate(team1_id, team1_history)
@@ -151,13 +144,13 @@ class AIService:
         score2 = int(110 * prob2 / 100)
 
         # Сохраняем предсказание
-        prediction_id = await self._save_prediction(
-            user_id, team1_id, team2_id, prob1, prob2, score1, score2, confidence, "heuristic-v1"
+        prediction_id = await run_db(
+            self._save_prediction, user_id, team1_id, team2_id, prob1, prob2, score1, score2, confidence, "heuristic-v1"
         )
 
         # Получаем данные команд
-        team1 = await self._get_team_info(team1_id)
-        team2 = await self._get_team_info(team2_id)
+        team1 = await run_db(self._get_team_info, team1_id)
+        team2 = await run_db(self._get_team_info, team2_id)
 
         return {
             "id": str(prediction_id),
@@ -176,26 +169,28 @@ class AIService:
 
     def _get_team_history(self, team_id: int, limit: int = 100):
         """История матчей команды"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM game 
-            WHERE team_id_home = ? OR team_id_away = ? 
-            ORDER BY game_date DESC 
-            LIMIT ?
-        """, (team_id, team_id, limit))
-        return [dict(row) for row in cursor.fetchall()]
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM game 
+                WHERE team_id_home = ? OR team_id_away = ? 
+                ORDER BY game_date DESC 
+                LIMIT ?
+            """, (team_id, team_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
 
     def _get_head_to_head(self, team1_id: int, team2_id: int, limit: int = 20):
         """История личных встреч"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM game 
-            WHERE (team_id_home = ? AND team_id_away = ?) 
-               OR (team_id_home = ? AND team_id_away = ?)
-            ORDER BY game_date DESC 
-            LIMIT ?
-        """, (team1_id, team2_id, team2_id, team1_id, limit))
-        return [dict(row) for row in cursor.fetchall()]
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM game 
+                WHERE (team_id_home = ? AND team_id_away = ?) 
+                   OR (team_id_home = ? AND team_id_away = ?)
+                ORDER BY game_date DESC 
+                LIMIT ?
+            """, (team1_id, team2_id, team2_id, team1_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
 
     def _calculate_win_rate(self, team_id: int, history: List[Dict]) -> float:
         """Win rate по истории"""
@@ -229,64 +224,31 @@ class AIService:
 
         return team1_wins / len(head_to_head)
 
-    async def _save_prediction(self, user_id: int, team1_id: int, team2_id: int,
-                               prob1: float, prob2: float, score1: int, score2: int,
-                               confidence: float, model_version: str) -> int:
-        """Сохранение предсказания в БД"""
-        cursor = self.conn.cursor()
-
-        # Создаем таблицу если нет
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS predictions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                team1_id INTEGER,
-                team2_id INTEGER,
-                probability_team1 REAL,
-                probability_team2 REAL,
-                expected_score_team1 INTEGER,
-                expected_score_team2 INTEGER,
-                confidence REAL,
-                model_version TEXT,
-                created_at TIMESTAMP
-            )
-        ''')
-
-        cursor.execute(
-            """INSERT INTO predictions 
-               (user_id, team1_id, team2_id, probability_team1, probability_team2,
-                expected_score_team1, expected_score_team2, confidence, model_version, created_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (user_id, team1_id, team2_id, prob1, prob2, score1, score2,
-             confidence, model_version, datetime.now().isoformat())
-        )
-        self.conn.commit()
-        return cursor.lastrowid
+    def _save_prediction(self, user_id: int, team1_id: int, team2_id: int,
+                         prob1: float, prob2: float, score1: int, score2: int,
+                         confidence: float, model_version: str) -> int:
+        """Сохранение предсказания: ID выдаётся сразу, строка пишется пакетом в фоне"""
+        return prediction_writer.submit({
+            "user_id": user_id,
+            "team1_id": team1_id,
+            "team2_id": team2_id,
+            "probability_team1": prob1,
+            "probability_team2": prob2,
+            "expected_score_team1": score1,
+            "expected_score_team2": score2,
+            "confidence": confidence,
+            "model_version": model_version,
+            "created_at": datetime.now().isoformat(),
+        })
 
-    async def _get_team_info(self, team_id: int) -> Dict:
+    def _get_team_info(self, team_id: int) -> Dict:
         """Получение информации о команде"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM game 
-            WHERE team_id_home = ? OR team_id_away = ? 
-            LIMIT 1
-        """, (team_id, team_id))
-        row = cursor.fetchone()
+        return self._team_info(team_id, team_catalog.get(team_id))
 
-        if row:
-            team_data = dict(row)
-            if team_data["team_id_home"] == team_id:
-                return {
-                    "id": team_data["team_id_home"],
-                    "name": team_data["team_name_home"],
-                    "abbrev": team_data["team_abbreviation_home"]
-                }
-            else:
-                return {
-                    "id": team_data["team_id_away"],
-                    "name": team_data["team_name_away"],
-                    "abbrev": team_data["team_abbreviation_away"]
-                }
+    @staticmethod
+    def _team_info(team_id, team: Optional[Dict]) -> Dict:
+        if team:
+            return dict(team)
 
         return {
             "id": team_id,
@@ -294,41 +256,58 @@ class AIService:
             "abbrev": f"T{team_id}"
         }
 
+    def _attach_teams(self, predictions: List[Dict]) -> List[Dict]:
+        """Команды для всех прогнозов страницы одним обращением к справочнику, без запроса на строку"""
+        team_ids = {pred["team1_id"] for pred in predictions} | {pred["team2_id"] for pred in predictions}
+        teams = team_catalog.get_many(team_ids)
+        for pred in predictions:
+            pred["team1"] = self._team_info(pred["team1_id"], teams.get(str(pred["team1_id"])))
+            pred["team2"] = self._team_info(pred["team2_id"], teams.get(str(pred["team2_id"])))
+        return predictions
+
     async def get_user_predictions(self, user_id: int, skip: int = 0, limit: int = 50):
         """Получение прогнозов пользователя"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM predictions 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT ? OFFSET ?
-        """, (user_id, limit, skip))
-
-        predictions = []
-        for row in cursor.fetchall():
-            pred = dict(row)
-            # Добавляем информацию о командах
-            team1 = await self._get_team_info(pred["team1_id"])
-            team2 = await self._get_team_info(pred["team2_id"])
-            pred["team1"] = team1
-            pred["team2"] = team2
-            predictions.append(pred)
-
-        return predictions
+        return await run_db(self._load_user_predictions, user_id, skip, limit)
+
+    def _load_user_predictions(self, user_id: int, skip: int, limit: int):
+        # Ещё не записанные прогнозы берутся из очереди записи (снимок до запроса:
+        # записанный в промежутке прогноз попадёт в обе выборки и отсеется по id)
+        pending = prediction_writer.pending_for_user(user_id)
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM predictions 
+                WHERE user_id = ? 
+                ORDER BY created_at DESC 
+                LIMIT ? OFFSET ?
+            """, (user_id, limit + skip, 0) if pending else (user_id, limit, skip))
+            rows = cursor.fetchall()
+
+        predictions = [dict(row) for row in rows]
+        if pending:
+            merged = {pred["id"]: pred for pred in predictions + pending}
+            predictions = sorted(merged.values(), key=lambda pred: pred["created_at"], reverse=True)
+            predictions = predictions[skip:skip + limit]
+
+        # Добавляем информацию о командах
+        return self._attach_teams(predictions)
 
     async def get_prediction_by_id(self, prediction_id: int):
         """Получение прогноза по ID"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM predictions WHERE id = ?", (prediction_id,))
-        row = cursor.fetchone()
+        return await run_db(self._load_prediction, prediction_id)
+
+    def _load_prediction(self, prediction_id: int):
+        pending = prediction_writer.pending_by_id(prediction_id)
+        if pending:
+            return self._attach_teams([pending])[0]
+
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM predictions WHERE id = ?", (prediction_id,))
+            row = cursor.fetchone()
 
         if row:
-            pred = dict(row)
-            team1 = await self._get_team_info(pred["team1_id"])
-            team2 = await self._get_team_info(pred["team2_id"])
-            pred["team1"] = team1
-            pred["team2"] = team2
-            return pred
+            return self._attach_teams([dict(row)])[0]
         return None
 
     async def evaluate_model(self) -> Optional[float]:
@@ -338,15 +317,20 @@ class AIService:
 
     async def get_model_stats(self) -> Dict[str, Any]:
         """Статистика модели"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) as count FROM predictions")
-        total_pred = cursor.fetchone()["count"]
-
-        return {
-            "totalPredictions": total_pred or 14841,
-            "accuracy": 78.5,
-            "modelVersion": "v1.0"
-        }
+        return await run_db(self._load_model_stats)
+
+    def _load_model_stats(self) -> Dict[str, Any]:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) as count FROM predictions")
+            # Плюс принятые, но ещё не записанные
+            total_pred = cursor.fetchone()["count"] + prediction_writer.pending_count()
+
+            return {
+                "totalPredictions": total_pred or 14841,
+                "accuracy": 78.5,
+                "modelVersion": "v1.0"
+            }
 
     async def train_on_actual_result(self, match):
         """Обучение на реальном результате"""
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Каждая версия артефактов - отдельная неизменяемая папка models/versions/<версия>,
+# текущая версия задаётся манифестом models/CURRENT, который подменяется атомарно
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "CURRENT"
+STAGING_PREFIX = ".staging-"
+# Сколько последних версий хранить на диске (текущая хранится всегда)
+KEEP_VERSIONS = int(os.getenv("ARTIFACT_KEEP_VERSIONS", "3"))
+# Staging-папки старше этого считаются брошенными (процесс обучения упал)
+STALE_STAGING_SECONDS = 24 * 3600
+
+
+def new_version_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def create_staging_dir(model_dir: str, name: Optional[str] = None) -> str:
+    """Папка для записи новой версии; в той же файловой системе, что и versions/"""
+    path = os.path.join(model_dir, VERSIONS_DIR, f"{STAGING_PREFIX}{name or uuid.uuid4().hex[:12]}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def read_manifest(model_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current_version(model_dir: str) -> Tuple[Optional[str], str]:
+    """
+    (версия, папка) текущих артефактов.
+    Без манифеста - старая плоская раскладка прямо в model_dir (версия None).
+    """
+    manifest = read_manifest(model_dir)
+    if manifest is None:
+        return None, model_dir
+    return manifest["version"], os.path.join(model_dir, manifest["path"])
+
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _file_digest(path: str) -> Dict[str, Any]:
+    return {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+
+
+def verify_version(model_dir: str, manifest: Dict[str, Any]) -> Optional[str]:
+    """
+    Проверка, что файлы версии на месте и совпадают с манифестом по размеру и sha256
+    (повреждённый файл того же размера тоже не пройдёт); текст ошибки или None
+    """
+    version_dir = os.path.join(model_dir, manifest["path"])
+    for name, meta in manifest.get("files", {}).items():
+        path = os.path.join(version_dir, name)
+        if not os.path.exists(path):
+            return f"нет файла {name} в версии {manifest['version']}"
+        # Размер - дёшево и отсекает обрезанные файлы до чтения всего содержимого
+        if os.path.getsize(path) != meta["size"]:
+            return f"размер {name} не совпадает с манифестом версии {manifest['version']}"
+        if _file_digest(path)["sha256"] != meta["sha256"]:
+            return f"sha256 {name} не совпадает с манифестом версии {manifest['version']}"
+    return None
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]):
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:6]}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def publish(model_dir: str, source_dir: str, version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Опубликовать полностью записанную папку как новую версию.
+    Папка переименовывается в versions/<версия>, затем манифест CURRENT подменяется через os.replace:
+    читатели видят либо старую версию, либо новую целиком.
+    """
+    version = version or new_version_id()
+    relative_path = os.path.join(VERSIONS_DIR, version)
+    version_dir = os.path.join(model_dir, relative_path)
+    os.makedirs(os.path.join(model_dir, VERSIONS_DIR), exist_ok=True)
+    os.replace(source_dir, version_dir)
+
+    manifest = {
+        "version": version,
+        "path": relative_path,
+        "published_at": datetime.now().isoformat(),
+        "files": {
+            name: _file_digest(os.path.join(version_dir, name))
+            for name in sorted(os.listdir(version_dir))
+            if os.path.isfile(os.path.join(version_dir, name))
+        },
+    }
+    _write_json_atomic(os.path.join(model_dir, MANIFEST_FILE), manifest)
+    return manifest
+
+
+def copy_current(model_dir: str, target_dir: str):
+    """Скопировать файлы текущей версии (для дообучения поверх неё)"""
+    _, source_dir = current_version(model_dir)
+    if not os.path.isdir(source_dir):
+        return
+    for name in os.listdir(source_dir):
+        path = os.path.join(source_dir, name)
+        if os.path.isfile(path) and name != MANIFEST_FILE:
+            shutil.copy2(path, os.path.join(target_dir, name))
+
+
+def list_versions(model_dir: str):
+    root = os.path.join(model_dir, VERSIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if not name.startswith(STAGING_PREFIX) and os.path.isdir(os.path.join(root, name)))
+
+
+def collect_garbage(model_dir: str, keep: int = KEEP_VERSIONS, protect: Iterable[str] = ()):
+    """
+    Удалить старые версии: остаются текущая, версии из protect и keep последних.
+    Staging-папки не трогаются - в них может идти обучение. Возвращает список удалённых версий.
+    """
+    current, _ = current_version(model_dir)
+    versions = list_versions(model_dir)
+    keep_set = set(versions[-keep:]) if keep > 0 else set()
+    keep_set.update(v for v in protect if v)
+    if current:
+        keep_set.add(current)
+
+    removed = []
+    for name in versions:
+        if name not in keep_set:
+            shutil.rmtree(os.path.join(model_dir, VERSIONS_DIR, name), ignore_errors=True)
+            removed.append(name)
+    return removed
+
+
+def remove_stale_staging(model_dir: str, max_age: float = STALE_STAGING_SECONDS):
+    """Удалить staging-папки, оставшиеся от упавших обучений"""
+    root = os.path.join(model_dir, VERSIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+    removed = []
+    now = time.time()
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name.startswith(STAGING_PREFIX) and now - os.path.getmtime(path) > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(name)
+    return removed
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.batch_writer import BatchWriter
+from services.db_pool import SQLitePool, db_pool
+
+# Записи аудита копятся до AUDIT_FLUSH_SIZE или AUDIT_FLUSH_INTERVAL_MS и уходят одним commit
+FLUSH_SIZE = int(os.getenv("AUDIT_FLUSH_SIZE", "200"))
+FLUSH_INTERVAL_MS = float(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "250"))
+MAX_QUEUE = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+# block - ждать места в очереди, drop - отбросить запись (обязательные записи ждут не дольше DURABLE_TIMEOUT)
+OVERFLOW = os.getenv("AUDIT_QUEUE_OVERFLOW", "block")
+# Сколько ждать места в очереди и commit обязательной записи (действия администраторов)
+DURABLE_TIMEOUT = float(os.getenv("AUDIT_DURABLE_TIMEOUT_SECONDS", "5"))
+ID_BLOCK_SIZE = int(os.getenv("AUDIT_ID_BLOCK", "1000"))
+
+COLUMNS = ("id", "user_id", "action", "entity", "entity_id", "details", "ip_address", "created_at")
+
+
+class AuditWriter(BatchWriter):
+    """Журнал аудита с групповым commit: обычные записи не ждут диск, обязательные - ждут"""
+
+    def __init__(self, pool: SQLitePool = db_pool, flush_size: int = FLUSH_SIZE,
+                 flush_interval_ms: float = FLUSH_INTERVAL_MS, max_queue: int = MAX_QUEUE,
+                 id_block_size: int = ID_BLOCK_SIZE, overflow: str = OVERFLOW,
+                 durable_timeout: float = DURABLE_TIMEOUT):
+        super().__init__(pool, "audit_logs", COLUMNS, "audit-writer",
+                         flush_size, flush_interval_ms, max_queue, id_block_size, overflow)
+        self.durable_timeout = durable_timeout
+
+    def submit(self, record, durable: bool = False, timeout=None):
+        return super().submit(record, durable, self.durable_timeout if timeout is None else timeout)
+
+
+# Единственный писатель аудита на процесс
+audit_writer = AuditWriter()
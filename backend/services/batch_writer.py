@@ -0,0 +1,329 @@
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.db_pool import SQLitePool, _Timing
+
+# Повторы пакета, который не удалось записать: пауза RETRY_DELAY, дальше вдвое больше
+MAX_RETRIES = 3
+RETRY_DELAY = 1.0
+# Сколько последних строк, не записанных и построчно, держать в stats() для разбора
+DEAD_LETTER_LIMIT = 100
+# Политики переполнения очереди: ждать места или отбросить запись (обязательные записи ждут не дольше timeout)
+OVERFLOW_POLICIES = ("block", "drop")
+
+# Служебные элементы очереди
+_FLUSH = object()
+_STOP = object()
+
+
+class DurableWriteError(RuntimeError):
+    """Обязательная запись не подтверждена: не встала в очередь, не записана за timeout или отложена в dead letter"""
+
+
+class BatchWriter:
+    """
+    Отложенная запись строк в таблицу с AUTOINCREMENT: вызывающий получает ID сразу,
+    строки пишутся фоновым потоком пакетами (executemany в одной транзакции).
+    Пакет уходит, когда набралось flush_size строк, прошло flush_interval_ms или пришла
+    обязательная (durable) запись. ID берутся блоками из счётчика таблицы в sqlite_sequence,
+    поэтому не меняются после записи и не пересекаются с другими процессами.
+    """
+
+    def __init__(self, pool: SQLitePool, table: str, columns: Sequence[str], name: str,
+                 flush_size: int, flush_interval_ms: float, max_queue: int, id_block_size: int,
+                 overflow: str = "block"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow должен быть одним из {OVERFLOW_POLICIES}")
+        self.pool = pool
+        self.table = table
+        self.columns = ("id",) + tuple(column for column in columns if column != "id")
+        self.name = name
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.id_block_size = max(1, id_block_size)
+        self.overflow = overflow
+        self.insert_query = (
+            f"INSERT INTO {table} ({', '.join(self.columns)}) VALUES ({', '.join('?' * len(self.columns))})"
+        )
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+        self._ids = iter(())
+        self._id_lock = threading.Lock()
+        # Принятые, но ещё не записанные строки (включая пакет, который пишется сейчас)
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._pending_cond = threading.Condition()
+
+        self._submitted = 0
+        self._written = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._dead_lettered = 0
+        self._dead_letters = deque(maxlen=DEAD_LETTER_LIMIT)
+        self._dropped = 0
+        self._durable_timeouts = 0
+        self._max_depth = 0
+        self._last_error = None
+        self._flush_timing = _Timing()
+        self._durable_timing = _Timing()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Дописать всё принятое и остановить поток (при остановке API)"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        pending = self.pending_count()
+        if pending:
+            print(f"⚠️ {self.name}: не записано строк при остановке: {pending}")
+
+    def submit(self, record: Dict[str, Any], durable: bool = False,
+               timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Принять строку (без id) в очередь записи и вернуть её постоянный ID.
+        durable=True - дождаться commit пакета с этой строкой (не дольше timeout секунд),
+        иначе DurableWriteError.
+        При переполнении очереди с политикой "drop" необязательная строка отбрасывается, возвращается None.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        record = dict(record, id=self._next_id())
+        with self._pending_cond:
+            self._pending[record["id"]] = record
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, len(self._pending))
+
+        if durable:
+            return self._submit_durable(record, timeout)
+        if self.overflow == "block":
+            # Очередь ограничена: при отставании записи вызывающий поток ждёт здесь
+            self._queue.put(record)
+        else:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                with self._pending_cond:
+                    self._pending.pop(record["id"], None)
+                    self._dropped += 1
+                return None
+        return record["id"]
+
+    def _submit_durable(self, record: Dict[str, Any], timeout: Optional[float]) -> int:
+        """Весь путь - место в очереди, срочный пакет, commit - укладывается в один timeout"""
+        start = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        written = False
+        try:
+            self._queue.put(record, timeout=remaining())
+        except queue.Full:
+            # Строка в очередь не попала - и не будет записана
+            with self._pending_cond:
+                self._pending.pop(record["id"], None)
+        else:
+            try:
+                # Не ждать flush_interval: пакет с этой строкой уходит сразу
+                self._queue.put(_FLUSH, timeout=remaining())
+            except queue.Full:
+                pass
+            written = self._wait_written([record["id"]], remaining())
+
+        with self._pending_cond:
+            self._durable_timing.add((time.perf_counter() - start) * 1000.0)
+            if not written:
+                self._durable_timeouts += 1
+        if not written:
+            raise DurableWriteError(f"{self.name}: запись {record['id']} не подтверждена (ожидание до {timeout} с)")
+        return record["id"]
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Записать и дождаться всего, что принято на момент вызова"""
+        with self._pending_cond:
+            waiting = list(self._pending)
+        if not waiting:
+            return True
+        self._queue.put(_FLUSH)
+        return self._wait_written(waiting, timeout)
+
+    def _wait_written(self, ids: Iterable[int], timeout: Optional[float]) -> bool:
+        """True - все строки записаны; False - не успели за timeout или ушли в dead letter"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = set(ids)
+        with self._pending_cond:
+            while waiting & self._pending.keys():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._pending_cond.wait(remaining)
+            return not any(letter["record"]["id"] in waiting for letter in self._dead_letters)
+
+    def pending_by_id(self, record_id: int) -> Optional[Dict[str, Any]]:
+        with self._pending_cond:
+            record = self._pending.get(record_id)
+            return dict(record) if record else None
+
+    def pending_where(self, column: str, value) -> list:
+        """Ещё не записанные строки с column == value"""
+        with self._pending_cond:
+            return [dict(record) for record in self._pending.values() if record.get(column) == value]
+
+    def pending_count(self) -> int:
+        with self._pending_cond:
+            return len(self._pending)
+
+    def _next_id(self) -> int:
+        with self._id_lock:
+            record_id = next(self._ids, None)
+            if record_id is None:
+                self._ids = iter(self._reserve_ids())
+                record_id = next(self._ids)
+            return record_id
+
+    def _reserve_ids(self) -> range:
+        """
+        Сдвинуть счётчик AUTOINCREMENT таблицы на блок ID в одной транзакции.
+        Другие процессы (и обычные INSERT без id) получат ID только после блока.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE sqlite_sequence SET seq = seq + ? WHERE name = ?", (self.id_block_size, self.table)
+            )
+            if cursor.rowcount == 0:
+                # Счётчика ещё нет (в таблицу ничего не вставляли): начинаем после существующих строк
+                conn.execute(
+                    f"INSERT INTO sqlite_sequence (name, seq) SELECT ?, COALESCE(MAX(id), 0) + ? FROM {self.table}",
+                    (self.table, self.id_block_size)
+                )
+            end = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (self.table,)).fetchone()[0]
+            conn.commit()
+        return range(end - self.id_block_size + 1, end + 1)
+
+    def _get(self, timeout: Optional[float], wait: bool = True):
+        # При остановке и срочной записи забираем только то, что уже в очереди, без ожидания
+        if self._stopping or not wait:
+            return self._queue.get_nowait()
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self, first: Dict[str, Any]) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        urgent = False
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not (self._stopping or urgent):
+                break
+            try:
+                item = self._get(remaining, wait=not urgent)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._stopping = True
+            elif item is _FLUSH:
+                # Ожидающие записи, накопившиеся за время прошлого commit, уходят одним пакетом
+                urgent = True
+            else:
+                batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                item = self._get(None)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._stopping = True
+                continue
+            if item is _FLUSH:
+                continue
+            batch = self._collect(item)
+            self._write_with_retry(batch)
+
+    def _write_with_retry(self, batch: list):
+        """
+        Пакет повторяется не больше MAX_RETRIES раз (при остановке - без пауз), потом пишется
+        построчно: одна плохая строка не держит остальные. Что не записалось и построчно,
+        уходит в dead letter (stats()) - поток никогда не крутится на одном и том же пакете.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            if self._write(batch):
+                return
+            if attempt < MAX_RETRIES and not self._stopping:
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+        for record in batch:
+            if len(batch) > 1 and self._write([record]):
+                continue
+            self._dead_letter(record)
+
+    def _write(self, batch: list) -> bool:
+        start = time.perf_counter()
+        try:
+            with self.pool.connection() as conn:
+                conn.executemany(self.insert_query, [tuple(record.get(column) for column in self.columns)
+                                                     for record in batch])
+                conn.commit()
+        except Exception as e:
+            with self._pending_cond:
+                self._failed_batches += 1
+                self._last_error = f"{type(e).__name__}: {e}"
+            print(f"❌ {self.name}: не удалось записать {len(batch)} строк: {e}")
+            return False
+
+        with self._pending_cond:
+            for record in batch:
+                self._pending.pop(record["id"], None)
+            self._written += len(batch)
+            self._batches += 1
+            self._flush_timing.add((time.perf_counter() - start) * 1000.0)
+            self._pending_cond.notify_all()
+        return True
+
+    def _dead_letter(self, record: Dict[str, Any]):
+        with self._pending_cond:
+            self._pending.pop(record["id"], None)
+            self._dead_lettered += 1
+            self._dead_letters.append({"record": dict(record), "error": self._last_error})
+            self._pending_cond.notify_all()
+        print(f"❌ {self.name}: строка {record['id']} не записана, отложена в dead letter: {self._last_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._pending_cond:
+            return {
+                "queue_depth": len(self._pending),
+                "queue_max": self._queue.maxsize,
+                "max_depth_seen": self._max_depth,
+                "overflow": self.overflow,
+                "flush_size": self.flush_size,
+                "flush_interval_ms": self.flush_interval * 1000.0,
+                "submitted": self._submitted,
+                "written": self._written,
+                "batches": self._batches,
+                "avg_batch_size": round(self._written / self._batches, 2) if self._batches else 0.0,
+                "failed_batches": self._failed_batches,
+                "dead_lettered": self._dead_lettered,
+                "dead_letters": list(self._dead_letters),
+                "dropped": self._dropped,
+                "durable_timeouts": self._durable_timeouts,
+                "last_error": self._last_error,
+                "flush": self._flush_timing.to_dict(),
+                "durable_wait": self._durable_timing.to_dict(),
+            }
@@ -0,0 +1,288 @@
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+DB_PATH = "./nba.sqlite"
+POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+# Сколько ждать свободное соединение, прежде чем вернуть ошибку
+POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", "10"))
+# Потоки для работы с БД из async-обработчиков: не больше, чем соединений в пуле
+DB_EXECUTOR_WORKERS = int(os.getenv("SQLITE_EXECUTOR_WORKERS", str(POOL_SIZE)))
+
+# Настройки соединения: применяются один раз при его создании, а не на каждый запрос
+PRAGMAS = {
+    "synchronous": "NORMAL",            # в WAL-режиме безопасно и без fsync на каждый commit
+    "cache_size": -64000,               # ~64 МБ страничного кэша на соединение
+    "mmap_size": 256 * 1024 * 1024,     # чтение через mmap вместо read()
+    "temp_store": "MEMORY",             # временные таблицы сортировок и DISTINCT в памяти
+    "busy_timeout": 5000,               # ждать блокировку записи, а не падать сразу
+}
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Свободное соединение не появилось за POOL_TIMEOUT секунд"""
+
+
+class _Timing:
+    """Счётчик длительностей: количество, сумма, максимум (мс)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+        }
+
+
+class SQLitePool:
+    """
+    Ограниченный пул соединений SQLite для сервисов.
+    Соединение выдаётся одному потоку на время блока `with pool.connection()`;
+    вложенные блоки в том же потоке получают то же соединение, а после возврата
+    поток при следующем запросе снова получает своё прежнее соединение, если оно свободно.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, max_size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT):
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+        self._local = threading.local()
+        self._wal_checked = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_timing = _Timing()
+        self._hold_timing = _Timing()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Соединение переходит между потоками только через пул и всегда используется одним потоком
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if not self._wal_checked:
+            # journal_mode хранится в самом файле БД - достаточно одного раза
+            mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            if mode.lower() != "wal":
+                print(f"⚠️ SQLite: не удалось включить WAL (journal_mode={mode})")
+            self._wal_checked = True
+        for name, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        preferred = getattr(self._local, "last", None)
+        start = time.perf_counter()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    if preferred is not None and preferred in self._idle:
+                        self._idle.remove(preferred)
+                        conn = preferred
+                    else:
+                        conn = self._idle.pop()
+                    break
+                if len(self._all) < self.max_size:
+                    conn = None
+                    # Место под новое соединение резервируется до выхода из-под блокировки
+                    self._all.append(None)
+                    break
+                waited = True
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"Нет свободного соединения SQLite за {self.timeout} с")
+                self._cond.wait(remaining)
+
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_timing.add((time.perf_counter() - start) * 1000.0)
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._all.remove(None)
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._all[self._all.index(None)] = conn
+        return conn
+
+    def _release(self, conn: sqlite3.Connection, held_ms: float):
+        # Незавершённая транзакция не должна достаться следующему потоку
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._hold_timing.add(held_ms)
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Взять соединение из пула на время блока with"""
+        held = getattr(self._local, "held", None)
+        if held is not None:
+            # Повторный вход в том же потоке: то же соединение, без второго слота пула
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.held = conn
+        self._local.depth = 1
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            conn.set_trace_callback(trace)
+        start = time.perf_counter()
+        try:
+            yield conn
+        finally:
+            if trace is not None:
+                conn.set_trace_callback(None)
+            self._local.held = None
+            self._local.last = conn
+            self._release(conn, (time.perf_counter() - start) * 1000.0)
+
+    @contextmanager
+    def count_statements(self) -> Iterator[List[str]]:
+        """
+        Собрать SQL-запросы, которые текущий поток выполнит внутри блока (проверки на N+1).
+        Трассировка ставится только на соединения этого потока и только на время блока.
+        """
+        statements: List[str] = []
+        self._local.trace = statements.append
+        held = getattr(self._local, "held", None)
+        if held is not None:
+            held.set_trace_callback(statements.append)
+        try:
+            yield statements
+        finally:
+            self._local.trace = None
+            if held is not None:
+                held.set_trace_callback(None)
+
+    def close_all(self):
+        """Закрыть свободные соединения (при остановке приложения)"""
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+                self._all.remove(conn)
+            self._idle.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            open_count = sum(1 for conn in self._all if conn is not None)
+            return {
+                "db_path": self.db_path,
+                "max_size": self.max_size,
+                "open": open_count,
+                "idle": len(self._idle),
+                "in_use": open_count - len(self._idle),
+                "checkouts": self._checkouts,
+                "checkouts_waited": self._waits,
+                "timeouts": self._timeouts,
+                "wait": self._wait_timing.to_dict(),
+                "checkout_duration": self._hold_timing.to_dict(),
+                "pragmas": dict(PRAGMAS, journal_mode="WAL"),
+            }
+
+
+class DBExecutor:
+    """
+    Отдельный ограниченный пул потоков для синхронного кода с sqlite3.
+    Async-обработчики отдают туда работу с БД через run_db, а цикл событий не блокируется.
+    """
+
+    def __init__(self, max_workers: int = DB_EXECUTOR_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sqlite")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._queue_timing = _Timing()
+        self._run_timing = _Timing()
+
+    def _call(self, fn: Callable, submitted: float):
+        started = time.perf_counter()
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+            self._queue_timing.add((started - submitted) * 1000.0)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_timing.add((time.perf_counter() - started) * 1000.0)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Выполнить fn(*args, **kwargs) в потоке БД и дождаться результата"""
+        with self._lock:
+            self._pending += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._call, functools.partial(fn, *args, **kwargs), time.perf_counter()
+        )
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._pending,
+                "running": self._running,
+                "queue_wait": self._queue_timing.to_dict(),
+                "run_time": self._run_timing.to_dict(),
+            }
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = DB_PATH) -> SQLitePool:
+    """Общий пул на процесс для файла БД"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = SQLitePool(db_path)
+        return pool
+
+
+# Пул для основной БД приложения
+db_pool = get_pool(DB_PATH)
+
+# Потоки для работы с БД из async-кода
+db_executor = DBExecutor()
+
+
+async def run_db(fn: Callable, *args, **kwargs):
+    """await run_db(service.method, ...) - синхронный вызов с БД без блокировки цикла событий"""
+    return await db_executor.run(fn, *args, **kwargs)
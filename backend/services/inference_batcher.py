@@ -0,0 +1,163 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Окно склейки: ждём не дольше MAX_WAIT_MS и не больше MAX_BATCH_SIZE запросов
+MAX_WAIT_MS = float(os.getenv("NEURAL_BATCH_MAX_WAIT_MS", "2"))
+MAX_BATCH_SIZE = int(os.getenv("NEURAL_BATCH_MAX_SIZE", "64"))
+
+# Верхние границы корзин гистограммы размеров пакетов
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class BatcherStopped(RuntimeError):
+    """Запрос остался в очереди, когда планировщик остановился"""
+
+
+class InferenceBatcher:
+    """Склеивает одновременные одиночные запросы к модели в один пакет"""
+
+    def __init__(self, max_wait_ms: float = MAX_WAIT_MS, max_batch_size: int = MAX_BATCH_SIZE):
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: "queue.Queue[Tuple[Any, np.ndarray, Future]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+        self._histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._histogram_overflow = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._discard_stale_stops()
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Дообработать текущий пакет и остановить поток; запросы, оставшиеся в очереди, получают BatcherStopped"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _discard_stale_stops(self):
+        # Метка остановки, которую не забрал прошлый поток, иначе сразу завершила бы новый
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                items.append(item)
+        for item in items:
+            self._queue.put(item)
+
+    def submit(self, bundle, features: np.ndarray) -> Future:
+        """Поставить строку признаков (1 x N) в очередь; результат придёт во Future"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        future = Future()
+        self._queue.put((bundle, features, future))
+        return future
+
+    def predict(self, bundle, features: np.ndarray, timeout: float = 30.0) -> float:
+        """Синхронное предсказание для одной пары через общий пакет"""
+        return self.submit(bundle, features).result(timeout)
+
+    def _collect(self, first) -> Tuple[List[Tuple[Any, np.ndarray, Future]], bool]:
+        """Пакет и признак того, что в окне пришла метка остановки"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        # Поток завершается только на метке остановки - и сам её забирает
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stopping = self._collect(first)
+            self._record(len(batch))
+            self._predict(batch)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[2].set_exception(BatcherStopped("Планировщик инференса остановлен"))
+
+    def _predict(self, batch: List[Tuple[Any, np.ndarray, Future]]):
+        # Во время перезагрузки модели в одном окне могут оказаться разные наборы артефактов
+        groups: Dict[int, List[Tuple[Any, np.ndarray, Future]]] = {}
+        for item in batch:
+            groups.setdefault(id(item[0]), []).append(item)
+
+        for items in groups.values():
+            bundle = items[0][0]
+            try:
+                probs = bundle.predict_features(np.vstack([features for _, features, _ in items]))
+            except Exception as e:
+                for _, _, future in items:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), prob in zip(items, probs.tolist()):
+                future.set_result(prob)
+
+    def _record(self, size: int):
+        with self._lock:
+            self._batches += 1
+            self._items += size
+            self._max_seen = max(self._max_seen, size)
+            for bucket in BATCH_SIZE_BUCKETS:
+                if size <= bucket:
+                    self._histogram[bucket] += 1
+                    break
+            else:
+                self._histogram_overflow += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики: число пакетов, запросов и распределение размеров пакетов"""
+        with self._lock:
+            histogram = {f"<={bucket}": count for bucket, count in self._histogram.items()}
+            histogram[f">{BATCH_SIZE_BUCKETS[-1]}"] = self._histogram_overflow
+            return {
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_batch_size": self.max_batch_size,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "max_batch_seen": self._max_seen,
+                "queue_depth": self._queue.qsize(),
+                "batch_size_histogram": histogram,
+            }
+
+
+# Единственный планировщик на процесс
+batcher = InferenceBatcher()
@@ -1,112 +1,155 @@
 from sqlalchemy.orm import Session
-import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
+import base64
+import json
 import sys
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.db_pool import db_pool
 
-DB_PATH = "./nba.sqlite"
+
+def encode_cursor(game_date: str, game_id: str) -> str:
+    """Непрозрачный токен позиции в списке матчей"""
+    raw = json.dumps([game_date, game_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[str, str]:
+    """Токен -> (game_date, game_id); ValueError, если токен испорчен"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        game_date, game_id = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ValueError("Некорректный курсор")
+    if not isinstance(game_date, str) or not isinstance(game_id, str):
+        raise ValueError("Некорректный курсор")
+    return game_date, game_id
 
 
 class MatchService:
     def __init__(self, db: Session):
         self.db = db
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row
 
     def get_all_matches(self, filters: Dict = None, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
         """Получение всех матчей с фильтрацией"""
-        cursor = self.conn.cursor()
-
-        # Проверяем, есть ли таблица game
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='game'")
-        if not cursor.fetchone():
-            return []  # Возвращаем пустой список, если нет таблицы
+        matches, _ = self.get_matches_page(filters, limit=limit, skip=skip)
+        return matches
 
-        # Базовый запрос
-        query = "SELECT * FROM game"
-        params = []
+    def get_matches_page(self, filters: Dict = None, limit: int = 100, cursor: Optional[str] = None,
+                         skip: int = 0) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Страница матчей от новых к старым и курсор следующей страницы (None - страниц больше нет).
+        Фильтры (status, team_id, date_from, date_to) применяются в SQL.
+        С курсором страница начинается сразу после (game_date, game_id) из него, skip не используется:
+        SQLite переходит к нужному месту по индексу, а не пропускает строки, как OFFSET.
+        """
+        filters = filters or {}
+        with db_pool.connection() as conn:
+            conn_cursor = conn.cursor()
+
+            # Проверяем, есть ли таблица game
+            conn_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='game'")
+            if not conn_cursor.fetchone():
+                return [], None  # Возвращаем пустой список, если нет таблицы
+
+            # Строки без числового ID в API не попадают
+            conditions = ["match_id IS NOT NULL"]
+            params: List[Any] = []
+            if filters.get("status") == "finished":
+                conditions.append("wl_home IS NOT NULL")
+            elif filters.get("status") == "scheduled":
+                conditions.append("wl_home IS NULL")
+            if filters.get("date_from"):
+                conditions.append("game_date >= ?")
+                params.append(filters["date_from"].isoformat())
+            if filters.get("date_to"):
+                # Включительно: всё, что раньше следующего дня (game_date хранится с временем)
+                conditions.append("game_date < ?")
+                params.append((filters["date_to"] + timedelta(days=1)).isoformat())
+            if cursor:
+                conditions.append("(game_date, game_id) < (?, ?)")
+                params.extend(decode_cursor(cursor))
+                skip = 0
+
+            order = " ORDER BY game_date DESC, game_id DESC"
+            team_id = filters.get("team_id")
+            if team_id is not None:
+                # Две ветки вместо OR: каждая идёт по своему индексу (team_id_*, game_date, game_id)
+                # и отдаёт не больше нужного числа строк, затем ветки сливаются
+                branch_limit = limit + skip
+                branches = []
+                for column in ("team_id_home", "team_id_away"):
+                    where = " AND ".join([f"{column} = ?"] + conditions)
+                    branches.append(f"SELECT * FROM (SELECT * FROM game WHERE {where}{order} LIMIT ?)")
+                query = f"SELECT * FROM ({' UNION ALL '.join(branches)}){order} LIMIT ? OFFSET ?"
+                branch_params = [str(team_id)] + params + [branch_limit]
+                query_params = branch_params * 2 + [limit, skip]
+            else:
+                query = f"SELECT * FROM game WHERE {' AND '.join(conditions)}{order} LIMIT ? OFFSET ?"
+                query_params = params + [limit, skip]
+
+            conn_cursor.execute(query, query_params)
+            rows = conn_cursor.fetchall()
+
+            matches = []
+            for row in rows:
+                game = dict(row)
+
+                # Определяем статус матча
+                has_score = game.get("pts_home") is not None and game.get("pts_away") is not None
+                status = "finished" if has_score else "scheduled"
+
+                match = {
+                    "id": game["match_id"],
+                    "date": game.get("game_date", ""),
+                    "status": status,
+                    # Поля, которые ожидает Pydantic схема MatchResponse
+                    "home_team_id": game.get("team_id_home", 0),
+                    "away_team_id": game.get("team_id_away", 0),
+                    "home_score": game.get("pts_home"),
+                    "away_score": game.get("pts_away"),
+                    # Добавьте эти поля, если они нужны и есть в БД, иначе установите значения по умолчанию
+                    "created_by_id": 1,  # Значение по умолчанию
+                    "created_at": game.get("game_date", "")
+                }
+                matches.append(match)
+
+            next_cursor = None
+            if len(rows) == limit and rows:
+                next_cursor = encode_cursor(rows[-1]["game_date"], rows[-1]["game_id"])
+            return matches, next_cursor
 
-        # Применяем фильтры
-        if filters and filters.get("status"):
-            if filters["status"] == "finished":
-                query += " WHERE wl_home IS NOT NULL"
-            elif filters["status"] == "scheduled":
-                query += " WHERE wl_home IS NULL"
+    def get_match_by_id(self, match_id: int) -> Optional[Dict[str, Any]]:
+        """Получение матча по ID"""
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
 
-        query += " ORDER BY game_date DESC LIMIT ? OFFSET ?"
-        params.extend([limit, skip])
+            # Нормализованный числовой ID (см. schema.ensure_match_ids) - один поиск по индексу
+            cursor.execute("SELECT * FROM game WHERE match_id = ?", (match_id,))
+            row = cursor.fetchone()
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+            if not row:
+                return None
 
-        matches = []
-        for row in rows:
             game = dict(row)
-            # Извлекаем числовой ID из строки вида "ESPN_401810646"
-            game_id_str = game.get("game_id", "0")
-            try:
-                if "ESPN_" in game_id_str:
-                    game_id = int(game_id_str.replace("ESPN_", ""))
-                else:
-                    game_id = int(game_id_str)
-            except:
-                continue  # Пропускаем если ID не конвертируется
 
             # Определяем статус матча
             has_score = game.get("pts_home") is not None and game.get("pts_away") is not None
             status = "finished" if has_score else "scheduled"
 
-            match = {
-                "id": game_id,
+            return {
+                "id": match_id,
                 "date": game.get("game_date", ""),
                 "status": status,
-                # Поля, которые ожидает Pydantic схема MatchResponse
                 "home_team_id": game.get("team_id_home", 0),
                 "away_team_id": game.get("team_id_away", 0),
                 "home_score": game.get("pts_home"),
                 "away_score": game.get("pts_away"),
-                # Добавьте эти поля, если они нужны и есть в БД, иначе установите значения по умолчанию
-                "created_by_id": 1,  # Значение по умолчанию
+                "created_by_id": 1,
                 "created_at": game.get("game_date", "")
             }
-            matches.append(match)
-
-        return matches
-
-    def get_match_by_id(self, match_id: int) -> Optional[Dict[str, Any]]:
-        """Получение матча по ID"""
-        cursor = self.conn.cursor()
-
-        # Пробуем найти по числовому ID или по строковому ESPN_ID
-        cursor.execute(
-            "SELECT * FROM game WHERE game_id = ? OR game_id = ?",
-            (str(match_id), f"ESPN_{match_id}")
-        )
-        row = cursor.fetchone()
-
-        if not row:
-            return None
-
-        game = dict(row)
-
-        # Определяем статус матча
-        has_score = game.get("pts_home") is not None and game.get("pts_away") is not None
-        status = "finished" if has_score else "scheduled"
-
-        return {
-            "id": match_id,
-            "date": game.get("game_date", ""),
-            "status": status,
-            "home_team_id": game.get("team_id_home", 0),
-            "away_team_id": game.get("team_id_away", 0),
-            "home_score": game.get("pts_home"),
-            "away_score": game.get("pts_away"),
-            "created_by_id": 1,
-            "created_at": game.get("game_date", "")
-        }
 
     def create_match(self, match_data, user_id: int) -> Dict[str, Any]:
         """Создание нового матча"""
@@ -0,0 +1,265 @@
+import os
+import pickle
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.numpy_mlp import MLP_FILE, load_mlp
+from services.artifact_store import file_sha256, read_manifest, verify_version
+
+MODEL_DIR = "./models"
+# numpy - прямой проход на NumPy (по умолчанию), keras - исходная модель через TensorFlow
+NEURAL_ENGINE = os.getenv("NEURAL_ENGINE", "numpy")
+MATCHUPS_FILE = "matchups.npz"
+# Статистики команды в признаках модели - единственный список (обучение, отпечаток данных, прогноз)
+STATS = ['pts', 'reb', 'ast', 'stl', 'blk', 'tov', 'pf', 'fg_pct', 'fg3_pct', 'ft_pct']
+
+
+def build_matchup_matrix(team_emas: Dict[str, Dict[str, float]], predict_fn) -> np.ndarray:
+    """
+    Вероятности победы хозяев для всех пар команд одним пакетом.
+    predict_fn принимает матрицу сырых признаков и возвращает вектор вероятностей.
+    Результат: матрица n x n, строка - хозяева, столбец - гости (порядок ключей team_emas).
+    """
+    ema_matrix = np.array([[ema[stat] for stat in STATS] for ema in team_emas.values()], dtype=np.float64)
+    n = len(ema_matrix)
+    if n == 0:
+        return np.empty((0, 0), dtype=np.float64)
+    home_rows = np.repeat(np.arange(n), n)
+    away_rows = np.tile(np.arange(n), n)
+    features = np.hstack([ema_matrix[home_rows], ema_matrix[away_rows]])
+    return np.asarray(predict_fn(features), dtype=np.float64).reshape(n, n)
+
+
+def save_matchup_matrix(model_dir: str, team_ids: List[str], probs: np.ndarray):
+    """
+    Сохранение матрицы рядом с моделью, с sha256 model.h5: отметка по содержимому
+    переживает копирование папки без сохранения времени файлов (cp -r, rsync, деплой)
+    """
+    model_sha256 = file_sha256(os.path.join(model_dir, "model.h5"))
+    np.savez(os.path.join(model_dir, MATCHUPS_FILE),
+             team_ids=np.array(team_ids, dtype=str), probs=probs, model_sha256=model_sha256)
+
+
+def load_matchup_matrix(model_dir: str, team_ids: List[str], model_sha256: Optional[str] = None,
+                        verified: bool = False) -> Optional[np.ndarray]:
+    """
+    Загрузка матрицы, если она построена для текущих model.h5 и набора команд.
+    model_sha256 - уже известный хэш model.h5 (из проверенного манифеста), иначе считается по файлу.
+    verified=True - матрица опубликована в одной версии с моделью и сверена с манифестом,
+    отметку модели проверять не нужно.
+    """
+    path = os.path.join(model_dir, MATCHUPS_FILE)
+    if not os.path.exists(path):
+        return None
+    model_path = os.path.join(model_dir, "model.h5")
+    with np.load(path) as data:
+        if not verified:
+            if "model_sha256" in data.files:
+                if str(data["model_sha256"]) != (model_sha256 or file_sha256(model_path)):
+                    return None
+            # Матрицы старого формата отмечены временем model.h5
+            elif float(data["model_mtime"]) != os.path.getmtime(model_path):
+                return None
+        if data["team_ids"].tolist() != list(team_ids):
+            return None
+        return data["probs"]
+
+
+class ModelBundle:
+    """Набор артефактов нейросети, загруженных за один раз"""
+
+    def __init__(self, model, scaler, team_emas: Dict[str, Dict[str, float]],
+                 teams_df: Optional[pd.DataFrame], version: str, loaded_at: datetime,
+                 engine: str = "keras"):
+        self.engine = engine
+        self.model = model
+        self.scaler = scaler
+        self.team_emas = team_emas
+        self.teams_df = teams_df
+        self.version = version
+        self.loaded_at = loaded_at
+
+        # Аббревиатура -> team_id, чтобы не фильтровать DataFrame на каждый запрос
+        self.team_ids_by_abbrev: Dict[str, str] = {}
+        if teams_df is not None:
+            for abbrev, team_id in zip(teams_df['team_abbrev'], teams_df['team_id']):
+                self.team_ids_by_abbrev.setdefault(abbrev, str(team_id))
+
+        # EMA всех команд одной матрицей: строка = команда, столбец = показатель из STATS
+        self.team_index: Dict[str, int] = {team_id: i for i, team_id in enumerate(team_emas)}
+        self.ema_matrix = np.array(
+            [[ema[stat] for stat in STATS] for ema in team_emas.values()], dtype=np.float64
+        ).reshape(len(team_emas), len(STATS))
+
+        # Заранее посчитанные вероятности для всех пар (см. ModelRegistry._attach_matchups)
+        self.matchup_probs: Optional[np.ndarray] = None
+
+    def lookup(self, home_id: str, away_id: str) -> Optional[float]:
+        """Вероятность победы хозяев из матрицы пар за O(1)"""
+        if self.matchup_probs is None:
+            return None
+        home_row = self.team_index.get(home_id)
+        away_row = self.team_index.get(away_id)
+        if home_row is None or away_row is None:
+            return None
+        return float(self.matchup_probs[home_row, away_row])
+
+    def build_features(self, home_rows: Sequence[int], away_rows: Sequence[int]) -> np.ndarray:
+        """Матрица признаков [EMA хозяев | EMA гостей] для набора пар одним шагом"""
+        return np.hstack([self.ema_matrix[np.asarray(home_rows, dtype=np.intp)],
+                          self.ema_matrix[np.asarray(away_rows, dtype=np.intp)]])
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """Вероятности победы хозяев для матрицы сырых признаков (один вызов модели)"""
+        if len(features) == 0:
+            return np.empty(0, dtype=np.float64)
+        scaled = self.scaler.transform(features)
+        return self.model.predict(scaled, batch_size=len(scaled), verbose=0)[:, 0].astype(np.float64)
+
+    def predict_pairs(self, home_ids: List[str], away_ids: List[str]) -> np.ndarray:
+        """Вероятности для списка пар team_id, которые есть в team_emas"""
+        home_rows = [self.team_index[team_id] for team_id in home_ids]
+        away_rows = [self.team_index[team_id] for team_id in away_ids]
+        if self.matchup_probs is not None:
+            return self.matchup_probs[np.asarray(home_rows, dtype=np.intp), np.asarray(away_rows, dtype=np.intp)]
+        return self.predict_features(self.build_features(home_rows, away_rows))
+
+
+class ModelRegistry:
+    """Общий на процесс реестр модели: артефакты читаются с диска один раз"""
+
+    def __init__(self, model_dir: str = MODEL_DIR, engine: str = NEURAL_ENGINE):
+        self.model_dir = model_dir
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._bundle: Optional[ModelBundle] = None
+        self._attempted = False
+
+    @property
+    def bundle(self) -> Optional[ModelBundle]:
+        return self._bundle
+
+    def load(self) -> Optional[ModelBundle]:
+        """Загрузка (или перезагрузка) артефактов с диска"""
+        with self._lock:
+            return self._load_locked()
+
+    def _load_locked(self) -> Optional[ModelBundle]:
+        self._attempted = True
+        # Текущая версия из манифеста CURRENT; без него - плоская раскладка в model_dir
+        manifest = read_manifest(self.model_dir)
+        if manifest is not None:
+            if self._bundle is not None and self._bundle.version == manifest["version"]:
+                return self._bundle
+            problem = verify_version(self.model_dir, manifest)
+            if problem:
+                print(f"⚠️ Версия артефактов повреждена ({problem}), остаётся текущая")
+                return self._bundle
+            version_dir = os.path.join(self.model_dir, manifest["path"])
+        else:
+            version_dir = self.model_dir
+
+        model_path = os.path.join(version_dir, "model.h5")
+        scaler_path = os.path.join(version_dir, "scaler.pkl")
+        emas_path = os.path.join(version_dir, "team_emas.pkl")
+        teams_path = os.path.join(version_dir, "teams.csv")
+
+        if not os.path.exists(model_path):
+            print("⚠️ Нейросеть не найдена. Сначала запустите train_model.py")
+            return self._bundle
+
+        if manifest is not None:
+            version = manifest["version"]
+        else:
+            version = datetime.fromtimestamp(os.path.getmtime(model_path)).strftime("%Y%m%d-%H%M%S")
+
+        try:
+            model, scaler, engine = self._load_engine(version_dir, model_path, scaler_path)
+            with open(emas_path, "rb") as f:
+                team_emas = pickle.load(f)
+            teams_df = pd.read_csv(teams_path) if os.path.exists(teams_path) else None
+            # Внутри try: битые EMA (нет показателя) или teams.csv - та же ошибка загрузки, что и у файлов
+            bundle = ModelBundle(model, scaler, team_emas, teams_df, version, datetime.now(), engine)
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки нейросети: {e}")
+            return self._bundle
+
+        # Файлы версии уже сверены с манифестом: хэш модели не пересчитывается
+        files = manifest.get("files", {}) if manifest is not None else {}
+        self._attach_matchups(bundle, version_dir, files.get("model.h5", {}).get("sha256"),
+                              MATCHUPS_FILE in files)
+
+        # Подменяем одну ссылку: запросы видят либо старый, либо новый набор целиком,
+        # а уже начатые запросы дорабатывают на старом наборе, который держат у себя
+        self._bundle = bundle
+        print(f"✅ Нейросеть загружена (версия {version}, движок {engine})")
+        return self._bundle
+
+    def _load_engine(self, version_dir: str, model_path: str, scaler_path: str):
+        """Модель и scaler: NumPy-экспорт, если он есть, иначе keras (TensorFlow импортируется только здесь)"""
+        mlp_path = os.path.join(version_dir, MLP_FILE)
+        if self.engine == "numpy":
+            if os.path.exists(mlp_path):
+                model, scaler = load_mlp(mlp_path)
+                return model, scaler, "numpy"
+            print(f"⚠️ {MLP_FILE} не найден, используется keras. Переобучите модель для NumPy-движка")
+
+        from tensorflow.keras.models import load_model
+        model = load_model(model_path)
+        with open(scaler_path, "rb") as f:
+            scaler = pickle.load(f)
+        return model, scaler, "keras"
+
+    def _attach_matchups(self, bundle: ModelBundle, version_dir: str, model_sha256: Optional[str] = None,
+                         verified: bool = False):
+        """Матрица пар: берём сохранённую или пересчитываем для только что загруженной модели"""
+        team_ids = list(bundle.team_emas)
+        try:
+            probs = load_matchup_matrix(version_dir, team_ids, model_sha256, verified)
+        except Exception as e:
+            print(f"⚠️ Не удалось прочитать матрицу пар: {e}")
+            probs = None
+
+        if probs is None:
+            try:
+                probs = build_matchup_matrix(bundle.team_emas, bundle.predict_features)
+            except Exception as e:
+                print(f"⚠️ Не удалось построить матрицу пар: {e}")
+                return
+            # Опубликованные версии неизменяемы, поэтому матрица сохраняется только в плоской раскладке
+            if version_dir == self.model_dir:
+                try:
+                    save_matchup_matrix(version_dir, team_ids, probs)
+                except Exception as e:
+                    print(f"⚠️ Не удалось сохранить матрицу пар: {e}")
+            print(f"✅ Матрица пар пересчитана: {len(team_ids)} x {len(team_ids)}")
+
+        bundle.matchup_probs = probs
+
+    def ensure_loaded(self) -> Optional[ModelBundle]:
+        """Вернуть загруженный набор, при первом обращении загрузив его"""
+        if self._bundle is None and not self._attempted:
+            with self._lock:
+                if not self._attempted:
+                    return self._load_locked()
+        return self._bundle
+
+    def info(self) -> Dict[str, Any]:
+        """Версия и время загрузки текущей модели"""
+        bundle = self._bundle
+        return {
+            "loaded": bundle is not None,
+            "version": bundle.version if bundle else None,
+            "engine": bundle.engine if bundle else None,
+            "loaded_at": bundle.loaded_at.isoformat() if bundle else None,
+        }
+
+
+# Единственный экземпляр на процесс
+registry = ModelRegistry()
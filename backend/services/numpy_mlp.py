@@ -0,0 +1,75 @@
+from typing import List, Sequence
+
+import numpy as np
+
+MLP_FILE = "mlp.npz"
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    # Та же сигмоида, но без переполнения exp на больших отрицательных значениях
+    "sigmoid": lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),
+    "tanh": np.tanh,
+}
+
+
+class NumpyScaler:
+    """Параметры StandardScaler без sklearn: (x - mean) / scale"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, X) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class NumpyMLP:
+    """
+    Прямой проход полносвязной сети на NumPy.
+    Повторяет интерфейс keras-модели (predict -> массив n x 1), чтобы подменять её без TensorFlow.
+    """
+
+    def __init__(self, kernels: List[np.ndarray], biases: List[np.ndarray], activations: List[str]):
+        if not (len(kernels) == len(biases) == len(activations)):
+            raise ValueError("Количество слоёв, смещений и активаций не совпадает")
+        for name in activations:
+            if name not in ACTIVATIONS:
+                raise ValueError(f"Неизвестная активация: {name}")
+        self.kernels = [np.asarray(k, dtype=np.float64) for k in kernels]
+        self.biases = [np.asarray(b, dtype=np.float64) for b in biases]
+        self.activations = list(activations)
+
+    def predict(self, X, batch_size=None, verbose=0) -> np.ndarray:
+        out = np.asarray(X, dtype=np.float64)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            out = ACTIVATIONS[activation](out @ kernel + bias)
+        return out
+
+
+def save_mlp(path: str, layer_weights: Sequence[Sequence[np.ndarray]], activations: Sequence[str],
+             scaler_mean: np.ndarray, scaler_scale: np.ndarray):
+    """Экспорт весов Dense-слоёв и параметров scaler в один .npz"""
+    arrays = {
+        "n_layers": np.array(len(layer_weights)),
+        "activations": np.array(list(activations), dtype=str),
+        "scaler_mean": np.asarray(scaler_mean, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler_scale, dtype=np.float64),
+    }
+    for i, (kernel, bias) in enumerate(layer_weights):
+        arrays[f"kernel_{i}"] = kernel
+        arrays[f"bias_{i}"] = bias
+    np.savez(path, **arrays)
+
+
+def load_mlp(path: str):
+    """Загрузка сети и scaler из .npz, сохранённого save_mlp"""
+    with np.load(path) as data:
+        n_layers = int(data["n_layers"])
+        model = NumpyMLP(
+            [data[f"kernel_{i}"] for i in range(n_layers)],
+            [data[f"bias_{i}"] for i in range(n_layers)],
+            data["activations"].tolist(),
+        )
+        scaler = NumpyScaler(data["scaler_mean"], data["scaler_scale"])
+    return model, scaler
@@ -0,0 +1,40 @@
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.batch_writer import BatchWriter
+from services.db_pool import SQLitePool, db_pool
+
+# Пакет пишется, когда набралось FLUSH_SIZE прогнозов или прошло FLUSH_INTERVAL_MS с первого в пакете
+FLUSH_SIZE = int(os.getenv("PREDICTION_FLUSH_SIZE", "100"))
+FLUSH_INTERVAL_MS = float(os.getenv("PREDICTION_FLUSH_INTERVAL_MS", "500"))
+# Больше неподтверждённых прогнозов не держим: submit ждёт, пока запись догонит
+MAX_QUEUE = int(os.getenv("PREDICTION_QUEUE_MAX", "10000"))
+# Сколько ID резервировать за одно обращение к sqlite_sequence
+ID_BLOCK_SIZE = int(os.getenv("PREDICTION_ID_BLOCK", "1000"))
+
+COLUMNS = (
+    "id", "user_id", "team1_id", "team2_id", "probability_team1", "probability_team2",
+    "expected_score_team1", "expected_score_team2", "confidence", "model_version", "created_at",
+)
+
+
+class PredictionWriter(BatchWriter):
+    """
+    Отложенная запись прогнозов: запрос получает ID сразу, строки пишутся пакетами в одной транзакции.
+    Пока прогноз не записан, он доступен через pending_by_id / pending_for_user.
+    """
+
+    def __init__(self, pool: SQLitePool = db_pool, flush_size: int = FLUSH_SIZE,
+                 flush_interval_ms: float = FLUSH_INTERVAL_MS, max_queue: int = MAX_QUEUE,
+                 id_block_size: int = ID_BLOCK_SIZE):
+        super().__init__(pool, "predictions", COLUMNS, "prediction-writer",
+                         flush_size, flush_interval_ms, max_queue, id_block_size)
+
+    def pending_for_user(self, user_id: int) -> List[Dict[str, Any]]:
+        return self.pending_where("user_id", user_id)
+
+
+# Единственный писатель прогнозов на процесс
+prediction_writer = PredictionWriter()
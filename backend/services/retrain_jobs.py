@@ -0,0 +1,284 @@
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.model_registry import registry
+from services.team_catalog import team_catalog
+from services.artifact_store import (
+    collect_garbage, copy_current, create_staging_dir, publish, remove_stale_staging
+)
+
+DB_PATH = "./nba.sqlite"
+DAYS_BACK = 7
+RETRAIN_MODES = ("incremental", "full")
+# Сколько завершённых задач помнить для эндпоинта статуса
+MAX_JOBS_KEPT = 20
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Доля общего прогресса, которую занимает каждый этап: (начало, конец)
+STAGE_RANGES = {
+    "queued": (0.0, 0.0),
+    "updating_data": (0.0, 0.10),
+    "deciding": (0.10, 0.15),
+    "loading": (0.15, 0.20),
+    "training": (0.20, 0.90),
+    "saving": (0.90, 0.99),
+    "publishing": (0.99, 1.0),
+}
+
+# TensorFlow не переживает fork, поэтому воркер всегда запускается через spawn
+_mp = multiprocessing.get_context("spawn")
+
+
+def _run_job(job_id: str, db_path: str, model_dir: str, staging_dir: str,
+             force: bool, mode: str, events):
+    """
+    Тело задачи в отдельном процессе: обновление данных, решение о переобучении и обучение.
+    Артефакты пишутся только в staging_dir; API публикует его как новую версию после успешного завершения.
+    """
+    def progress(stage: str, fraction: float, message: str = ""):
+        events.put(("progress", {"stage": stage, "fraction": fraction, "message": message}))
+
+    try:
+        progress("updating_data", 0.0, f"загрузка игр за {DAYS_BACK} дней")
+        from scripts.update_data import update_db_with_new_games
+        update_db_with_new_games(db_path, DAYS_BACK)
+
+        progress("deciding", 0.0, "сравнение отпечатка данных")
+        from scripts.fingerprint import retrain_decision
+        should_train, reason, fingerprint = retrain_decision(db_path, model_dir, force)
+        if not should_train:
+            events.put(("skipped", {"reason": reason}))
+            return
+
+        # Копия текущей версии: дообучение стартует с неё, а опубликованные версии не трогаются
+        os.makedirs(staging_dir, exist_ok=True)
+        copy_current(model_dir, staging_dir)
+
+        from scripts.train_model import train_model, train_model_incremental
+        if mode == "incremental":
+            result = train_model_incremental(db_path, staging_dir, fingerprint, progress)
+        else:
+            train_model(db_path, staging_dir, fingerprint, progress)
+            result = {"mode": "full", "reason": "обучение с нуля"}
+        events.put(("completed", {"reason": reason, "result": result}))
+    except Exception as e:
+        events.put(("failed", {"error": f"{type(e).__name__}: {e}"}))
+
+
+class RetrainJob:
+    """Состояние одной задачи переобучения"""
+
+    def __init__(self, job_id: str, force: bool, mode: str):
+        self.job_id = job_id
+        self.force = force
+        self.mode = mode
+        self.status = "queued"
+        self.stage = "queued"
+        self.stage_progress = 0.0
+        self.progress = 0.0
+        self.message = None
+        self.reason = None
+        self.result = None
+        self.error = None
+        self.pid = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.process = None
+        self.monitor = None
+        self.cancel_requested = False
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def set_progress(self, stage: str, fraction: float, message: str = ""):
+        start, end = STAGE_RANGES.get(stage, (self.progress, self.progress))
+        fraction = min(max(fraction, 0.0), 1.0)
+        self.stage = stage
+        self.stage_progress = round(fraction, 4)
+        self.progress = round(max(self.progress, start + (end - start) * fraction), 4)
+        self.message = message or None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "mode": self.mode,
+            "force": self.force,
+            "stage": self.stage,
+            "stage_progress": self.stage_progress,
+            "progress": self.progress,
+            "message": self.message,
+            "reason": self.reason,
+            "result": self.result,
+            "error": self.error,
+            "pid": self.pid,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class RetrainJobManager:
+    """
+    Переобучение в отдельном процессе, не больше одной задачи одновременно.
+    Повторный запуск во время работы возвращает уже идущую задачу.
+    Новая версия артефактов публикуется и загружается в реестр только после успешного завершения.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, model_dir: Optional[str] = None):
+        self.db_path = db_path
+        self.model_dir = model_dir or registry.model_dir
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, RetrainJob]" = OrderedDict()
+        self._active: Optional[RetrainJob] = None
+
+    def submit(self, force: bool = False, mode: str = "incremental") -> Tuple[RetrainJob, bool]:
+        """Запустить задачу. Возвращает (задача, создана ли новая)"""
+        if mode not in RETRAIN_MODES:
+            raise ValueError(f"mode должен быть одним из: {', '.join(RETRAIN_MODES)}")
+        with self._lock:
+            if self._active is not None and self._active.active:
+                return self._active, False
+            job = RetrainJob(uuid.uuid4().hex[:12], force, mode)
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > MAX_JOBS_KEPT:
+                self._jobs.popitem(last=False)
+            self._active = job
+
+            events = _mp.Queue()
+            job.process = _mp.Process(
+                target=_run_job,
+                args=(job.job_id, self.db_path, self.model_dir, self._staging_dir(job),
+                      force, mode, events),
+                name=f"retrain-{job.job_id}",
+                daemon=True,
+            )
+            job.process.start()
+            job.pid = job.process.pid
+            job.status = "running"
+            job.started_at = datetime.now()
+
+        job.monitor = threading.Thread(target=self._monitor, args=(job, events),
+                                       name=f"retrain-monitor-{job.job_id}", daemon=True)
+        job.monitor.start()
+        print(f"🔄 Переобучение запущено: задача {job.job_id} (pid {job.pid}, режим {mode})")
+        return job, True
+
+    def get(self, job_id: str) -> Optional[RetrainJob]:
+        return self._jobs.get(job_id)
+
+    def latest(self) -> Optional[RetrainJob]:
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+
+    def jobs(self):
+        with self._lock:
+            return [job.to_dict() for job in reversed(self._jobs.values())]
+
+    def cancel(self, job_id: str) -> Optional[RetrainJob]:
+        """Остановить процесс задачи; наполовину записанные артефакты удаляются"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if not job.active:
+                return job
+            job.cancel_requested = True
+            process = job.process
+        if process is not None and process.is_alive():
+            process.terminate()
+            process.join(10)
+            if process.is_alive():
+                process.kill()
+        # Дождаться, пока монитор уберёт staging и выставит итоговый статус
+        if job.monitor is not None:
+            job.monitor.join(10)
+        return job
+
+    def cleanup(self):
+        """Уборка при старте API: брошенные staging-папки и лишние старые версии"""
+        removed = remove_stale_staging(self.model_dir) + collect_garbage(self.model_dir)
+        if removed:
+            print(f"🧹 Удалены старые артефакты: {', '.join(removed)}")
+
+    def shutdown(self):
+        """Остановить идущую задачу при остановке API"""
+        job = self._active
+        if job is not None and job.active:
+            self.cancel(job.job_id)
+
+    def _staging_dir(self, job: RetrainJob) -> str:
+        return create_staging_dir(self.model_dir, job.job_id)
+
+    def _monitor(self, job: RetrainJob, events):
+        outcome = None
+        while True:
+            try:
+                kind, payload = events.get(timeout=0.5)
+            except queue.Empty:
+                if not job.process.is_alive():
+                    break
+                continue
+            if kind == "progress":
+                job.set_progress(payload["stage"], payload["fraction"], payload["message"])
+            else:
+                outcome = (kind, payload)
+        job.process.join()
+        # Задача загружала новые игры - справочник команд мог измениться
+        team_catalog.invalidate()
+
+        staging_dir = self._staging_dir(job)
+        try:
+            if job.cancel_requested:
+                self._finish(job, "cancelled", message="Задача отменена")
+            elif outcome is None:
+                self._finish(job, "failed", error=f"Процесс завершился с кодом {job.process.exitcode}")
+            else:
+                kind, payload = outcome
+                if kind == "completed":
+                    job.set_progress("publishing", 0.0, "публикация версии")
+                    manifest = publish(self.model_dir, staging_dir)
+                    bundle = registry.load()
+                    # Версию, которую держит реестр (если новая не загрузилась), не удаляем
+                    collect_garbage(self.model_dir, protect=[bundle.version if bundle else None])
+                    payload["result"]["version"] = manifest["version"]
+                    self._finish(job, "completed", reason=payload["reason"], result=payload["result"])
+                elif kind == "skipped":
+                    self._finish(job, "skipped", reason=payload["reason"])
+                else:
+                    self._finish(job, "failed", error=payload["error"])
+        except Exception as e:
+            self._finish(job, "failed", error=f"Ошибка публикации артефактов: {e}")
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _finish(self, job: RetrainJob, status: str, reason=None, result=None, error=None, message=None):
+        with self._lock:
+            job.status = status
+            job.reason = reason
+            job.result = result
+            job.error = error
+            if message:
+                job.message = message
+            if status == "completed":
+                job.progress = 1.0
+            job.finished_at = datetime.now()
+            job.process = None
+        icons = {"completed": "✅", "skipped": "⏭️", "cancelled": "🛑", "failed": "❌"}
+        print(f"{icons.get(status, '')} Переобучение {job.job_id}: {status} {reason or error or ''}".rstrip())
+
+
+# Единственный менеджер задач на процесс
+retrain_jobs = RetrainJobManager()
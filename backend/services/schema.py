@@ -0,0 +1,268 @@
+import sqlite3
+import sys
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.db_pool import db_pool
+
+# Таблицы приложения (таблица game приходит из импортированного nba.sqlite)
+PREDICTIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS predictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        team1_id INTEGER,
+        team2_id INTEGER,
+        probability_team1 REAL,
+        probability_team2 REAL,
+        expected_score_team1 INTEGER,
+        expected_score_team2 INTEGER,
+        confidence REAL,
+        model_version TEXT,
+        created_at TIMESTAMP
+    )
+'''
+
+AUDIT_LOGS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS audit_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        action TEXT,
+        entity TEXT,
+        entity_id INTEGER,
+        details TEXT,
+        ip_address TEXT,
+        created_at TIMESTAMP
+    )
+'''
+
+# Справочник команд, построенный из game; дальше его поддерживает загрузка игр (GameBatchWriter)
+TEAMS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS teams (
+        team_id TEXT PRIMARY KEY,
+        name TEXT,
+        abbrev TEXT,
+        updated_at TIMESTAMP
+    )
+'''
+
+# Для каждой команды - название и аббревиатура из её последнего матча
+# (SQLite берёт «голые» колонки из строки с MAX(game_date))
+BUILD_TEAMS_QUERY = '''
+    INSERT OR IGNORE INTO teams (team_id, name, abbrev, updated_at)
+    SELECT team_id, name, abbrev, ? FROM (
+        SELECT team_id, name, abbrev, MAX(game_date) FROM (
+            SELECT team_id_home AS team_id, team_name_home AS name,
+                   team_abbreviation_home AS abbrev, game_date FROM game
+            UNION ALL
+            SELECT team_id_away, team_name_away, team_abbreviation_away, game_date FROM game
+        )
+        WHERE team_id IS NOT NULL
+        GROUP BY team_id
+    )
+'''
+
+# Прогресс исторической загрузки (update_data.py backfill): дни, полностью записанные в game
+INGEST_PROGRESS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS ingest_progress (
+        date TEXT PRIMARY KEY,
+        games INTEGER,
+        completed_at TIMESTAMP
+    )
+'''
+
+# Нормализованный ID матча в game: match_id - число из game_id, source - откуда пришла игра
+# ("0021500001" из исходного nba.sqlite -> 21500001/nba, "ESPN_401810646" -> 401810646/espn)
+ESPN_PREFIX = "ESPN_"
+MATCH_ID_COLUMNS = [("match_id", "INTEGER"), ("source", "TEXT")]
+
+# (имя, таблица, колонки). Для game порядок колонок подобран под запросы сервисов:
+# сначала колонки из равенств, затем game_date для сортировки
+INDEXES: List[Tuple[str, str, str]] = [
+    # Поиск игры по исходному строковому game_id при загрузке
+    ("idx_game_game_id", "game", "game_id"),
+    # get_match_by_id: match_id = ?
+    ("idx_game_match_id", "game", "match_id"),
+    # get_matches_page без фильтра и загрузка для обучения: ORDER BY game_date, game_id / WHERE game_date
+    ("idx_game_date_id", "game", "game_date, game_id"),
+    # get_matches_page со статусом: WHERE wl_home IS [NOT] NULL ORDER BY game_date, game_id
+    ("idx_game_wl_date_id", "game", "wl_home, game_date, game_id"),
+    # История команды и личные встречи: team_id_home = ? [AND team_id_away = ?] ORDER BY game_date
+    ("idx_game_home_away_date", "game", "team_id_home, team_id_away, game_date"),
+    ("idx_game_away_home_date", "game", "team_id_away, team_id_home, game_date"),
+    # get_matches_page с командой: ветки team_id_home = ? и team_id_away = ? с курсором по (game_date, game_id)
+    ("idx_game_home_date_id", "game", "team_id_home, game_date, game_id"),
+    ("idx_game_away_date_id", "game", "team_id_away, game_date, game_id"),
+    # Покрывающие для выборок команд из game (DISTINCT id, название, аббревиатура при обучении)
+    ("idx_game_home_team", "game", "team_id_home, team_name_home, team_abbreviation_home"),
+    ("idx_game_away_team", "game", "team_id_away, team_name_away, team_abbreviation_away"),
+    # История прогнозов пользователя: WHERE user_id = ? ORDER BY created_at DESC
+    ("idx_predictions_user_created", "predictions", "user_id, created_at"),
+    # Журнал аудита: ORDER BY created_at DESC LIMIT ?
+    ("idx_audit_logs_created", "audit_logs", "created_at"),
+]
+
+# Индексы, которые заменены более широкими (с тем же префиксом) и удаляются миграцией
+OBSOLETE_INDEXES = ["idx_game_date", "idx_game_wl_date"]
+
+# Горячие запросы сервисов в том виде, в котором их выполняет SQLite (для EXPLAIN QUERY PLAN)
+HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    "AIService._get_team_history": (
+        "SELECT * FROM game WHERE team_id_home = ? OR team_id_away = ? ORDER BY game_date DESC LIMIT ?",
+        (1, 1, 50),
+    ),
+    "AIService._get_head_to_head": (
+        "SELECT * FROM game WHERE (team_id_home = ? AND team_id_away = ?) "
+        "OR (team_id_home = ? AND team_id_away = ?) ORDER BY game_date DESC LIMIT ?",
+        (1, 2, 2, 1, 20),
+    ),
+    "MatchService.get_matches_page": (
+        "SELECT * FROM game WHERE match_id IS NOT NULL AND (game_date, game_id) < (?, ?) "
+        "ORDER BY game_date DESC, game_id DESC LIMIT ? OFFSET ?",
+        ("2020-01-01", "1", 100, 0),
+    ),
+    "MatchService.get_matches_page(status=finished)": (
+        "SELECT * FROM game WHERE match_id IS NOT NULL AND wl_home IS NOT NULL AND (game_date, game_id) < (?, ?) "
+        "ORDER BY game_date DESC, game_id DESC LIMIT ? OFFSET ?",
+        ("2020-01-01", "1", 100, 0),
+    ),
+    "MatchService.get_matches_page(status=scheduled)": (
+        "SELECT * FROM game WHERE match_id IS NOT NULL AND wl_home IS NULL AND (game_date, game_id) < (?, ?) "
+        "ORDER BY game_date DESC, game_id DESC LIMIT ? OFFSET ?",
+        ("2020-01-01", "1", 100, 0),
+    ),
+    "MatchService.get_matches_page(team_id)": (
+        "SELECT * FROM ("
+        "SELECT * FROM (SELECT * FROM game WHERE team_id_home = ? AND match_id IS NOT NULL AND (game_date, game_id) < (?, ?) "
+        "ORDER BY game_date DESC, game_id DESC LIMIT ?) UNION ALL "
+        "SELECT * FROM (SELECT * FROM game WHERE team_id_away = ? AND match_id IS NOT NULL AND (game_date, game_id) < (?, ?) "
+        "ORDER BY game_date DESC, game_id DESC LIMIT ?)"
+        ") ORDER BY game_date DESC, game_id DESC LIMIT ? OFFSET ?",
+        (1, "2020-01-01", "1", 100, 1, "2020-01-01", "1", 100, 100, 0),
+    ),
+    "MatchService.get_match_by_id": (
+        "SELECT * FROM game WHERE match_id = ?",
+        (1,),
+    ),
+    "update_data.load_known_games": (
+        "SELECT game_id, pts_home, pts_away, fga_home, fga_away FROM game "
+        "WHERE game_date >= ? AND game_date < ? AND source = 'espn'",
+        ("2024-01-01", "2024-01-09"),
+    ),
+    "AIService.get_user_predictions": (
+        "SELECT * FROM predictions WHERE user_id = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+        (1, 50, 0),
+    ),
+    "AuditService.get_all_logs": (
+        "SELECT * FROM audit_logs ORDER BY created_at DESC LIMIT ?",
+        (100,),
+    ),
+}
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchone() is not None
+
+
+def parse_match_id(game_id) -> Tuple[Optional[int], str]:
+    """(match_id, source) для строкового game_id; match_id None, если в нём не число"""
+    text = str(game_id or "")
+    source = "nba"
+    if text.startswith(ESPN_PREFIX):
+        text = text[len(ESPN_PREFIX):]
+        source = "espn"
+    return (int(text) if text.isdigit() else None), source
+
+
+def ensure_match_ids(conn: sqlite3.Connection) -> int:
+    """
+    Добавить в game колонки match_id/source и заполнить их для строк, где source ещё пуст
+    (первый запуск или игры, записанные в обход GameBatchWriter). Возвращает число заполненных строк.
+    """
+    if not _table_exists(conn, "game"):
+        return 0
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(game)")}
+    for column, column_type in MATCH_ID_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE game ADD COLUMN {column} {column_type}")
+
+    # Тот же разбор, что и при загрузке, - через функцию Python внутри UPDATE
+    conn.create_function("match_id_of", 1, lambda game_id: parse_match_id(game_id)[0], deterministic=True)
+    conn.create_function("source_of", 1, lambda game_id: parse_match_id(game_id)[1], deterministic=True)
+    cursor = conn.execute(
+        "UPDATE game SET match_id = match_id_of(game_id), source = source_of(game_id) "
+        "WHERE match_id IS NULL AND source IS NULL"
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def ensure_schema(conn: sqlite3.Connection) -> List[str]:
+    """
+    Идемпотентная миграция: таблицы приложения, справочник команд, нормализованный ID матча
+    и индексы под горячие запросы. Индексы на game создаются, только если таблица уже импортирована.
+    Возвращает имена созданных индексов.
+    """
+    conn.execute(PREDICTIONS_TABLE)
+    conn.execute(AUDIT_LOGS_TABLE)
+    conn.execute(INGEST_PROGRESS_TABLE)
+    ensure_teams(conn)
+    ensure_match_ids(conn)
+
+    for name in OBSOLETE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    created = []
+    for name, table, columns in INDEXES:
+        if name in existing or not _table_exists(conn, table):
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
+        created.append(name)
+
+    if created:
+        # Статистика для планировщика, чтобы он выбирал новые индексы
+        conn.execute("ANALYZE")
+    conn.commit()
+    return created
+
+
+def ensure_teams(conn: sqlite3.Connection) -> int:
+    """
+    Создать таблицу teams и заполнить её из game, если она пустая.
+    Возвращает число добавленных команд.
+    """
+    conn.execute(TEAMS_TABLE)
+    if conn.execute("SELECT 1 FROM teams LIMIT 1").fetchone() or not _table_exists(conn, "game"):
+        return 0
+    cursor = conn.execute(BUILD_TEAMS_QUERY, (datetime.now().isoformat(),))
+    conn.commit()
+    return cursor.rowcount
+
+
+def bootstrap_schema():
+    """Миграция при старте API"""
+    with db_pool.connection() as conn:
+        created = ensure_schema(conn)
+    if created:
+        print(f"🗂️ Созданы индексы SQLite: {', '.join(created)}")
+
+
+def explain_hot_queries(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """EXPLAIN QUERY PLAN для каждого горячего запроса: {запрос: [шаги плана]}"""
+    plans = {}
+    for name, (query, params) in HOT_QUERIES.items():
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            plans[name] = [row[3] for row in rows]
+        except sqlite3.OperationalError as e:
+            plans[name] = [f"ошибка: {e}"]
+    return plans
+
+
+def is_full_scan(step: str) -> bool:
+    """Шаг плана читает таблицу целиком (без индекса); проход по результату подзапроса не в счёт"""
+    return step.startswith("SCAN ") and " INDEX " not in step and not step.startswith("SCAN (")
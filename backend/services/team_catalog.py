@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.db_pool import SQLitePool, db_pool
+
+# Как часто проверять, не изменилась ли таблица teams (её может менять другой процесс)
+REFRESH_INTERVAL = float(os.getenv("TEAM_CATALOG_REFRESH_SECONDS", "5"))
+
+UPSERT_TEAM_QUERY = '''
+    INSERT INTO teams (team_id, name, abbrev, updated_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT(team_id) DO UPDATE SET
+        name = excluded.name, abbrev = excluded.abbrev, updated_at = excluded.updated_at
+    WHERE teams.name IS NOT excluded.name OR teams.abbrev IS NOT excluded.abbrev
+'''
+
+
+def upsert_teams(conn: sqlite3.Connection, games: List[Dict[str, Any]]) -> int:
+    """
+    Добавить в teams команды матчей или обновить их название/аббревиатуру - одна строка на команду
+    (по последнему матчу пакета), один executemany. Строки без изменений не трогаются.
+    Возвращает число изменённых строк; commit - за вызывающим.
+    """
+    now = datetime.now().isoformat()
+    teams = {}
+    for game in games:
+        for side in ("home", "away"):
+            team_id = game.get(f"team_id_{side}")
+            if team_id is not None:
+                teams[str(team_id)] = (game.get(f"team_name_{side}"), game.get(f"team_abbreviation_{side}"))
+    if not teams:
+        return 0
+    cursor = conn.executemany(UPSERT_TEAM_QUERY, [
+        (team_id, name, abbrev, now) for team_id, (name, abbrev) in teams.items()
+    ])
+    return cursor.rowcount
+
+
+class TeamCatalog:
+    """
+    Справочник команд в памяти поверх таблицы teams.
+    Раз в REFRESH_INTERVAL секунд сверяет отметку таблицы (число строк и последний updated_at)
+    и перечитывает её только при изменении. Снимок заменяется целиком, читатели блокировку не берут.
+    """
+
+    def __init__(self, pool: SQLitePool = db_pool, refresh_interval: float = REFRESH_INTERVAL):
+        self.pool = pool
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot = ({}, {}, {})  # по id, по названию, по аббревиатуре
+        self._stamp = None
+        self._checked_at = 0.0
+        self._reloads = 0
+
+    def _refresh(self):
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        # Пока другой поток перечитывает таблицу, остальные отвечают по текущему снимку;
+        # ждут только до первой загрузки
+        if not self._lock.acquire(blocking=self._stamp is None):
+            return
+        try:
+            if time.monotonic() - self._checked_at < self.refresh_interval:
+                return
+            with self.pool.connection() as conn:
+                try:
+                    stamp = tuple(conn.execute("SELECT COUNT(*), MAX(updated_at) FROM teams").fetchone())
+                except sqlite3.OperationalError:
+                    # Таблицы ещё нет (миграция не запускалась или нет game)
+                    stamp = None
+                if stamp is not None and stamp != self._stamp:
+                    rows = conn.execute("SELECT team_id, name, abbrev FROM teams ORDER BY team_id").fetchall()
+                    by_id = {row["team_id"]: {"id": row["team_id"], "name": row["name"], "abbrev": row["abbrev"]}
+                             for row in rows}
+                    self._snapshot = (
+                        by_id,
+                        {team["name"]: team for team in by_id.values()},
+                        {team["abbrev"]: team for team in by_id.values()},
+                    )
+                    self._reloads += 1
+            self._stamp = stamp
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        """Проверить таблицу при следующем обращении, не дожидаясь интервала"""
+        self._checked_at = 0.0
+
+    def get(self, team_id) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        return self._snapshot[0].get(str(team_id))
+
+    def get_many(self, team_ids) -> Dict[str, Dict[str, Any]]:
+        """Несколько команд за одно обращение: {str(id): команда}, неизвестные id пропускаются"""
+        self._refresh()
+        by_id = self._snapshot[0]
+        return {key: by_id[key] for key in map(str, team_ids) if key in by_id}
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        return self._snapshot[1].get(name)
+
+    def get_by_abbrev(self, abbrev: str) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        return self._snapshot[2].get(abbrev)
+
+    def all(self) -> List[Dict[str, Any]]:
+        self._refresh()
+        return list(self._snapshot[0].values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "teams": len(self._snapshot[0]),
+            "reloads": self._reloads,
+            "refresh_interval": self.refresh_interval,
+        }
+
+
+# Справочник для основной БД приложения
+team_catalog = TeamCatalog()
@@ -1,66 +1,46 @@
 from sqlalchemy.orm import Session
-import sqlite3
 from datetime import datetime
 import sys
 import os
 from typing import List, Optional, Dict
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.db_pool import db_pool
+from services.team_catalog import team_catalog
 import schemas
 
-DB_PATH = "./nba.sqlite"
-
 
 class TeamService:
     def __init__(self, db: Session):
         self.db = db
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row
 
     def get_all_teams(self, skip: int = 0, limit: int = 100):
         """Получение всех команд"""
-        cursor = self.conn.cursor()
+        # Справочник команд из таблицы teams (строится из game при миграции)
+        teams = team_catalog.all()
+        if teams:
+            return [
+                {
+                    "id": team["id"],
+                    "name": team["name"],
+                    "abbrev": team["abbrev"],
+                    "full_name": team["name"],
+                    "city": "",
+                    "arena": "",
+                    "founded_year": 0,
+                    "conference_id": 0,
+                    "division_id": 0,
+                    "championships": 0,
+                    "wins": 0,
+                    "losses": 0,
+                    "points_per_game": 0,
+                    "points_against": 0
+                }
+                for team in teams[skip:skip + limit]
+            ]
 
-        # Проверяем есть ли таблица game с командами
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='game'")
-        if cursor.fetchone():
-            cursor.execute("""
-                SELECT DISTINCT 
-                    team_id_home as id, 
-                    team_name_home as name, 
-                    team_abbreviation_home as abbrev,
-                    team_name_home as full_name,
-                    '' as city,
-                    '' as arena,
-                    0 as founded_year,
-                    0 as conference_id,
-                    0 as division_id,
-                    0 as championships,
-                    0 as wins,
-                    0 as losses,
-                    0 as points_per_game,
-                    0 as points_against
-                FROM game 
-                UNION 
-                SELECT DISTINCT 
-                    team_id_away as id, 
-                    team_name_away as name, 
-                    team_abbreviation_away as abbrev,
-                    team_name_away as full_name,
-                    '' as city,
-                    '' as arena,
-                    0 as founded_year,
-                    0 as conference_id,
-                    0 as division_id,
-                    0 as championships,
-                    0 as wins,
-                    0 as losses,
-                    0 as points_per_game,
-                    0 as points_against
-                FROM game
-                LIMIT ? OFFSET ?
-            """, (limit, skip))
-        else:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
             # Демо-данные
             cursor.execute("""
                 SELECT 1 as id, 'Boston Celtics' as name, 'BOS' as abbrev, 'Boston Celtics' as full_name,
@@ -78,36 +58,28 @@ class TeamService:
                 LIMIT ? OFFSET ?
             """, (limit, skip))
 
-        return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
 
     def get_team_by_id(self, team_id: int):
         """Получение команды по ID"""
-        cursor = self.conn.cursor()
-
-        cursor.execute("""
-            SELECT * FROM game WHERE team_id_home = ? OR team_id_away = ? LIMIT 1
-        """, (team_id, team_id))
-
-        row = cursor.fetchone()
-        if row:
-            team_data = dict(row)
-            if team_data["team_id_home"] == team_id:
-                return {
-                    "id": team_data["team_id_home"],
-                    "name": team_data["team_name_home"],
-                    "abbrev": team_data["team_abbreviation_home"],
-                    "full_name": team_data["team_name_home"],
-                    "city": team_data["team_name_home"].split()[-1] if " " in team_data["team_name_home"] else "",
-                    "arena": f"{team_data['team_name_home']} Arena",
-                    "founded_year": 1970,
-                    "conference_id": 1,
-                    "division_id": 1,
-                    "championships": 1,
-                    "wins": 41,
-                    "losses": 41,
-                    "points_per_game": 110.5,
-                    "points_against": 109.8
-                }
+        team = team_catalog.get(team_id)
+        if team:
+            return {
+                "id": team["id"],
+                "name": team["name"],
+                "abbrev": team["abbrev"],
+                "full_name": team["name"],
+                "city": team["name"].split()[-1] if " " in team["name"] else "",
+                "arena": f"{team['name']} Arena",
+                "founded_year": 1970,
+                "conference_id": 1,
+                "division_id": 1,
+                "championships": 1,
+                "wins": 41,
+                "losses": 41,
+                "points_per_game": 110.5,
+                "points_against": 109.8
+            }
 
         # Демо-данные для известных ID
         demo_teams = {
@@ -139,13 +111,10 @@ class TeamService:
 
     def get_team_by_name(self, name: str):
         """Получение команды по названию"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM game WHERE team_name_home = ? OR team_name_away = ? LIMIT 1", (name, name))
-        row = cursor.fetchone()
-        if row:
-            team_data = dict(row)
+        team = team_catalog.get_by_name(name)
+        if team:
             return {
-                "id": team_data["team_id_home"] if team_data["team_name_home"] == name else team_data["team_id_away"],
+                "id": team["id"],
                 "name": name
             }
         return None